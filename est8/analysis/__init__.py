@@ -0,0 +1 @@
+"""Offline analysis of game definitions, decks and optimal play."""
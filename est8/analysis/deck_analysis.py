@@ -0,0 +1,172 @@
+"""
+Exact statistics of a DeckDefinition, calculated rather than sampled.
+
+Every quantity is computed from the counts of each card in the deck using memoized
+dynamic programming over (cards left, matching cards left) and similar small states, so
+a full report takes milliseconds. All results are exact Fractions and describe the
+first pass through a freshly shuffled deck.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from fractions import Fraction
+from functools import lru_cache
+from math import comb
+from typing import Dict, Optional, Tuple
+
+from est8.backend.definitions import ActionEnum, DeckDefinition, GameDefinition
+
+
+@lru_cache(maxsize=None)
+def probability_of_none(deck_size: int, num_matching: int, num_draws: int) -> Fraction:
+    """Get the probability that none of num_draws cards drawn are one of num_matching."""
+    if num_draws == 0:
+        return Fraction(1)
+    if num_draws > deck_size - num_matching:
+        return Fraction(0)
+    return Fraction(deck_size - num_matching, deck_size) * probability_of_none(
+        deck_size - 1, num_matching, num_draws - 1
+    )
+
+
+def card_pair_distribution(
+    deck: DeckDefinition,
+) -> Dict[Tuple[int, ActionEnum], Fraction]:
+    """
+    Get the probability of each (number, action) a card pair from generate_card_pairs has.
+
+    The number and action of a pair come from two different cards, so a card can't be
+    paired with itself.
+    """
+    cards = Counter(deck.ordered_card_generator())
+    number_counts: Counter = Counter()
+    action_counts: Counter = Counter()
+    for card, count in cards.items():
+        number_counts[card.number] += count
+        action_counts[card.action] += count
+
+    deck_size = deck.deck_size
+    num_ordered_pairs = deck_size * (deck_size - 1)
+    distribution = {}
+    for number, number_count in sorted(number_counts.items()):
+        for action, action_count in action_counts.items():
+            same_card = sum(
+                count
+                for card, count in cards.items()
+                if card.number == number and card.action == action
+            )
+            distribution[(number, action)] = Fraction(
+                number_count * action_count - same_card, num_ordered_pairs
+            )
+    return distribution
+
+
+def expected_turns_until_action(
+    game_definition: GameDefinition, action: ActionEnum
+) -> Optional[Fraction]:
+    """
+    Get the expected turn number (starting at 1) on which the action is first available.
+
+    :return: None if the deck has no cards with the action.
+    """
+    deck = game_definition.deck
+    num_matching = sum(
+        1 for card in deck.ordered_card_generator() if card.action == action
+    )
+    if num_matching == 0:
+        return None
+
+    # The action cards of turn t are cards [k(t - 1), kt) of the deck, so the expected
+    # turn is the sum over t >= 0 of P(the action is not in the first kt cards).
+    cards_per_turn = game_definition.num_cards_drawn_at_once
+    expected = Fraction(0)
+    num_turns = 0
+    while True:
+        probability = probability_of_none(
+            deck.deck_size, num_matching, num_turns * cards_per_turn
+        )
+        if probability == 0:
+            return expected
+        expected += probability
+        num_turns += 1
+
+
+def number_gap_distribution(
+    deck: DeckDefinition, num_houses: int
+) -> Dict[int, Fraction]:
+    """
+    Get the distribution of gaps between neighbouring numbers on a street.
+
+    num_houses cards are drawn and their numbers sorted, as they would be built along a
+    street. Gives the probability that a randomly chosen pair of neighbouring numbers
+    differ by each amount. A gap of 0 is a repeated number, which could only be built
+    as a bis.
+    """
+    number_counts = Counter(card.number for card in deck.ordered_card_generator())
+    numbers = sorted(number_counts)
+    if num_houses < 2 or num_houses > deck.deck_size:
+        return {}
+
+    @lru_cache(maxsize=None)
+    def count_gaps(
+        number_index: int, num_left: int, last_number: Optional[int]
+    ) -> Tuple[int, Tuple[Tuple[int, int], ...]]:
+        """
+        Count the ways to draw num_left more cards with numbers from number_index on.
+
+        :return: (ways, ((gap, total occurrences of the gap across those ways), ...))
+        """
+        if number_index == len(numbers):
+            return (1 if num_left == 0 else 0), ()
+
+        number = numbers[number_index]
+        total_ways = 0
+        gap_ways: Counter = Counter()
+        for num_taken in range(min(number_counts[number], num_left) + 1):
+            ways_to_take = comb(number_counts[number], num_taken)
+            ways, rest_gaps = count_gaps(
+                number_index + 1,
+                num_left - num_taken,
+                number if num_taken > 0 else last_number,
+            )
+            if ways == 0:
+                continue
+            ways *= ways_to_take
+            total_ways += ways
+            for gap, occurrences in rest_gaps:
+                gap_ways[gap] += ways_to_take * occurrences
+            if num_taken > 0:
+                if last_number is not None:
+                    gap_ways[number - last_number] += ways
+                if num_taken > 1:
+                    gap_ways[0] += ways * (num_taken - 1)
+        return total_ways, tuple(sorted(gap_ways.items()))
+
+    total_ways, gap_ways = count_gaps(0, num_houses, None)
+    num_gaps = total_ways * (num_houses - 1)
+    return {gap: Fraction(occurrences, num_gaps) for gap, occurrences in gap_ways}
+
+
+@dataclass(frozen=True)
+class DeckReport:
+    """Exact statistics of the deck of a GameDefinition."""
+
+    card_pairs: Dict[Tuple[int, ActionEnum], Fraction]
+    turns_until_action: Dict[ActionEnum, Optional[Fraction]]
+    # Indexed by street number.
+    number_gaps: Tuple[Dict[int, Fraction], ...]
+
+
+def analyse_deck(game_definition: GameDefinition) -> DeckReport:
+    deck = game_definition.deck
+    return DeckReport(
+        card_pairs=card_pair_distribution(deck),
+        turns_until_action={
+            action: expected_turns_until_action(game_definition, action)
+            for action in ActionEnum
+        },
+        number_gaps=tuple(
+            number_gap_distribution(deck, street.num_houses)
+            for street in game_definition.neighbourhood.streets
+        ),
+    )
@@ -0,0 +1,355 @@
+"""
+Precomputed moves for the first turns of a game, when every game starts from the same
+empty neighbourhood.
+
+The book is built offline by playing sample games. For each position met in the first
+turns, the few moves a GreedyPolicy likes best are each tried in greedy rollouts over the
+same random continuations of the deck, and the move with the best mean final score is
+recorded and played on. Games are split between worker processes, and every position's
+rollouts are seeded from the position itself, so the book doesn't depend on how the work
+was split.
+
+Positions are keyed by the exact state of the board and the card pairs drawn, ignoring
+the order they were drawn in. Only the number of a pair's number card and the action of
+its action card are part of the key. Bots only see a MoveValidator, which doesn't record
+parks, pools or other counters, so positions that differ only in those share a key.
+
+File layout (all little-endian):
+ - Header: magic, format version, digest of the game definition, number of turns covered,
+   number of entries.
+ - Entries, sorted by key: a 64 bit hash of the position, then the move as encoded by
+   `encode_move`, with card_pair_index referring to the card pairs in sorted order.
+
+The file is mapped when the first move is looked up, and each lookup is a binary search,
+with the most recent lookups cached in front.
+"""
+
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from functools import lru_cache
+from hashlib import blake2b
+from random import Random
+from statistics import mean
+from typing import IO, Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from est8.analysis.oracle import get_final_score
+from est8.backend.atomic_io import MappedFile, atomic_write
+from est8.backend.definitions import CardPair, GameDefinition
+from est8.backend.errors import OpeningBookFormatError
+from est8.backend.game import player_has_finished
+from est8.backend.legal_moves import generate_legal_moves
+from est8.backend.move import Move
+from est8.backend.player import Player
+from est8.backend.policies import GreedyPolicy, Policy, get_planned_fences
+from est8.backend.record import MOVE_STRUCT, decode_move, encode_move
+from est8.backend.replay import apply_move_unchecked
+from est8.backend.transcript import MoveValidator
+
+MAGIC = b"EST8OPB\x00"
+VERSION = 1
+
+HEADER_STRUCT = struct.Struct("<8sHH32sHI")
+KEY_STRUCT = struct.Struct("<Q")
+ENTRY_SIZE = KEY_STRUCT.size + MOVE_STRUCT.size
+
+
+def get_card_pair_order(card_pairs: Tuple[CardPair, ...]) -> List[int]:
+    """Get the indices of the card pairs, sorted by the number and action they give."""
+    return sorted(
+        range(len(card_pairs)),
+        key=lambda index: (
+            card_pairs[index].number_card.number,
+            card_pairs[index].action_card.action.value,
+        ),
+    )
+
+
+def get_position_key(state: MoveValidator, card_pairs: Tuple[CardPair, ...]) -> int:
+    """Get the 64 bit hash of a board and the card pairs drawn, in any order."""
+    position: Hashable = (
+        tuple(
+            (tuple(street.numbers), tuple(street.is_roundabout), tuple(street.fences))
+            for street in state.streets
+        ),
+        tuple(sorted(state.investments.items())),
+        state.num_roundabouts,
+        tuple(
+            (
+                card_pairs[index].number_card.number,
+                card_pairs[index].action_card.action.value,
+            )
+            for index in get_card_pair_order(card_pairs)
+        ),
+    )
+    digest = blake2b(repr(position).encode(), digest_size=KEY_STRUCT.size).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _play_out(
+    state: MoveValidator,
+    player: Player,
+    card_generator: Iterator[Tuple[CardPair, ...]],
+    policy: Policy,
+) -> int:
+    while not player_has_finished(player):
+        card_pairs = next(card_generator)
+        move = policy.choose_move(state, card_pairs)
+        state.check_and_apply(card_pairs, move)
+        apply_move_unchecked(player, card_pairs, move)
+    return get_final_score(player)
+
+
+def recommend_move(
+    state: MoveValidator,
+    player: Player,
+    card_pairs: Tuple[CardPair, ...],
+    num_candidates: int = 4,
+    num_rollouts: int = 8,
+    seed: int = 0,
+) -> Move:
+    """
+    Choose the move whose greedy rollouts have the best mean final score.
+
+    Only the num_candidates moves a GreedyPolicy values most are tried, and every
+    candidate is rolled out over the same card draws. Rollouts draw from a freshly
+    shuffled deck, ignoring the cards already drawn.
+    """
+    greedy = GreedyPolicy(rng=Random(seed))
+    planned_fences = get_planned_fences(state)
+    moves = sorted(
+        generate_legal_moves(state, card_pairs),
+        key=lambda move: greedy.value_move(state, card_pairs, move, planned_fences),
+        reverse=True,
+    )[:num_candidates]
+    if len(moves) == 1:
+        return moves[0]
+
+    rng = Random(seed)
+    rollout_seeds = [rng.getrandbits(64) for _ in range(num_rollouts)]
+    best_move = moves[0]
+    best_score = float("-inf")
+    for move in moves:
+        scores = []
+        for rollout_seed in rollout_seeds:
+            next_state = state.copy()
+            next_state.check_and_apply(card_pairs, move)
+            next_player = player.copy()
+            apply_move_unchecked(next_player, card_pairs, move)
+            scores.append(
+                _play_out(
+                    next_state,
+                    next_player,
+                    state.game_definition.generate_card_pairs(Random(rollout_seed)),
+                    GreedyPolicy(rng=Random(rollout_seed)),
+                )
+            )
+        if mean(scores) > best_score:
+            best_score = mean(scores)
+            best_move = move
+    return best_move
+
+
+def _from_canonical_move(card_pairs: Tuple[CardPair, ...], move: Move) -> Move:
+    if move.card_pair_index is None:
+        return move
+    order = get_card_pair_order(card_pairs)
+    return replace(move, card_pair_index=order[move.card_pair_index])
+
+
+def _build_book_part(
+    args: Tuple[GameDefinition, Tuple[int, ...], int, int, int],
+) -> Dict[int, bytes]:
+    game_definition, game_seeds, num_turns, num_candidates, num_rollouts = args
+    entries: Dict[int, bytes] = {}
+    for game_seed in game_seeds:
+        state = MoveValidator(game_definition)
+        player = Player.new(game_definition)
+        card_generator = game_definition.generate_card_pairs(Random(game_seed))
+        for _ in range(num_turns):
+            card_pairs = next(card_generator)
+            key = get_position_key(state, card_pairs)
+            if key not in entries:
+                # Choose from the sorted card pairs, so the move only depends on the key.
+                sorted_card_pairs = tuple(
+                    card_pairs[index] for index in get_card_pair_order(card_pairs)
+                )
+                entries[key] = encode_move(
+                    recommend_move(
+                        state,
+                        player,
+                        sorted_card_pairs,
+                        num_candidates,
+                        num_rollouts,
+                        seed=key,
+                    )
+                )
+            move = _from_canonical_move(card_pairs, decode_move(entries[key]))
+            state.check_and_apply(card_pairs, move)
+            apply_move_unchecked(player, card_pairs, move)
+    return entries
+
+
+def build_opening_book(
+    path: str,
+    game_definition: GameDefinition,
+    num_turns: int,
+    num_games: int,
+    seed: int = 0,
+    num_candidates: int = 4,
+    num_rollouts: int = 8,
+    max_workers: Optional[int] = None,
+) -> int:
+    """
+    Build an opening book from sample games in parallel worker processes.
+
+    :param num_turns: Number of turns at the start of each game to record moves for.
+    :param num_games: Number of sample games to play.
+    :return: The number of positions in the book.
+    """
+    num_parts = max_workers if max_workers is not None else (os.cpu_count() or 1)
+    rng = Random(seed)
+    game_seeds = tuple(rng.getrandbits(64) for _ in range(num_games))
+    parts = [
+        (
+            game_definition,
+            game_seeds[part_no::num_parts],
+            num_turns,
+            num_candidates,
+            num_rollouts,
+        )
+        for part_no in range(num_parts)
+    ]
+
+    entries: Dict[int, bytes] = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for part in executor.map(_build_book_part, parts):
+            entries.update(part)
+
+    with atomic_write(path) as file:
+        _write_book(file, game_definition, num_turns, entries)
+    return len(entries)
+
+
+def _write_book(
+    file: IO[bytes],
+    game_definition: GameDefinition,
+    num_turns: int,
+    entries: Dict[int, bytes],
+) -> None:
+    file.write(
+        HEADER_STRUCT.pack(
+            MAGIC, VERSION, 0, game_definition.digest(), num_turns, len(entries)
+        )
+    )
+    for key in sorted(entries):
+        file.write(KEY_STRUCT.pack(key))
+        file.write(entries[key])
+
+
+class OpeningBook:
+    """
+    Lazily loaded lookups of the moves stored in an opening book file.
+
+    The file isn't opened until the first lookup. Close it with `close()`, or use the
+    book as a context manager.
+    """
+
+    def __init__(
+        self, path: str, game_definition: GameDefinition, cache_size: int = 4096
+    ):
+        self.path = path
+        self.game_definition = game_definition
+        self.num_turns: Optional[int] = None
+        self._mapped: Optional[MappedFile] = None
+        self._num_entries = 0
+        self._find = lru_cache(maxsize=cache_size)(self._search)
+
+    def _load(self) -> mmap.mmap:
+        """Get the mapped file, opening and checking it on first use."""
+        if self._mapped is not None:
+            return self._mapped.buffer
+
+        mapped = MappedFile(
+            self.path, OpeningBookFormatError, "est8 opening book", HEADER_STRUCT.size
+        )
+        with mapped.closing_on_error():
+            magic, version, _, digest, num_turns, num_entries = (
+                HEADER_STRUCT.unpack_from(mapped.buffer, 0)
+            )
+            if magic != MAGIC:
+                raise OpeningBookFormatError("File is not an est8 opening book.")
+            if version != VERSION:
+                raise OpeningBookFormatError(
+                    f"Unsupported opening book version {version}."
+                )
+            if digest != self.game_definition.digest():
+                raise OpeningBookFormatError(
+                    "Opening book is for a different game definition."
+                )
+            if len(mapped.buffer) != HEADER_STRUCT.size + ENTRY_SIZE * num_entries:
+                raise OpeningBookFormatError("Opening book is truncated.")
+
+        self._mapped = mapped
+        self.num_turns = num_turns
+        self._num_entries = num_entries
+        return mapped.buffer
+
+    def close(self) -> None:
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+        self._find.cache_clear()
+
+    def __enter__(self) -> "OpeningBook":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        self._load()
+        return self._num_entries
+
+    def _search(self, key: int) -> Optional[Move]:
+        buffer = self._load()
+
+        low, high = 0, self._num_entries
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER_STRUCT.size + ENTRY_SIZE * middle
+            (middle_key,) = KEY_STRUCT.unpack_from(buffer, offset)
+            if middle_key == key:
+                return decode_move(buffer, offset + KEY_STRUCT.size)
+            if middle_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def get_move(
+        self, state: MoveValidator, card_pairs: Tuple[CardPair, ...]
+    ) -> Optional[Move]:
+        """Get the book move for the position, or None if it isn't in the book."""
+        move = self._find(get_position_key(state, card_pairs))
+        if move is None:
+            return None
+        return _from_canonical_move(card_pairs, move)
+
+
+class BookPolicy(Policy):
+    """Play moves from an opening book, and from another policy once out of the book."""
+
+    def __init__(self, book: OpeningBook, fallback: Policy):
+        self.book = book
+        self.fallback = fallback
+
+    def choose_move(
+        self, state: MoveValidator, card_pairs: Tuple[CardPair, ...]
+    ) -> Move:
+        move = self.book.get_move(state, card_pairs)
+        if move is None:
+            return self.fallback.choose_move(state, card_pairs)
+        return move
@@ -0,0 +1,347 @@
+"""
+The best possible play of a single player who knows every card that will be drawn.
+
+The oracle searches depth first over every legal move each turn, trying the moves a
+GreedyPolicy prefers first. Branches are pruned when their ScoreBound can't beat the best
+score already found, and states that have already been searched are remembered under a
+canonical key, which ignores house numbers that can no longer affect play.
+
+Scores are for a player on their own, as if they always come first on the temp agency
+podium and complete each plan first. Plans are scored on the final neighbourhood.
+
+Searching a whole game exhaustively is rarely feasible, so the search is limited to a
+number of nodes. Once that budget is spent, the remaining turns are played out by the
+GreedyPolicy and no more alternatives are tried. Each result records whether it was
+proven, so the final score is only marked as not optimal if a branch that was cut short
+could still have beaten it.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from random import Random
+from statistics import mean
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from est8.backend.definitions import CardPair, GameDefinition
+from est8.backend.game import player_has_finished
+from est8.backend.legal_moves import generate_legal_moves
+from est8.backend.move import Move
+from est8.backend.plans import PlanTracker
+from est8.backend.player import Player
+from est8.backend.policies import GreedyPolicy, Policy, get_planned_fences
+from est8.backend.replay import apply_move_unchecked
+from est8.backend.score_bound import ScoreBound
+from est8.backend.transcript import MoveValidator
+
+CardSequence = Sequence[Tuple[CardPair, ...]]
+
+
+@dataclass(frozen=True)
+class OracleResult:
+    score: int
+    moves: Tuple[Move, ...]
+    # Whether the whole game was searched, so no better score is possible.
+    is_optimal: bool
+    nodes_searched: int
+
+
+def get_final_score(player: Player) -> int:
+    """Score a player on their own, completing plans on the final neighbourhood."""
+    tracker = PlanTracker(player)
+    plans = player.game_definition.plans
+    return player.get_score() + sum(
+        plans[plan_index].points[0] for plan_index in tracker.update()
+    )
+
+
+def get_canonical_key(state: MoveValidator, player: Player) -> Hashable:
+    """
+    Get a key that is equal for states from which the same moves and scores are possible.
+
+    Built house numbers only matter through the bounds they put on empty plots, and the
+    number a bis next to them would take.
+    """
+    streets = []
+    for street_index, street in zip(state.streets, player.neighbourhood.streets):
+        streets.append(
+            (
+                tuple(street_index.is_roundabout),
+                tuple(street_index.fences),
+                tuple(
+                    (
+                        plot_no,
+                        street_index.lower[plot_no],
+                        street_index.upper[plot_no],
+                        street_index.get_bis_number(plot_no),
+                    )
+                    for plot_no in range(street_index.num_houses)
+                    if not street_index.is_built[plot_no]
+                ),
+                street.num_parks,
+            )
+        )
+    return (
+        tuple(streets),
+        tuple(sorted(player.investments.items())),
+        player.num_biss,
+        player.num_permit_refusals,
+        player.num_pools,
+        player.num_roundabouts,
+        player.num_temp_agencies,
+    )
+
+
+class _Search:
+    def __init__(
+        self,
+        game_definition: GameDefinition,
+        card_sequence: CardSequence,
+        max_nodes: int,
+        include_roundabouts: bool,
+    ):
+        self.game_definition = game_definition
+        self.card_sequence = card_sequence
+        self.max_nodes = max_nodes
+        self.include_roundabouts = include_roundabouts
+        self.greedy = GreedyPolicy(rng=Random(0))
+        self.nodes_searched = 0
+        # Proven results only: (turn, canonical key) -> (score, whether it is exact
+        # rather than an upper bound, moves to reach it)
+        self.memo: Dict[Hashable, Tuple[int, bool, Tuple[Move, ...]]] = {}
+
+    @property
+    def out_of_budget(self) -> bool:
+        return self.nodes_searched >= self.max_nodes
+
+    def _ordered_moves(
+        self, state: MoveValidator, card_pairs: Tuple[CardPair, ...]
+    ) -> List[Move]:
+        planned_fences = get_planned_fences(state)
+        moves = list(generate_legal_moves(state, card_pairs, self.include_roundabouts))
+        moves.sort(
+            key=lambda move: self.greedy.value_move(
+                state, card_pairs, move, planned_fences
+            ),
+            reverse=True,
+        )
+        return moves
+
+    def _play_out(
+        self, state: MoveValidator, player: Player, turn: int
+    ) -> Tuple[int, Tuple[Move, ...]]:
+        moves = []
+        while turn < len(self.card_sequence) and not player_has_finished(player):
+            card_pairs = self.card_sequence[turn]
+            move = self._ordered_moves(state, card_pairs)[0]
+            state.check_and_apply(card_pairs, move)
+            apply_move_unchecked(player, card_pairs, move)
+            moves.append(move)
+            turn += 1
+        return get_final_score(player), tuple(moves)
+
+    def search(
+        self,
+        state: MoveValidator,
+        player: Player,
+        bound: ScoreBound,
+        turn: int,
+        alpha: float,
+    ) -> Tuple[float, Optional[Tuple[Move, ...]], bool]:
+        """
+        Find the best final score reachable, if it is better than alpha.
+
+        :param bound: The ScoreBound of player, which is kept up to date move by move.
+        :return: (score, moves, proven) if the score beats alpha, otherwise
+            (upper bound, None, proven). The result is proven unless part of the search
+            was cut short by the node budget.
+        """
+        if turn == len(self.card_sequence) or player_has_finished(player):
+            return get_final_score(player), (), True
+
+        key = (turn, get_canonical_key(state, player))
+        known = self.memo.get(key)
+        if known is not None:
+            known_score, is_exact, known_moves = known
+            if is_exact:
+                return known_score, known_moves, True
+            if known_score <= alpha:
+                return known_score, None, True
+
+        upper_bound = bound.value
+        if upper_bound <= alpha:
+            return upper_bound, None, True
+
+        if self.out_of_budget:
+            played_score, played_moves = self._play_out(
+                state.copy(), player.copy(), turn
+            )
+            return played_score, played_moves, False
+        self.nodes_searched += 1
+
+        card_pairs = self.card_sequence[turn]
+        best_score = float("-inf")
+        best_moves: Optional[Tuple[Move, ...]] = None
+        proven = True
+        for move in self._ordered_moves(state, card_pairs):
+            next_state = state.copy()
+            next_state.check_and_apply(card_pairs, move)
+            next_player = player.copy()
+            next_bound = bound.copy(next_player)
+            apply_move_unchecked(next_player, card_pairs, move)
+            next_bound.update(move)
+
+            score, moves, child_proven = self.search(
+                next_state, next_player, next_bound, turn + 1, max(alpha, best_score)
+            )
+            proven = proven and child_proven
+            if score > best_score:
+                best_score = score
+                if moves is not None:
+                    best_moves = (move,) + moves
+            if best_score >= upper_bound:
+                # Nothing can do better than the bound, whatever was cut short.
+                proven = True
+                break
+            if self.out_of_budget and best_moves is not None:
+                # Out of budget, so settle for the best moves found so far.
+                proven = False
+                break
+
+        if best_score > alpha and best_moves is not None:
+            if proven:
+                self.memo[key] = (int(best_score), True, best_moves)
+            return best_score, best_moves, proven
+        if proven:
+            self.memo[key] = (int(best_score), False, ())
+        return best_score, None, proven
+
+
+def solve(
+    game_definition: GameDefinition,
+    card_sequence: CardSequence,
+    max_nodes: int = 100000,
+    include_roundabouts: bool = False,
+) -> OracleResult:
+    """
+    Find the best score and moves for a known sequence of card pair draws.
+
+    :param max_nodes: Maximum number of states to expand before finishing greedily.
+    :param include_roundabouts: Also consider building roundabouts.
+    """
+    search = _Search(game_definition, card_sequence, max_nodes, include_roundabouts)
+    state = MoveValidator(game_definition)
+    player = Player.new(game_definition)
+
+    # Start from greedy play, so the search only has to find something better.
+    greedy_score, greedy_moves = search._play_out(state.copy(), player.copy(), 0)
+    score, moves, proven = search.search(
+        state, player, ScoreBound(player), 0, greedy_score
+    )
+    if moves is None:
+        score, moves = greedy_score, greedy_moves
+
+    return OracleResult(
+        score=int(score),
+        moves=moves,
+        is_optimal=proven,
+        nodes_searched=search.nodes_searched,
+    )
+
+
+def _solve_args(args: Tuple[GameDefinition, CardSequence, int, bool]) -> OracleResult:
+    return solve(*args)
+
+
+def solve_many(
+    game_definition: GameDefinition,
+    card_sequences: Sequence[CardSequence],
+    max_nodes: int = 100000,
+    include_roundabouts: bool = False,
+    max_workers: Optional[int] = None,
+) -> List[OracleResult]:
+    """Solve many card sequences in parallel worker processes."""
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(
+            executor.map(
+                _solve_args,
+                [
+                    (game_definition, sequence, max_nodes, include_roundabouts)
+                    for sequence in card_sequences
+                ],
+            )
+        )
+
+
+def generate_card_sequences(
+    game_definition: GameDefinition, num_sequences: int, num_turns: int, seed: int
+) -> List[Tuple[Tuple[CardPair, ...], ...]]:
+    """Draw reproducible card sequences of the given number of turns."""
+    rng = Random(seed)
+    return [
+        tuple(
+            islice(
+                game_definition.generate_card_pairs(Random(rng.getrandbits(64))),
+                num_turns,
+            )
+        )
+        for _ in range(num_sequences)
+    ]
+
+
+def play_sequence(
+    game_definition: GameDefinition, card_sequence: CardSequence, policy: Policy
+) -> int:
+    """Play a policy through a known card sequence, scored the same way as the oracle."""
+    state = MoveValidator(game_definition)
+    player = Player.new(game_definition)
+    for card_pairs in card_sequence:
+        if player_has_finished(player):
+            break
+        move = policy.choose_move(state, card_pairs)
+        state.check_and_apply(card_pairs, move)
+        apply_move_unchecked(player, card_pairs, move)
+    return get_final_score(player)
+
+
+@dataclass(frozen=True)
+class RegretReport:
+    """How far below perfect information play a policy scored, over a benchmark set."""
+
+    regrets: Tuple[int, ...]
+    mean_regret: float
+    max_regret: int
+    # Number of sequences where the oracle's score was proven optimal.
+    num_optimal: int
+
+
+def regret_report(
+    game_definition: GameDefinition,
+    card_sequences: Sequence[CardSequence],
+    policies: Dict[str, Callable[[], Policy]],
+    oracle_results: Optional[Sequence[OracleResult]] = None,
+    **solve_kwargs: Any,
+) -> Dict[str, RegretReport]:
+    """
+    Compare each policy against the oracle on every card sequence.
+
+    :param policies: Factories for each policy to compare, keyed by name. A new policy
+        is made for each sequence.
+    :param oracle_results: Results of `solve_many` for the sequences, if already known.
+    """
+    if oracle_results is None:
+        oracle_results = solve_many(game_definition, card_sequences, **solve_kwargs)
+
+    reports = {}
+    for name, make_policy in policies.items():
+        regrets = tuple(
+            result.score - play_sequence(game_definition, sequence, make_policy())
+            for sequence, result in zip(card_sequences, oracle_results)
+        )
+        reports[name] = RegretReport(
+            regrets=regrets,
+            mean_regret=mean(regrets) if regrets else 0.0,
+            max_regret=max(regrets, default=0),
+            num_optimal=sum(1 for result in oracle_results if result.is_optimal),
+        )
+    return reports
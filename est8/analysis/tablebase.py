@@ -0,0 +1,458 @@
+"""
+Exact park and pool endgame values for the last few plots of a street, stored in a
+memory-mapped file.
+
+A street endgame is modelled on its own: each turn, num_cards_drawn_at_once card pairs
+are drawn independently from the deck's card pair distribution, and the player may
+build one of them on an empty plot of the street or pass. The park/pool endgame value of
+a position is the expected score still to be made on the street in the turns left from
+parks and from pools (each worth a fixed amount), when playing optimally for them.
+Passing is always allowed, so the value never goes down with more turns left.
+
+This is not an expected final score. Estates and investments, usually the main payoff of
+finishing a street, aren't modelled, and draws come from the whole deck's distribution
+rather than the cards left in it, so values are only comparable between park and pool
+choices on the same street.
+
+Positions are keyed by a canonical encoding of the street: the runs of empty plots with
+their bounds, clamped to the numbers that can be drawn, and the pool locations within
+them, plus the number of parks built. Runs are sorted, as the order of the runs doesn't
+change what can be built. Plots that no number can fill are left out.
+
+File layout (all little-endian):
+ - Header: magic, format version, digest of the game definition, maximum empty plots,
+   maximum turns left, score for building a pool, number of slots.
+ - Slots: an open addressing hash table of (64 bit hash of the key, park/pool endgame
+   value).
+   A hash of 0 marks an empty slot.
+
+Looking up a position hashes its key and probes from the slot the hash picks, so a probe
+touches one or two slots of the mapped file whatever the size of the table.
+"""
+
+import mmap
+import struct
+from hashlib import blake2b
+from itertools import combinations, combinations_with_replacement, groupby
+from typing import (
+    IO,
+    Any,
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from est8.analysis.deck_analysis import card_pair_distribution
+from est8.backend.atomic_io import MappedFile, atomic_write
+from est8.backend.definitions import ActionEnum, GameDefinition, StreetDefinition
+from est8.backend.errors import TablebaseFormatError
+from est8.backend.street import Street
+from est8.backend.street_index import StreetIndex
+
+MAGIC = b"EST8TB\x00\x00"
+VERSION = 2
+
+HEADER_STRUCT = struct.Struct("<8sHH32sHHiQ")
+SLOT_STRUCT = struct.Struct("<Qd")
+
+EMPTY_SLOT = 0
+
+# (lower bound, upper bound, whether each plot of the run can have a pool)
+Run = Tuple[int, int, Tuple[bool, ...]]
+# (number of parks built, sorted runs of empty plots)
+StreetPosition = Tuple[int, Tuple[Run, ...]]
+
+
+class EndgameModel:
+    """Solves the park/pool endgames of streets, remembering every value found."""
+
+    def __init__(
+        self, game_definition: GameDefinition, pool_value: Optional[int] = None
+    ):
+        """
+        :param pool_value: Score for building a pool. Defaults to the score of a first pool.
+        """
+        self.game_definition = game_definition
+        self.num_card_pairs = game_definition.num_cards_drawn_at_once
+        if pool_value is None:
+            pool_value = game_definition.scoring.pool_score(1)
+        self.pool_value = pool_value
+
+        # Only parks and pools score in the model, so other actions are alike.
+        offset = game_definition.max_temp_agency_offset
+        pair_probabilities: Dict[
+            Tuple[Tuple[int, ...], Optional[ActionEnum]], float
+        ] = {}
+        for (number, action), probability in card_pair_distribution(
+            game_definition.deck
+        ).items():
+            if action == ActionEnum.temp:
+                numbers = tuple(
+                    number + change
+                    for change in range(-offset, offset + 1)
+                    if number + change >= 0
+                )
+            else:
+                numbers = (number,)
+            kind = action if action in (ActionEnum.park, ActionEnum.pool) else None
+            pair_probabilities[(numbers, kind)] = pair_probabilities.get(
+                (numbers, kind), 0.0
+            ) + float(probability)
+        self.pair_probabilities = pair_probabilities
+
+        all_numbers = [
+            number for numbers, _ in pair_probabilities for number in numbers
+        ]
+        # Bounds outside these add nothing, so they are clamped to them.
+        self.min_bound = min(all_numbers) - 1
+        self.max_bound = max(all_numbers) + 1
+
+        # (street number, position, turns left) -> park/pool endgame value
+        self._values: Dict[Tuple[int, StreetPosition, int], float] = {}
+
+    def _make_run(
+        self, lower: int, upper: int, pools: Tuple[bool, ...]
+    ) -> Optional[Run]:
+        lower = max(lower, self.min_bound)
+        upper = min(upper, self.max_bound)
+        if upper - lower < 2 or not pools:
+            return None
+        return lower, upper, pools
+
+    def _make_position(
+        self,
+        street_definition: StreetDefinition,
+        num_parks: int,
+        runs: List[Optional[Run]],
+    ) -> StreetPosition:
+        return (
+            min(num_parks, len(street_definition.park_scoring) - 1),
+            tuple(sorted(run for run in runs if run is not None)),
+        )
+
+    def get_position(
+        self, street_no: int, street: Union[Street, StreetIndex], num_parks: int
+    ) -> StreetPosition:
+        """Get the canonical position of a Street or StreetIndex."""
+        if isinstance(street, Street):
+            street = StreetIndex.from_street(street)
+
+        definition = street.definition
+        runs = []
+        for is_built, plots in groupby(
+            range(street.num_houses), key=lambda plot_no: street.is_built[plot_no]
+        ):
+            if is_built:
+                continue
+            run_plots = list(plots)
+            runs.append(
+                self._make_run(
+                    street.lower[run_plots[0]],
+                    street.upper[run_plots[0]],
+                    tuple(
+                        definition.can_have_pool_at(plot_no) for plot_no in run_plots
+                    ),
+                )
+            )
+        return self._make_position(definition, num_parks, runs)
+
+    def _children(
+        self,
+        street_definition: StreetDefinition,
+        position: StreetPosition,
+        numbers: Tuple[int, ...],
+        kind: Optional[ActionEnum],
+    ) -> Iterator[Tuple[int, StreetPosition]]:
+        """Get the (score made, next position) of every way of building the card pair."""
+        num_parks, runs = position
+        if kind == ActionEnum.park:
+            park_gain = street_definition.park_score(
+                num_parks + 1
+            ) - street_definition.park_score(num_parks)
+        else:
+            park_gain = 0
+
+        for run_no, (lower, upper, pools) in enumerate(runs):
+            other_runs: List[Optional[Run]] = list(runs[:run_no] + runs[run_no + 1 :])
+            for number in numbers:
+                if not lower < number < upper:
+                    continue
+                for index, can_have_pool in enumerate(pools):
+                    gain = park_gain
+                    if kind == ActionEnum.pool and can_have_pool:
+                        gain += self.pool_value
+                    yield gain, self._make_position(
+                        street_definition,
+                        num_parks + (kind == ActionEnum.park),
+                        other_runs
+                        + [
+                            self._make_run(lower, number, pools[:index]),
+                            self._make_run(number, upper, pools[index + 1 :]),
+                        ],
+                    )
+
+    def park_pool_value(
+        self, street_no: int, position: StreetPosition, turns_left: int
+    ) -> float:
+        """Get the park/pool endgame value of a position with optimal play."""
+        if turns_left <= 0 or not position[1]:
+            return 0.0
+        key = (street_no, position, turns_left)
+        known = self._values.get(key)
+        if known is not None:
+            return known
+
+        street_definition = self.game_definition.neighbourhood.streets[street_no]
+        pass_value = self.park_pool_value(street_no, position, turns_left - 1)
+        pair_values = []
+        for (numbers, kind), probability in self.pair_probabilities.items():
+            best = pass_value
+            for gain, child in self._children(
+                street_definition, position, numbers, kind
+            ):
+                best = max(
+                    best, gain + self.park_pool_value(street_no, child, turns_left - 1)
+                )
+            pair_values.append((best, probability))
+
+        # The player picks the best of the card pairs drawn, so take the expectation of
+        # the maximum of num_card_pairs independent draws.
+        pair_values.sort()
+        expected = 0.0
+        cumulative = 0.0
+        for best, probability in pair_values:
+            below = cumulative**self.num_card_pairs
+            cumulative += probability
+            expected += best * (cumulative**self.num_card_pairs - below)
+
+        self._values[key] = expected
+        return expected
+
+    def enumerate_positions(
+        self, street_no: int, max_empty: int
+    ) -> Iterator[StreetPosition]:
+        """
+        Generate every distinct position of a street with 1 to max_empty empty plots.
+
+        House numbers are assumed to increase along the street, so positions only
+        reachable by restarting the numbering after a roundabout aren't generated.
+        """
+        definition = self.game_definition.neighbourhood.streets[street_no]
+        bounds = range(self.min_bound, self.max_bound + 1)
+        seen: Set[StreetPosition] = set()
+
+        for num_empty in range(1, min(max_empty, definition.num_houses) + 1):
+            for empty_plots in combinations(range(definition.num_houses), num_empty):
+                pools = []
+                for _, run in groupby(
+                    enumerate(empty_plots), key=lambda item: item[1] - item[0]
+                ):
+                    pools.append(
+                        tuple(
+                            definition.can_have_pool_at(plot_no) for _, plot_no in run
+                        )
+                    )
+
+                for run_bounds in combinations_with_replacement(bounds, 2 * len(pools)):
+                    runs = [
+                        self._make_run(
+                            run_bounds[2 * run_no],
+                            run_bounds[2 * run_no + 1],
+                            run_pools,
+                        )
+                        for run_no, run_pools in enumerate(pools)
+                    ]
+                    if None in runs:
+                        continue
+                    for num_parks in range(len(definition.park_scoring)):
+                        position = self._make_position(definition, num_parks, runs)
+                        if position not in seen:
+                            seen.add(position)
+                            yield position
+
+
+def _hash_key(street_no: int, position: StreetPosition, turns_left: int) -> int:
+    digest = blake2b(repr((street_no, turns_left, position)).encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), "little") or 1
+
+
+def build_tablebase(
+    path: str,
+    game_definition: GameDefinition,
+    max_empty: int,
+    max_turns: int,
+    pool_value: Optional[int] = None,
+) -> int:
+    """
+    Solve every street endgame with at most max_empty empty plots and write them to path.
+
+    The number of positions grows quickly with max_empty, so 1 or 2 is practical for the
+    default game.
+
+    :param max_turns: Solve for every number of turns left from 1 to this.
+    :return: The number of values written.
+    """
+    model = EndgameModel(game_definition, pool_value)
+    entries: Dict[int, float] = {}
+    for street_no in range(len(game_definition.neighbourhood.streets)):
+        for position in model.enumerate_positions(street_no, max_empty):
+            for turns_left in range(1, max_turns + 1):
+                entries[_hash_key(street_no, position, turns_left)] = (
+                    model.park_pool_value(street_no, position, turns_left)
+                )
+
+    with atomic_write(path) as file:
+        _write_table(file, model, max_empty, max_turns, entries)
+    return len(entries)
+
+
+def _write_table(
+    file: IO[bytes],
+    model: EndgameModel,
+    max_empty: int,
+    max_turns: int,
+    entries: Dict[int, float],
+) -> None:
+    # Keep the table at most half full so probes stay short.
+    num_slots = 1
+    while num_slots < 2 * len(entries):
+        num_slots *= 2
+
+    slots: List[Tuple[int, float]] = [(EMPTY_SLOT, 0.0)] * num_slots
+    for key, value in entries.items():
+        slot_no = key & (num_slots - 1)
+        while slots[slot_no][0] != EMPTY_SLOT:
+            slot_no = (slot_no + 1) & (num_slots - 1)
+        slots[slot_no] = (key, value)
+
+    file.write(
+        HEADER_STRUCT.pack(
+            MAGIC,
+            VERSION,
+            0,
+            model.game_definition.digest(),
+            max_empty,
+            max_turns,
+            model.pool_value,
+            num_slots,
+        )
+    )
+    for key, value in slots:
+        file.write(SLOT_STRUCT.pack(key, value))
+
+
+class Tablebase:
+    """
+    Read-only lookups of park/pool endgame values from a tablebase file.
+
+    Use `Tablebase.open(path)`, preferably as a context manager so the mapping is closed.
+
+    :param pool_value: As given to `build_tablebase`. Defaults to the value the table was
+        built with, and must match it if given.
+    """
+
+    def __init__(
+        self,
+        buffer: mmap.mmap,
+        game_definition: GameDefinition,
+        file: Optional[BinaryIO] = None,
+        pool_value: Optional[int] = None,
+    ):
+        self._buffer = buffer
+        self._file = file
+
+        if len(buffer) < HEADER_STRUCT.size:
+            raise TablebaseFormatError("File is not an est8 tablebase.")
+        (
+            magic,
+            version,
+            _,
+            digest,
+            self.max_empty,
+            self.max_turns,
+            built_pool_value,
+            self._num_slots,
+        ) = HEADER_STRUCT.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise TablebaseFormatError("File is not an est8 tablebase.")
+        if version != VERSION:
+            raise TablebaseFormatError(f"Unsupported tablebase version {version}.")
+        if digest != game_definition.digest():
+            raise TablebaseFormatError("Tablebase is for a different game definition.")
+        # Probes wrap around with a mask, so the table must be a power of two long.
+        if self._num_slots == 0 or self._num_slots & (self._num_slots - 1):
+            raise TablebaseFormatError(
+                f"Tablebase has an invalid number of slots, {self._num_slots}."
+            )
+        if len(buffer) != HEADER_STRUCT.size + SLOT_STRUCT.size * self._num_slots:
+            raise TablebaseFormatError("Tablebase is truncated.")
+
+        self.model = EndgameModel(
+            game_definition, built_pool_value if pool_value is None else pool_value
+        )
+        if self.model.pool_value != built_pool_value:
+            raise TablebaseFormatError(
+                f"Tablebase was built with a pool value of {built_pool_value}."
+            )
+
+    @classmethod
+    def open(
+        cls,
+        path: str,
+        game_definition: GameDefinition,
+        pool_value: Optional[int] = None,
+    ) -> "Tablebase":
+        mapped = MappedFile(path, TablebaseFormatError, "est8 tablebase")
+        with mapped.closing_on_error():
+            return cls(mapped.buffer, game_definition, mapped.file, pool_value)
+
+    def close(self) -> None:
+        self._buffer.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> "Tablebase":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def probe(
+        self, street_no: int, position: StreetPosition, turns_left: int
+    ) -> Optional[float]:
+        """
+        Get the park/pool endgame value of a canonical street position.
+
+        :return: None if the position isn't in the table.
+        """
+        if turns_left <= 0 or not position[1]:
+            return 0.0
+
+        key = _hash_key(street_no, position, turns_left)
+        slot_no = key & (self._num_slots - 1)
+        while True:
+            slot_key, value = SLOT_STRUCT.unpack_from(
+                self._buffer, HEADER_STRUCT.size + SLOT_STRUCT.size * slot_no
+            )
+            if slot_key == key:
+                return value
+            if slot_key == EMPTY_SLOT:
+                return None
+            slot_no = (slot_no + 1) & (self._num_slots - 1)
+
+    def probe_street(
+        self,
+        street_no: int,
+        street: Union[Street, StreetIndex],
+        num_parks: int,
+        turns_left: int,
+    ) -> Optional[float]:
+        """Get the park/pool endgame value of a Street or StreetIndex."""
+        return self.probe(
+            street_no, self.model.get_position(street_no, street, num_parks), turns_left
+        )
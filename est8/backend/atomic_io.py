@@ -0,0 +1,82 @@
+"""
+Writing binary and data files atomically, and mapping them into memory to read them.
+
+Files are written to a temporary file in the same directory and then moved into place,
+so readers never see a partially written file, and a crash while writing leaves the
+previous file intact. Files are read through a read-only mmap, so several processes
+reading the same file share the same pages.
+"""
+
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Any, Iterator, Type
+
+from est8.backend.errors import Est8Error
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "wb", sync: bool = False) -> Iterator[IO[Any]]:
+    """
+    Open a temporary file to write, which replaces path once the block succeeds.
+
+    :param sync: Whether to flush the file to disk before it is moved into place.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, mode) as file:
+            yield file
+            if sync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+class MappedFile:
+    """
+    A file mapped read-only into memory.
+
+    :param error_type: Raised if the file is empty or shorter than min_size.
+    :param description: What the file should be, for error messages.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        error_type: Type[Est8Error],
+        description: str,
+        min_size: int = 0,
+    ):
+        self.file = open(path, "rb")
+        try:
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise error_type(f"File is not an {description}.")
+        if len(self.buffer) < min_size:
+            self.close()
+            raise error_type(f"File is not an {description}.")
+
+    def close(self) -> None:
+        self.buffer.close()
+        self.file.close()
+
+    @contextmanager
+    def closing_on_error(self) -> Iterator["MappedFile"]:
+        """Close the file if the block raises, e.g. while checking its header."""
+        try:
+            yield self
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> "MappedFile":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
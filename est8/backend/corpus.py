@@ -0,0 +1,171 @@
+"""
+Memory-mapped file format for storing many GameRecords with random access.
+
+File layout (all little-endian):
+ - Header: magic, format version, reserved, number of games.
+ - Index: the byte offset of each game, as an unsigned 64-bit integer.
+ - Games: each is a small header (number of turns, number of players, card pairs per
+   draw) followed by fixed-size encoded turns.
+
+Because every turn in a game has the same size, turn K of game N can be read directly
+without decoding any of the data before it. The file is opened read-only through mmap,
+so several processes reading the same corpus share the same pages.
+"""
+
+import mmap
+import struct
+
+from typing import IO, Any, BinaryIO, Iterator, Optional, Sequence, Tuple
+
+from est8.backend.atomic_io import MappedFile, atomic_write
+from est8.backend.definitions import CardPair
+from est8.backend.errors import CorpusFormatError
+from est8.backend.move import Move
+from est8.backend.record import GameRecord, decode_turn, encode_turn, turn_size
+
+MAGIC = b"EST8CRP\x00"
+VERSION = 1
+
+HEADER_STRUCT = struct.Struct("<8sHHI")
+INDEX_ENTRY_STRUCT = struct.Struct("<Q")
+GAME_HEADER_STRUCT = struct.Struct("<HBB")
+
+
+def write_corpus(path: str, records: Sequence[GameRecord]) -> None:
+    """
+    Write the given records to a corpus file at path, atomically.
+    """
+    with atomic_write(path) as file:
+        _write_corpus_to_file(file, records)
+
+
+def _write_corpus_to_file(file: IO[bytes], records: Sequence[GameRecord]) -> None:
+    file.write(HEADER_STRUCT.pack(MAGIC, VERSION, 0, len(records)))
+
+    # Work out where each game will start so the index can be written up front.
+    offset = HEADER_STRUCT.size + INDEX_ENTRY_STRUCT.size * len(records)
+    for record in records:
+        file.write(INDEX_ENTRY_STRUCT.pack(offset))
+        offset += GAME_HEADER_STRUCT.size + record.num_turns * turn_size(
+            record.num_card_pairs_per_draw, record.num_players
+        )
+
+    for record in records:
+        file.write(
+            GAME_HEADER_STRUCT.pack(
+                record.num_turns, record.num_players, record.num_card_pairs_per_draw
+            )
+        )
+        for card_pairs, moves in zip(record.draws, record.moves):
+            file.write(encode_turn(card_pairs, moves))
+
+
+class Corpus:
+    """
+    Read-only random access to the games stored in a corpus file.
+
+    Use `Corpus.open(path)`, preferably as a context manager so the mapping is closed.
+    """
+
+    def __init__(self, buffer: mmap.mmap, file: Optional[BinaryIO] = None):
+        self._buffer = buffer
+        self._file = file
+
+        if len(buffer) < HEADER_STRUCT.size:
+            raise CorpusFormatError("File is not an est8 game corpus.")
+        magic, version, _, num_games = HEADER_STRUCT.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise CorpusFormatError("File is not an est8 game corpus.")
+        if version != VERSION:
+            raise CorpusFormatError(f"Unsupported corpus version {version}.")
+        if HEADER_STRUCT.size + INDEX_ENTRY_STRUCT.size * num_games > len(buffer):
+            raise CorpusFormatError("Corpus is truncated.")
+        self._num_games: int = num_games
+
+    @classmethod
+    def open(cls, path: str) -> "Corpus":
+        mapped = MappedFile(path, CorpusFormatError, "est8 game corpus")
+        with mapped.closing_on_error():
+            return cls(mapped.buffer, mapped.file)
+
+    def close(self) -> None:
+        self._buffer.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> "Corpus":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._num_games
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        for game_no in range(self._num_games):
+            yield self[game_no]
+
+    def _game_offset(self, game_no: int) -> int:
+        if game_no < 0 or game_no >= self._num_games:
+            raise IndexError(f"Game {game_no} is not in this corpus.")
+        (offset,) = INDEX_ENTRY_STRUCT.unpack_from(
+            self._buffer, HEADER_STRUCT.size + INDEX_ENTRY_STRUCT.size * game_no
+        )
+        # Check the whole game is in the file, so that a damaged index or a truncated
+        # file is reported as such rather than as a struct.error part way through.
+        if offset + GAME_HEADER_STRUCT.size > len(self._buffer):
+            raise CorpusFormatError(f"Game {game_no} is past the end of the corpus.")
+        num_turns, num_players, num_card_pairs = GAME_HEADER_STRUCT.unpack_from(
+            self._buffer, offset
+        )
+        end = (
+            offset
+            + GAME_HEADER_STRUCT.size
+            + num_turns * turn_size(num_card_pairs, num_players)
+        )
+        if end > len(self._buffer):
+            raise CorpusFormatError(f"Game {game_no} is past the end of the corpus.")
+        return offset
+
+    def game_shape(self, game_no: int) -> Tuple[int, int, int]:
+        """Get the (number of turns, number of players, card pairs per draw) of a game."""
+        return GAME_HEADER_STRUCT.unpack_from(self._buffer, self._game_offset(game_no))
+
+    def num_turns(self, game_no: int) -> int:
+        return self.game_shape(game_no)[0]
+
+    def get_turn(
+        self, game_no: int, turn_no: int
+    ) -> Tuple[Tuple[CardPair, ...], Tuple[Move, ...]]:
+        """Get the card pairs drawn and the moves made on a single turn of a game."""
+        offset = self._game_offset(game_no)
+        num_turns, num_players, num_card_pairs = GAME_HEADER_STRUCT.unpack_from(
+            self._buffer, offset
+        )
+        if turn_no < 0 or turn_no >= num_turns:
+            raise IndexError(f"Turn {turn_no} is not in game {game_no}.")
+
+        offset += GAME_HEADER_STRUCT.size + turn_no * turn_size(
+            num_card_pairs, num_players
+        )
+        return decode_turn(self._buffer, offset, num_card_pairs, num_players)
+
+    def __getitem__(self, game_no: int) -> GameRecord:
+        offset = self._game_offset(game_no)
+        num_turns, num_players, num_card_pairs = GAME_HEADER_STRUCT.unpack_from(
+            self._buffer, offset
+        )
+        offset += GAME_HEADER_STRUCT.size
+        size = turn_size(num_card_pairs, num_players)
+
+        draws = []
+        moves = []
+        for _ in range(num_turns):
+            card_pairs, turn_moves = decode_turn(
+                self._buffer, offset, num_card_pairs, num_players
+            )
+            draws.append(card_pairs)
+            moves.append(turn_moves)
+            offset += size
+        return GameRecord(draws=tuple(draws), moves=tuple(moves))
@@ -0,0 +1,140 @@
+"""
+Exact knowledge of the cards left in the deck, as seen by someone watching every draw.
+
+The DeckState mirrors DeckDefinition.random_card_generator: cards are dealt until the
+deck runs out, then every card except the last `no_reshuffle_last_n` dealt is shuffled
+back in. Counts of the remaining cards by number and by action are kept up to date in
+O(1) per card drawn, so probabilities about the next cards are exact and cheap.
+"""
+
+from collections import Counter, deque
+from fractions import Fraction
+from math import comb
+from typing import Deque, Dict, Iterable, Tuple
+
+from est8.backend.definitions import (
+    ActionEnum,
+    CardDefinition,
+    CardPair,
+    DeckDefinition,
+)
+from est8.backend.errors import DeckError
+
+
+class DeckState:
+    """
+    The multiset of cards that the next card will be drawn from.
+
+    :param no_reshuffle_last_n: As for DeckDefinition.random_card_generator.
+    """
+
+    def __init__(self, deck: DeckDefinition, no_reshuffle_last_n: int = 0):
+        self.deck: DeckDefinition = deck
+        self.no_reshuffle_last_n = no_reshuffle_last_n
+        self._all_cards: Counter = Counter(deck.ordered_card_generator())
+        self._deck_size = deck.deck_size
+        self._number_totals: Counter = Counter()
+        for card, count in self._all_cards.items():
+            self._number_totals[card.number] += count
+
+        self.remaining: Counter = Counter()
+        self.number_counts: Counter = Counter()
+        self.action_counts: Counter = Counter()
+        self.num_remaining = 0
+        # The most recently drawn cards, which are held back at the next reshuffle.
+        self.recent: Deque[CardDefinition] = deque(maxlen=no_reshuffle_last_n or None)
+        self.num_reshuffles = 0
+        self._has_seen_first_pairs = False
+
+        self._reshuffle(held_back=())
+
+    def _reshuffle(self, held_back: Iterable[CardDefinition]) -> None:
+        self.remaining = self._all_cards - Counter(held_back)
+        self.number_counts = Counter()
+        self.action_counts = Counter()
+        for card, count in self.remaining.items():
+            self.number_counts[card.number] += count
+            self.action_counts[card.action] += count
+        self.num_remaining = sum(self.remaining.values())
+
+    def draw(self, card: CardDefinition) -> None:
+        """Record a card being drawn from the deck."""
+        if self.remaining[card] <= 0:
+            raise DeckError(f"{card} cannot be drawn, none are left in the deck.")
+
+        self.remaining[card] -= 1
+        self.number_counts[card.number] -= 1
+        self.action_counts[card.action] -= 1
+        self.num_remaining -= 1
+        if self.no_reshuffle_last_n > 0:
+            self.recent.append(card)
+
+        if self.num_remaining == 0:
+            self._reshuffle(held_back=self.recent)
+            self.num_reshuffles += 1
+
+    def draw_card_pairs(self, card_pairs: Tuple[CardPair, ...]) -> None:
+        """
+        Record the cards drawn for a turn of GameDefinition.generate_card_pairs.
+
+        Each turn's number cards become the next turn's action cards, so only the number
+        cards are new - except on the first turn, when the action cards are drawn first.
+        """
+        if not self._has_seen_first_pairs:
+            for card_pair in card_pairs:
+                self.draw(card_pair.action_card)
+            self._has_seen_first_pairs = True
+        for card_pair in card_pairs:
+            self.draw(card_pair.number_card)
+
+    def probability_of_card(self, card: CardDefinition) -> Fraction:
+        return Fraction(self.remaining[card], self.num_remaining)
+
+    def probability_of_number(self, number: int) -> Fraction:
+        """Get the probability that the next card drawn has the given number."""
+        return Fraction(self.number_counts[number], self.num_remaining)
+
+    def probability_of_action(self, action: ActionEnum) -> Fraction:
+        """Get the probability that the next card drawn has the given action."""
+        return Fraction(self.action_counts[action], self.num_remaining)
+
+    def number_probabilities(self) -> Dict[int, Fraction]:
+        return {
+            number: Fraction(count, self.num_remaining)
+            for number, count in sorted(self.number_counts.items())
+            if count > 0
+        }
+
+    def action_probabilities(self) -> Dict[ActionEnum, Fraction]:
+        return {
+            action: Fraction(count, self.num_remaining)
+            for action, count in self.action_counts.items()
+            if count > 0
+        }
+
+    def probability_of_number_within(self, number: int, num_draws: int) -> Fraction:
+        """
+        Get the probability that at least one of the next num_draws cards has the number.
+
+        Draws past the end of the deck come from the reshuffled deck. If none of the
+        remaining cards have the number, the only held back cards that can have it are
+        ones that have already been seen, so the reshuffled deck is still known exactly.
+        """
+        deck_size = self.num_remaining
+        num_with_number = self.number_counts[number]
+        # Whether each of the cards that would be held back has the number, oldest first.
+        held_back = [card.number == number for card in self.recent]
+
+        while num_draws > deck_size:
+            if num_with_number > 0:
+                # Every remaining card is drawn, including one with the number.
+                return Fraction(1)
+            num_draws -= deck_size
+            held_back = held_back + [False] * deck_size
+            held_back = held_back[max(len(held_back) - self.no_reshuffle_last_n, 0) :]
+            deck_size = self._deck_size - len(held_back)
+            num_with_number = self._number_totals[number] - sum(held_back)
+
+        return 1 - Fraction(
+            comb(deck_size - num_with_number, num_draws), comb(deck_size, num_draws)
+        )
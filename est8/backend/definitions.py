@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from enum import Enum, auto
-from random import choice, shuffle
+from hashlib import sha256
+from random import Random, choice, shuffle
 from typing import Tuple, Dict, Iterable, Optional, Generator
 
 
@@ -75,7 +76,7 @@ class DeckDefinition:
             yield CardDefinition(number=number, action=ActionEnum.temp)
 
     def random_card_generator(
-        self, no_reshuffle_last_n: int = 0
+        self, no_reshuffle_last_n: int = 0, rng: Optional[Random] = None
     ) -> Generator[CardDefinition, None, None]:
         """
         A generator that returns each defined card in a random order.
@@ -86,13 +87,16 @@ class DeckDefinition:
         :param no_reshuffle_last_n: Number of cards that were last drawn to not re-shuffle into 
             the deck. This simulates behaviour of leaving cards on the table while reshuffling
             the rest.
+        :param rng: Random number generator to shuffle with, so that the order of cards
+            can be reproduced. Defaults to the global generator.
         """
         all_cards = list(self.ordered_card_generator())
         last_n_cards = []
+        shuffle_cards = rng.shuffle if rng is not None else shuffle
 
         while True:
             # Deal out the current deck in a random order.
-            shuffle(all_cards)
+            shuffle_cards(all_cards)
             for card in all_cards:
                 yield card
 
@@ -100,7 +104,7 @@ class DeckDefinition:
             all_cards = last_n_cards + all_cards
 
             # Record the last cards dealt from the end
-            last_n_cards = all_cards[-no_reshuffle_last_n:]
+            last_n_cards = all_cards[len(all_cards) - no_reshuffle_last_n :]
 
             # Remove those cards from the current deck
             all_cards = all_cards[: len(all_cards) - no_reshuffle_last_n]
@@ -223,10 +227,10 @@ class ScoringDefinition:
                 estate_size, investments.get(estate_size, 0)
             )
 
-        # Now sum up estate values.
+        # Now sum up estate values. Estates of sizes that have no value are worth nothing.
         total = 0
         for estate in estates:
-            total += estate_values[estate]
+            total += estate_values.get(estate, 0)
 
         return total
 
@@ -247,7 +251,16 @@ class ScoringDefinition:
 
 @dataclass(frozen=True)
 class PlanDefinition:
+    """
+    A city plan, completed by having a complete estate of each of the given sizes.
+
+    The first players to complete a plan score the first of its points, and anyone who
+    completes it on a later turn scores the second. A plan with no estates can never be
+    completed.
+    """
+
     points: Tuple[int, int]
+    estates: Tuple[int, ...] = ()
 
 
 @dataclass(frozen=True)
@@ -259,9 +272,9 @@ class PlanDeckDefinition:
     @classmethod
     def default(cls) -> "PlanDeckDefinition":
         return cls(
-            no_1=(PlanDefinition((6, 2)),),
-            no_2=(PlanDefinition((8, 3)),),
-            no_3=(PlanDefinition((11, 5)),),
+            no_1=(PlanDefinition((6, 2), (3, 3)),),
+            no_2=(PlanDefinition((8, 3), (2, 2, 5)),),
+            no_3=(PlanDefinition((11, 5), (1, 4, 6)),),
         )
 
     def pick_3(self) -> Tuple[PlanDefinition, PlanDefinition, PlanDefinition]:
@@ -275,6 +288,7 @@ class GameDefinition:
     deck: DeckDefinition
     plans: Tuple[PlanDefinition, PlanDefinition, PlanDefinition]
     num_cards_drawn_at_once: int = 3
+    max_temp_agency_offset: int = 2
 
     @classmethod
     def default(cls) -> "GameDefinition":
@@ -295,13 +309,21 @@ class GameDefinition:
     def max_investments_in_estate_size(self, estate_size: int) -> int:
         return len(self.scoring.invest.map[estate_size]) - 1
 
-    def generate_card_pairs(self) -> Generator[Tuple[CardPair, ...], None, None]:
+    def digest(self) -> bytes:
+        """Get a hash of this definition that is stable between processes and runs."""
+        return sha256(repr(self).encode()).digest()
+
+    def generate_card_pairs(
+        self, rng: Optional[Random] = None
+    ) -> Generator[Tuple[CardPair, ...], None, None]:
         """
         Generate tuples of CardPairs representing the deck being drawn from.
 
         The number card of the pair is used as the action card in the next pair.
+
+        :param rng: Random number generator to shuffle the deck with.
         """
-        random_card_gen = self.deck.random_card_generator()
+        random_card_gen = self.deck.random_card_generator(rng=rng)
 
         def next_n_cards() -> Tuple[CardDefinition]:
             return tuple(
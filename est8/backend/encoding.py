@@ -0,0 +1,214 @@
+"""
+Fixed-length numeric encoding of a Player's state, for evaluation networks and linear
+heuristics.
+
+The encoding of a player is a float32 vector with, in order:
+ - for each plot of each street: built, house number (0 if none), bis, pool, park,
+   roundabout and built by temps,
+ - for each street: its fences, from the one left of the first plot,
+ - for each street: the number of parks built,
+ - bis, permit refusal, pool, roundabout and temp agency counts,
+ - the number of investments in each estate size, smallest first.
+
+Its length only depends on the game definition, and `get_feature_names` names each
+value. A single player's values are gathered into a Python list and copied into the
+array in one go, which is much faster than setting the elements of the array one at a
+time. Encoding many players at once goes further: their plots are gathered into one
+list, and each feature of every plot of every player is set with one array operation.
+"""
+
+from itertools import chain, compress, repeat
+from operator import attrgetter, is_not
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from est8.backend.definitions import GameDefinition
+from est8.backend.player import Player
+
+PLOT_FEATURES = ("built", "number", "bis", "pool", "park", "roundabout", "temp")
+COUNTER_FEATURES = ("biss", "permit_refusals", "pools", "roundabouts", "temp_agencies")
+
+_EMPTY_PLOT = (0,) * len(PLOT_FEATURES)
+
+_get_house_values = attrgetter(
+    "number", "is_bis", "has_pool", "has_park", "is_roundabout", "built_by_temps"
+)
+_get_num_parks = attrgetter("num_parks")
+_get_counters = attrgetter(
+    "num_biss",
+    "num_permit_refusals",
+    "num_pools",
+    "num_roundabouts",
+    "num_temp_agencies",
+)
+_get_investments = attrgetter("investments")
+
+
+def get_feature_names(game_definition: GameDefinition) -> List[str]:
+    """Get the name of each value in the encoding of a player."""
+    streets = game_definition.neighbourhood.streets
+    names = [
+        f"street_{street_no}_plot_{plot_no}_{feature}"
+        for street_no, street in enumerate(streets)
+        for plot_no in range(street.num_houses)
+        for feature in PLOT_FEATURES
+    ]
+    names.extend(
+        f"street_{street_no}_fence_{fence_index}"
+        for street_no, street in enumerate(streets)
+        for fence_index in range(street.num_houses + 1)
+    )
+    names.extend(f"street_{street_no}_parks" for street_no in range(len(streets)))
+    names.extend(COUNTER_FEATURES)
+    names.extend(
+        f"investments_{estate_size}"
+        for estate_size in sorted(game_definition.scoring.invest.map)
+    )
+    return names
+
+
+def get_encoding_size(game_definition: GameDefinition) -> int:
+    """Get the length of the encoding of a player."""
+    streets = game_definition.neighbourhood.streets
+    return (
+        sum(street.num_houses * (len(PLOT_FEATURES) + 1) + 1 for street in streets)
+        + len(streets)
+        + len(COUNTER_FEATURES)
+        + len(game_definition.scoring.invest.map)
+    )
+
+
+def _get_values(player: Player) -> List[float]:
+    values: List[float] = []
+    streets = player.neighbourhood.streets
+    for street in streets:
+        for house in street.houses:
+            if house is None:
+                values.extend(_EMPTY_PLOT)
+            else:
+                values.extend(
+                    (
+                        1,
+                        house.number if house.number is not None else 0,
+                        house.is_bis,
+                        house.has_pool,
+                        house.has_park,
+                        house.is_roundabout,
+                        house.built_by_temps,
+                    )
+                )
+    for street in streets:
+        values.extend(street.fences)
+    values.extend(street.num_parks for street in streets)
+    values.extend(
+        (
+            player.num_biss,
+            player.num_permit_refusals,
+            player.num_pools,
+            player.num_roundabouts,
+            player.num_temp_agencies,
+        )
+    )
+    investments = player.investments
+    values.extend(investments[estate_size] for estate_size in sorted(investments))
+    return values
+
+
+def _write_encodings(players: Sequence[Player], out: np.ndarray) -> None:
+    """Write the encodings of players of the same game definition into rows of out."""
+    num_players = len(players)
+    streets = players[0].game_definition.neighbourhood.streets
+    num_plots = sum(street.num_houses for street in streets)
+    num_fences = num_plots + len(streets)
+    size = get_encoding_size(players[0].game_definition)
+    if out.shape != (num_players, size):
+        raise ValueError(
+            f"Expected an array of shape ({num_players}, {size}), got {out.shape}."
+        )
+
+    # Plots of every player are gathered into one list, so each feature of every plot
+    # is set with a single array operation.
+    houses = list(
+        chain.from_iterable(
+            street.houses
+            for player in players
+            for street in player.neighbourhood.streets
+        )
+    )
+    built = np.fromiter(
+        map(is_not, houses, repeat(None)), dtype=bool, count=len(houses)
+    )
+    plots = np.zeros((len(houses), len(PLOT_FEATURES)), dtype=np.float32)
+    if built.any():
+        values = np.empty((np.count_nonzero(built), len(PLOT_FEATURES)), np.float32)
+        values[:, 0] = 1
+        # Roundabouts have no number, which becomes NaN and then 0.
+        values[:, 1:] = np.array(
+            list(map(_get_house_values, compress(houses, built))), dtype=np.float32
+        )
+        np.nan_to_num(values, copy=False, nan=0.0)
+        plots[built] = values
+    plots_end = num_plots * len(PLOT_FEATURES)
+    out[:, :plots_end] = plots.reshape(num_players, plots_end)
+
+    fences = np.fromiter(
+        chain.from_iterable(
+            street.fences
+            for player in players
+            for street in player.neighbourhood.streets
+        ),
+        dtype=bool,
+        count=num_players * num_fences,
+    )
+    fences_end = plots_end + num_fences
+    out[:, plots_end:fences_end] = fences.reshape(num_players, num_fences)
+
+    parks_end = fences_end + len(streets)
+    out[:, fences_end:parks_end] = np.fromiter(
+        map(
+            _get_num_parks,
+            chain.from_iterable(player.neighbourhood.streets for player in players),
+        ),
+        dtype=np.float32,
+        count=num_players * len(streets),
+    ).reshape(num_players, len(streets))
+    counters_end = parks_end + len(COUNTER_FEATURES)
+    out[:, parks_end:counters_end] = list(map(_get_counters, players))
+    out[:, counters_end:] = [
+        [investments[size] for size in sorted(investments)]
+        for investments in map(_get_investments, players)
+    ]
+
+
+def encode_player(player: Player, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Write the encoding of a player into out, or a new array if out isn't given.
+
+    :param out: Array of length `get_encoding_size(player.game_definition)`.
+    :return: The array written to.
+    """
+    values = _get_values(player)
+    if out is None:
+        out = np.empty(len(values), dtype=np.float32)
+    out[:] = values
+    return out
+
+
+def encode_players(
+    players: Sequence[Player], out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Write the encodings of many players of the same game definition into rows of out.
+
+    Encoding players together is faster than encoding them one at a time.
+
+    :param out: Array with a row for each player, or a new array if not given.
+    :return: The array written to.
+    """
+    if out is None:
+        size = get_encoding_size(players[0].game_definition) if players else 0
+        out = np.empty((len(players), size), dtype=np.float32)
+    if players:
+        _write_encodings(players, out)
+    return out
@@ -20,3 +20,27 @@ class FencePlacementError(Est8Error):
 
 class InvestmentError(Est8Error):
     pass
+
+
+class MoveError(Est8Error):
+    pass
+
+
+class CorpusFormatError(Est8Error):
+    pass
+
+
+class DeckError(Est8Error):
+    pass
+
+
+class TablebaseFormatError(Est8Error):
+    pass
+
+
+class OpeningBookFormatError(Est8Error):
+    pass
+
+
+class CheckpointFormatError(Est8Error):
+    pass
@@ -0,0 +1,140 @@
+"""
+Finding the fences to build on a street that maximise its investment score.
+
+Estates are scored independently, so the best fences for each street can be found
+separately. For a street of n plots, with no estate larger than k worth anything, a
+dynamic programme over fence positions finds the best partition in O(n·k).
+
+Fences can't be removed, so existing fences always bound estates.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple, Union
+
+from est8.backend.definitions import GameDefinition
+from est8.backend.street import Street
+from est8.backend.street_index import StreetIndex
+
+
+@dataclass(frozen=True)
+class FencePlan:
+    """The fences to add to a street, and the estates they would make."""
+
+    new_fences: Tuple[int, ...]
+    # Sizes of the estates that would be worth something, from left to right.
+    estates: Tuple[int, ...]
+    value: int
+
+
+def get_estate_values(
+    game_definition: GameDefinition, investments: Dict[int, int]
+) -> Dict[int, int]:
+    """Get the value of a single complete estate of each size, given the investments."""
+    invest = game_definition.scoring.invest
+    return {
+        estate_size: invest.get_estate_value(
+            estate_size, investments.get(estate_size, 0)
+        )
+        for estate_size in invest.map
+    }
+
+
+def solve_fence_partition(
+    fences: Sequence[bool],
+    plot_can_be_in_estate: Sequence[bool],
+    estate_values: Dict[int, int],
+) -> FencePlan:
+    """
+    Find the fences to add to maximise the total value of the estates on a street.
+
+    :param fences: Existing fences, indexed as Street.fences.
+    :param plot_can_be_in_estate: For each plot, whether it can be part of a complete
+        estate (built and not a roundabout).
+    :param estate_values: Value of a complete estate of each size.
+    """
+    num_plots = len(plot_can_be_in_estate)
+    max_size = max(
+        (size for size, value in estate_values.items() if value > 0), default=0
+    )
+
+    # best[j] is the best (value, -number of new fences) for plots [0, j) given a fence
+    # at j, with the estate ending at j starting at previous[j]. Of equally valuable
+    # plans, the one needing the fewest new fences is best.
+    best: List[Tuple[int, int]] = [(0, 0)] * (num_plots + 1)
+    previous: List[int] = [0] * (num_plots + 1)
+    # The last existing fence, and the best fence position since then to start an
+    # estate worth nothing from.
+    last_fixed = 0
+    best_start = 0
+
+    for end in range(1, num_plots + 1):
+        new_fence = 0 if fences[end] else 1
+        best[end] = (best[best_start][0], best[best_start][1] - new_fence)
+        previous[end] = best_start
+
+        # Only estates of plots that can all be in one are worth anything.
+        for size in range(1, min(max_size, end - last_fixed) + 1):
+            start = end - size
+            if not plot_can_be_in_estate[start]:
+                break
+            value = (
+                best[start][0] + estate_values.get(size, 0),
+                best[start][1] - new_fence,
+            )
+            if value > best[end]:
+                best[end] = value
+                previous[end] = start
+
+        if fences[end]:
+            last_fixed = best_start = end
+        elif best[end] > best[best_start]:
+            best_start = end
+
+    # Walk back through the chosen fences.
+    new_fences = []
+    estates = []
+    end = num_plots
+    while end > 0:
+        start = previous[end]
+        size = end - start
+        if estate_values.get(size, 0) > 0 and all(plot_can_be_in_estate[start:end]):
+            estates.append(size)
+        if not fences[start]:
+            new_fences.append(start)
+        end = start
+
+    return FencePlan(
+        new_fences=tuple(sorted(new_fences)),
+        estates=tuple(reversed(estates)),
+        value=best[num_plots][0],
+    )
+
+
+def plan_street_fences(
+    street: Union[Street, StreetIndex],
+    estate_values: Dict[int, int],
+    assume_all_built: bool = False,
+) -> FencePlan:
+    """
+    Find the best fences to add to a Street or StreetIndex.
+
+    :param assume_all_built: Plan for every empty plot being built on, rather than only
+        counting estates that are complete now.
+    """
+    if isinstance(street, StreetIndex):
+        is_built = street.is_built
+        is_roundabout = street.is_roundabout
+    else:
+        is_built = [house is not None for house in street.houses]
+        is_roundabout = [
+            house is not None and house.is_roundabout for house in street.houses
+        ]
+
+    return solve_fence_partition(
+        street.fences,
+        [
+            (built or assume_all_built) and not roundabout
+            for built, roundabout in zip(is_built, is_roundabout)
+        ],
+        estate_values,
+    )
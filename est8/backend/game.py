@@ -0,0 +1,181 @@
+"""A headless game of one or more players sharing the same card draws."""
+
+from random import Random
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from est8.backend.errors import MoveError
+from est8.backend.definitions import CardPair, GameDefinition
+from est8.backend.legal_moves import has_any_legal_placement
+from est8.backend.move import Move
+from est8.backend.plans import PlanRace
+from est8.backend.player import Player
+from est8.backend.record import GameRecord
+from est8.backend.replay import apply_move_unchecked
+from est8.backend.temp_ranking import TempAgencyRanking
+from est8.backend.transcript import MoveValidator
+
+
+def player_has_finished(player: Player) -> bool:
+    """
+    Return True if the given player has triggered the end of the game.
+
+    That happens when they have built on every plot, or used all their permit refusals.
+    """
+    max_refusals = len(player.game_definition.scoring.permit_refusal) - 1
+    if player.num_permit_refusals >= max_refusals:
+        return True
+    return all(
+        house is not None
+        for street in player.neighbourhood.streets
+        for house in street.houses
+    )
+
+
+class Game:
+    """
+    A game where every player responds to the same card pairs each turn.
+
+    Each turn: `draw()` the card pairs, `submit_move()` for every player, then
+    `end_turn()`. Moves are validated when submitted, and only applied once every
+    player has submitted, so players cannot see each other's choices.
+
+    Players who cannot build any of the card pairs drawn automatically take a permit
+    refusal, which they may still resubmit.
+
+    :param on_temp_score_change: Called with (player_no, new temp agency score) whenever
+        a player's temp agency podium position changes.
+    """
+
+    def __init__(
+        self,
+        game_definition: GameDefinition,
+        num_players: int = 1,
+        rng: Optional[Random] = None,
+        on_temp_score_change: Optional[Callable[[int, int], None]] = None,
+    ):
+        self.game_definition: GameDefinition = game_definition
+        self.players: List[Player] = [
+            Player.new(game_definition) for _ in range(num_players)
+        ]
+        self._validators: List[MoveValidator] = [
+            MoveValidator(game_definition) for _ in range(num_players)
+        ]
+        self.temp_ranking: TempAgencyRanking = TempAgencyRanking(
+            game_definition, num_players, on_temp_score_change
+        )
+        self.plan_race: PlanRace = PlanRace(self.players)
+        self._card_pairs_generator = game_definition.generate_card_pairs(rng)
+
+        self.card_pairs: Optional[Tuple[CardPair, ...]] = None
+        self._pending_moves: List[Optional[Move]] = [None] * num_players
+        self._pending_validators: List[Optional[MoveValidator]] = [None] * num_players
+
+        self.draws: List[Tuple[CardPair, ...]] = []
+        self.moves: List[Tuple[Move, ...]] = []
+
+    @property
+    def num_players(self) -> int:
+        return len(self.players)
+
+    @property
+    def turn(self) -> int:
+        """The number of turns that have been completed."""
+        return len(self.moves)
+
+    @property
+    def is_over(self) -> bool:
+        return any(player_has_finished(player) for player in self.players)
+
+    def draw(self) -> Tuple[CardPair, ...]:
+        """Draw the card pairs for the next turn."""
+        if self.card_pairs is not None:
+            raise MoveError("Cards have already been drawn this turn.")
+        self.card_pairs = next(self._card_pairs_generator)
+        for player_no, validator in enumerate(self._validators):
+            if not has_any_legal_placement(validator, self.card_pairs):
+                self.submit_move(player_no, Move.permit_refusal())
+        return self.card_pairs
+
+    def assert_move_is_valid(self, player_no: int, move: Move) -> MoveValidator:
+        """
+        Raise the relevant Est8Error if the move is not valid for the given player.
+
+        :return: The player's validator state after the move has been made.
+        """
+        if self.card_pairs is None:
+            raise MoveError("Cards have not been drawn this turn.")
+        validator = self._validators[player_no].copy()
+        validator.check_and_apply(self.card_pairs, move)
+        return validator
+
+    def get_validator(self, player_no: int) -> MoveValidator:
+        """Get the player's state as of the start of the turn, which must not be changed."""
+        return self._validators[player_no]
+
+    def submit_move(self, player_no: int, move: Move) -> None:
+        """Validate and store the move the given player makes this turn."""
+        self._pending_validators[player_no] = self.assert_move_is_valid(player_no, move)
+        self._pending_moves[player_no] = move
+
+    def has_submitted(self, player_no: int) -> bool:
+        """Return True if the player has a move this turn, e.g. an automatic refusal."""
+        return self._pending_moves[player_no] is not None
+
+    @property
+    def all_moves_submitted(self) -> bool:
+        return all(move is not None for move in self._pending_moves)
+
+    def _update_temp_ranking(self) -> None:
+        for player_no, player in enumerate(self.players):
+            if player.num_temp_agencies != self.temp_ranking.temps(player_no):
+                self.temp_ranking.set_temps(player_no, player.num_temp_agencies)
+
+    def end_turn(self) -> None:
+        """Apply every player's submitted move."""
+        moves = tuple(move for move in self._pending_moves if move is not None)
+        validators = [
+            validator for validator in self._pending_validators if validator is not None
+        ]
+        if self.card_pairs is None or len(moves) != self.num_players:
+            raise MoveError("Every player must submit a move before the turn ends.")
+
+        for player, move in zip(self.players, moves):
+            # Moves have already been validated on submission.
+            apply_move_unchecked(player, self.card_pairs, move)
+        self._validators = validators
+        self._update_temp_ranking()
+        self.plan_race.end_turn(moves)
+
+        self.draws.append(self.card_pairs)
+        self.moves.append(moves)
+        self.card_pairs = None
+        self._pending_moves = [None] * self.num_players
+        self._pending_validators = [None] * self.num_players
+
+    def play_turn(self, moves: Sequence[Move]) -> None:
+        """Submit a move for every player and end the turn, drawing first if needed."""
+        if self.card_pairs is None:
+            self.draw()
+        for player_no, move in enumerate(moves):
+            self.submit_move(player_no, move)
+        self.end_turn()
+
+    def score_breakdowns(self) -> Tuple[Dict[str, int], ...]:
+        """Get each player's score in each category, as from get_score_breakdown."""
+        self._update_temp_ranking()
+        return tuple(
+            player.get_score_breakdown(
+                temp_agency_score=self.temp_ranking.score(player_no)
+            )
+            for player_no, player in enumerate(self.players)
+        )
+
+    def scores(self) -> Tuple[int, ...]:
+        self._update_temp_ranking()
+        return tuple(
+            player.get_score(temp_agency_score=self.temp_ranking.score(player_no))
+            for player_no, player in enumerate(self.players)
+        )
+
+    def to_record(self) -> GameRecord:
+        return GameRecord(draws=tuple(self.draws), moves=tuple(self.moves))
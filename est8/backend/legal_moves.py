@@ -0,0 +1,172 @@
+"""Generation of every legal move a player can make with the cards drawn this turn."""
+
+from typing import Iterator, List, Optional, Tuple
+
+from est8.backend.definitions import ActionEnum, CardPair
+from est8.backend.move import Move
+from est8.backend.street_index import StreetIndex
+from est8.backend.transcript import MoveValidator
+
+
+def _house_placements(
+    streets: List[StreetIndex], number: int
+) -> Iterator[Tuple[int, int]]:
+    for street_no, street in enumerate(streets):
+        for plot_no in range(street.num_houses):
+            if street.can_place_number(plot_no, number):
+                yield street_no, plot_no
+
+
+def _bis_placements(
+    streets: List[StreetIndex], street_no: int, plot_no: int
+) -> Iterator[Tuple[int, int]]:
+    """Get every plot a bis could be built in after a house is built at plot_no."""
+    for other_street_no, street in enumerate(streets):
+        for other_plot_no in range(street.num_houses):
+            if other_street_no == street_no and other_plot_no == plot_no:
+                continue
+            if street.get_bis_number(other_plot_no) is not None:
+                yield other_street_no, other_plot_no
+            elif (
+                other_street_no == street_no
+                and abs(other_plot_no - plot_no) == 1
+                and not street.is_built[other_plot_no]
+                and not street.fences[max(plot_no, other_plot_no)]
+            ):
+                # Next to the house that is about to be built, with no fence between.
+                yield other_street_no, other_plot_no
+
+
+def _fence_placements(streets: List[StreetIndex]) -> Iterator[Tuple[int, int]]:
+    for street_no, street in enumerate(streets):
+        for fence_index in range(len(street.fences)):
+            if street.can_place_fence(fence_index):
+                yield street_no, fence_index
+
+
+def _moves_for_state(
+    state: MoveValidator,
+    card_pairs: Tuple[CardPair, ...],
+    roundabout: Optional[Tuple[int, int]] = None,
+) -> Iterator[Move]:
+    game_definition = state.game_definition
+    for card_pair_index, card_pair in enumerate(card_pairs):
+        action = card_pair.action_card.action
+        max_offset = (
+            game_definition.max_temp_agency_offset if action == ActionEnum.temp else 0
+        )
+        for temp_offset in range(-max_offset, max_offset + 1):
+            number = card_pair.number_card.number + temp_offset
+            for street_no, plot_no in _house_placements(state.streets, number):
+                move = Move(
+                    card_pair_index,
+                    street_no,
+                    plot_no,
+                    temp_offset=temp_offset,
+                    roundabout=roundabout,
+                )
+                # Actions are optional, so placing just the house is always allowed.
+                yield move
+
+                if action == ActionEnum.fence:
+                    for fence in _fence_placements(state.streets):
+                        yield Move(
+                            card_pair_index,
+                            street_no,
+                            plot_no,
+                            fence=fence,
+                            roundabout=roundabout,
+                        )
+                elif action == ActionEnum.invest:
+                    for estate_size, num_investments in state.investments.items():
+                        if (
+                            num_investments
+                            < game_definition.max_investments_in_estate_size(
+                                estate_size
+                            )
+                        ):
+                            yield Move(
+                                card_pair_index,
+                                street_no,
+                                plot_no,
+                                invest_estate_size=estate_size,
+                                roundabout=roundabout,
+                            )
+                elif action == ActionEnum.bis:
+                    for bis in _bis_placements(state.streets, street_no, plot_no):
+                        yield Move(
+                            card_pair_index,
+                            street_no,
+                            plot_no,
+                            bis=bis,
+                            roundabout=roundabout,
+                        )
+
+
+def has_legal_placement(state: MoveValidator, number: int) -> bool:
+    """
+    Return True if a house with the given number can be built anywhere.
+
+    Building a roundabout first is taken into account if the player has any left. A bis
+    never needs considering: it only copies a neighbouring number, so can't make room
+    for any other.
+    """
+    allow_roundabout = state.num_roundabouts < state.game_definition.max_roundabouts
+    return any(
+        street.can_place_number_anywhere(number, allow_roundabout)
+        for street in state.streets
+    )
+
+
+def has_any_legal_placement(
+    state: MoveValidator, card_pairs: Tuple[CardPair, ...]
+) -> bool:
+    """Return True if any of the card pairs can be built, so no permit refusal is needed."""
+    max_offset = state.game_definition.max_temp_agency_offset
+    for card_pair in card_pairs:
+        number = card_pair.number_card.number
+        offset = max_offset if card_pair.action_card.action == ActionEnum.temp else 0
+        if any(
+            has_legal_placement(state, number + temp_offset)
+            for temp_offset in range(-offset, offset + 1)
+        ):
+            return True
+    return False
+
+
+def generate_legal_moves(
+    state: MoveValidator,
+    card_pairs: Tuple[CardPair, ...],
+    include_roundabouts: bool = False,
+) -> Iterator[Move]:
+    """
+    Generate every legal move for a player in the given state.
+
+    A permit refusal is generated only if there is no other legal move.
+
+    :param include_roundabouts: Also generate moves that build a roundabout alongside
+        the house. This greatly increases the number of moves generated.
+    """
+    found_move = False
+    for move in _moves_for_state(state, card_pairs):
+        found_move = True
+        yield move
+
+    if (
+        include_roundabouts
+        and state.num_roundabouts < state.game_definition.max_roundabouts
+    ):
+        for street_no, street in enumerate(state.streets):
+            for plot_no in range(street.num_houses):
+                if not street.can_place_roundabout(plot_no):
+                    continue
+                with_roundabout = state.copy()
+                with_roundabout.streets[street_no].place_roundabout(plot_no)
+                for move in _moves_for_state(
+                    with_roundabout, card_pairs, roundabout=(street_no, plot_no)
+                ):
+                    found_move = True
+                    yield move
+
+    if not found_move:
+        yield Move.permit_refusal()
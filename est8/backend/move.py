@@ -0,0 +1,129 @@
+"""Definition of the decision a player makes on each turn, and how to apply it."""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from est8.backend.errors import MoveError
+from est8.backend.definitions import ActionEnum, CardPair, GameDefinition
+from est8.backend.house import House
+from est8.backend.player import Player
+
+
+@dataclass(frozen=True)
+class Move:
+    """
+    A single turn's decision for one player.
+
+    The house from the chosen card pair is built at (street_no, plot_no). The optional
+    action fields are only allowed when the action card of the chosen pair permits them:
+     - fence: (street_no, fence_index) of a fence to build.
+     - invest_estate_size: the estate size to invest in.
+     - bis: (street_no, plot_no) of a bis to build after the main house.
+     - temp_offset: adjustment to the house number when using a temp agency.
+
+    A roundabout may be built alongside any house, at (street_no, plot_no), before the
+    main house is built.
+
+    A card_pair_index of None represents a permit refusal.
+    """
+
+    card_pair_index: Optional[int]
+    street_no: int = 0
+    plot_no: int = 0
+    temp_offset: int = 0
+    fence: Optional[Tuple[int, int]] = None
+    invest_estate_size: Optional[int] = None
+    bis: Optional[Tuple[int, int]] = None
+    roundabout: Optional[Tuple[int, int]] = None
+
+    @classmethod
+    def permit_refusal(cls) -> "Move":
+        """Construct the move taken when no card pair can be used."""
+        return cls(card_pair_index=None)
+
+    @property
+    def is_permit_refusal(self) -> bool:
+        return self.card_pair_index is None
+
+
+def get_house_for_move(
+    game_definition: GameDefinition, card_pairs: Tuple[CardPair, ...], move: Move
+) -> House:
+    """Create the main House that the given move builds."""
+    if move.card_pair_index is None:
+        raise MoveError("A permit refusal does not build a house.")
+    card_pair = card_pairs[move.card_pair_index]
+    action = card_pair.action_card.action
+    return House(
+        number=card_pair.number_card.number + move.temp_offset,
+        built_by_temps=action == ActionEnum.temp,
+        has_park=action == ActionEnum.park,
+        has_pool=(
+            action == ActionEnum.pool
+            and game_definition.can_have_pool_at(move.street_no, move.plot_no)
+        ),
+    )
+
+
+def assert_move_matches_cards(
+    game_definition: GameDefinition, card_pairs: Tuple[CardPair, ...], move: Move
+) -> None:
+    """
+    Raise a MoveError if the move uses actions that the chosen card pair does not allow.
+
+    This does not check whether the placements themselves are valid - that is left to
+    the Player when the move is applied.
+    """
+    if move.card_pair_index is None:
+        return
+
+    if move.card_pair_index < 0 or move.card_pair_index >= len(card_pairs):
+        raise MoveError("Chosen card pair was not drawn.")
+
+    action = card_pairs[move.card_pair_index].action_card.action
+    if move.fence is not None and action != ActionEnum.fence:
+        raise MoveError("Can only build a fence with a fence action.")
+    if move.invest_estate_size is not None and action != ActionEnum.invest:
+        raise MoveError("Can only invest with an invest action.")
+    if move.bis is not None and action != ActionEnum.bis:
+        raise MoveError("Can only build a bis with a bis action.")
+    if move.temp_offset != 0:
+        if action != ActionEnum.temp:
+            raise MoveError("Can only change house number with a temp action.")
+        if abs(move.temp_offset) > game_definition.max_temp_agency_offset:
+            raise MoveError("Temp agency cannot change house number that much.")
+
+
+def apply_move(player: Player, card_pairs: Tuple[CardPair, ...], move: Move) -> None:
+    """
+    Apply the given move to the player, using the card pairs drawn this turn.
+
+    Every placement is checked for validity by the Player as it is made.
+    """
+    if move.is_permit_refusal:
+        player.num_permit_refusals += 1
+        return
+
+    game_definition = player.game_definition
+    assert_move_matches_cards(game_definition, card_pairs, move)
+
+    if move.roundabout is not None:
+        street_no, plot_no = move.roundabout
+        player.place_house(street_no, plot_no, House(is_roundabout=True))
+
+    player.place_house(
+        move.street_no,
+        move.plot_no,
+        get_house_for_move(game_definition, card_pairs, move),
+    )
+
+    if move.bis is not None:
+        street_no, plot_no = move.bis
+        player.place_house(street_no, plot_no, House(is_bis=True))
+
+    if move.fence is not None:
+        street_no, fence_index = move.fence
+        player.place_fence(street_no, fence_index)
+
+    if move.invest_estate_size is not None:
+        player.make_investment(move.invest_estate_size)
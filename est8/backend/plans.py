@@ -0,0 +1,171 @@
+"""
+Incremental tracking of city plan completion.
+
+A plan's requirements are a multiset of estate sizes. Each PlanTracker keeps a count of
+the complete estates of every size that have not yet been used for a plan, and only
+re-reads a street's estates when told that street has changed. Plans are then only
+re-checked when an estate size they need has become more available.
+
+Every house can only be used for one plan, so the estates used to complete a plan are
+no longer available to the others.
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from est8.backend.move import Move
+from est8.backend.player import Player
+
+
+def streets_changed_by_move(move: Move) -> Set[int]:
+    """Get the numbers of the streets whose estates may have changed because of a move."""
+    if move.is_permit_refusal:
+        return set()
+    streets = {move.street_no}
+    for extra in (move.roundabout, move.bis, move.fence):
+        if extra is not None:
+            streets.add(extra[0])
+    return streets
+
+
+class PlanTracker:
+    """Tracks which of the game's plans a single player's estates could complete."""
+
+    def __init__(self, player: Player):
+        self.player: Player = player
+        self.plans = player.game_definition.plans
+        self._requirements: List["Counter[int]"] = [
+            Counter(plan.estates) for plan in self.plans
+        ]
+
+        num_streets = len(player.neighbourhood.streets)
+        self._used_plots: List[Set[int]] = [set() for _ in range(num_streets)]
+        self._available: List[List[Tuple[int, int]]] = [[] for _ in range(num_streets)]
+        self._available_sizes: "Counter[int]" = Counter()
+        # Plans that should be checked the next time `update()` is called.
+        self._to_check: Set[int] = set()
+
+        for street_no in range(num_streets):
+            self.street_changed(street_no)
+
+    def street_changed(self, street_no: int) -> None:
+        """Re-read the estates available in one street."""
+        street = self.player.neighbourhood.streets[street_no]
+        used_plots = self._used_plots[street_no]
+        available = [
+            (start, end)
+            for start, end in street.get_complete_estate_spans()
+            if not any(plot_no in used_plots for plot_no in range(start, end))
+        ]
+
+        old_sizes = Counter(end - start for start, end in self._available[street_no])
+        new_sizes = Counter(end - start for start, end in available)
+        self._available[street_no] = available
+        self._available_sizes.subtract(old_sizes)
+        self._available_sizes.update(new_sizes)
+
+        # Only plans needing an estate size that became more available could now be met.
+        grown_sizes = new_sizes - old_sizes
+        for plan_index, requirement in enumerate(self._requirements):
+            if self.player.plans_completed[plan_index] is None and any(
+                size in requirement for size in grown_sizes
+            ):
+                self._to_check.add(plan_index)
+
+    def _can_complete(self, plan_index: int) -> bool:
+        requirement = self._requirements[plan_index]
+        return bool(requirement) and all(
+            self._available_sizes[size] >= count for size, count in requirement.items()
+        )
+
+    def _use_estates(self, plan_index: int) -> None:
+        """Mark estates matching the plan's requirements as used."""
+        needed = Counter(self._requirements[plan_index])
+        for street_no, available in enumerate(self._available):
+            remaining = []
+            for start, end in available:
+                size = end - start
+                if needed[size] > 0:
+                    needed[size] -= 1
+                    self._available_sizes[size] -= 1
+                    self._used_plots[street_no].update(range(start, end))
+                else:
+                    remaining.append((start, end))
+            self._available[street_no] = remaining
+
+    def update(self) -> List[int]:
+        """
+        Find the plans that can now be completed, using up the estates they need.
+
+        The plans are not scored until `complete_plan()` is called for each of them.
+
+        :return: Indices of the newly completable plans, in plan order.
+        """
+        completed = []
+        for plan_index in sorted(self._to_check):
+            if self._can_complete(plan_index):
+                self._use_estates(plan_index)
+                completed.append(plan_index)
+        self._to_check.clear()
+        return completed
+
+    def complete_plan(self, plan_index: int, first: bool) -> int:
+        """
+        Score a completed plan for the player.
+
+        :param first: Whether the player is among the first to complete the plan.
+        :return: The points scored.
+        """
+        first_points, second_points = self.plans[plan_index].points
+        points = first_points if first else second_points
+        self.player.plans_completed[plan_index] = points
+        return points
+
+
+class PlanRace:
+    """
+    Awards plans to every player in a game, turn by turn.
+
+    Players who complete a plan on the same turn as the first player to complete it
+    also score its first points.
+    """
+
+    def __init__(self, players: Iterable[Player]):
+        self.trackers: List[PlanTracker] = [PlanTracker(player) for player in players]
+        num_plans = len(self.trackers[0].plans) if self.trackers else 0
+        self.claimed: List[bool] = [False] * num_plans
+
+    def end_turn(
+        self, moves: Optional[Iterable[Move]] = None
+    ) -> List[Tuple[int, int, int]]:
+        """
+        Award the plans completed this turn.
+
+        :param moves: The move each player made this turn, so that only the streets they
+            changed are re-read. If not given, every street is re-read.
+        :return: (player_no, plan_index, points) for each plan completed.
+        """
+        newly_completed = []
+        if moves is None:
+            for tracker in self.trackers:
+                for street_no in range(len(tracker.player.neighbourhood.streets)):
+                    tracker.street_changed(street_no)
+        else:
+            for tracker, move in zip(self.trackers, moves):
+                for street_no in streets_changed_by_move(move):
+                    tracker.street_changed(street_no)
+
+        for player_no, tracker in enumerate(self.trackers):
+            for plan_index in tracker.update():
+                newly_completed.append((player_no, plan_index))
+
+        awarded = []
+        claimed_this_turn = set()
+        for player_no, plan_index in newly_completed:
+            first = not self.claimed[plan_index]
+            points = self.trackers[player_no].complete_plan(plan_index, first)
+            awarded.append((player_no, plan_index, points))
+            claimed_this_turn.add(plan_index)
+        for plan_index in claimed_this_turn:
+            self.claimed[plan_index] = True
+        return awarded
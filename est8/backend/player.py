@@ -1,4 +1,4 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import Dict, Tuple, List, Optional
 
 from est8.backend.errors import (
@@ -34,6 +34,28 @@ class Player:
             plans_completed=[None for _ in definition.plans],
         )
 
+    def copy(self) -> "Player":
+        """
+        Copy the player's state, so that either copy can be changed independently.
+
+        Houses are never modified once built, so they are shared between the copies.
+        """
+        neighbourhood = self.neighbourhood
+        return replace(
+            self,
+            neighbourhood=replace(
+                neighbourhood,
+                streets=[
+                    replace(
+                        street, houses=list(street.houses), fences=list(street.fences)
+                    )
+                    for street in neighbourhood.streets
+                ],
+            ),
+            investments=dict(self.investments),
+            plans_completed=list(self.plans_completed),
+        )
+
     def assert_place_house_is_valid(self, house: House) -> None:
         if house.is_roundabout:
             self.assert_roundabout_placement_is_valid()
@@ -74,20 +96,45 @@ class Player:
                 "Maximum number of roundabouts have been placed."
             )
 
-    def get_score(self, other_player_temps: Tuple[int]) -> int:
-        all_player_temps = other_player_temps + (self.num_temp_agencies,)
+    def get_score_breakdown(
+        self,
+        other_player_temps: Tuple[int, ...] = (),
+        temp_agency_score: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Get the score from each scoring category, keyed by category name.
 
+        :param temp_agency_score: The player's temp agency score if it is already known,
+            e.g. from a TempAgencyRanking. If given, other_player_temps is ignored.
+        """
         scoring = self.game_definition.scoring
-        return sum(
-            (
-                scoring.bis_score(self.num_biss),
-                scoring.investment_score(
-                    self.neighbourhood.get_all_estates(), self.investments
-                ),
-                scoring.pool_score(self.num_pools),
-                scoring.roundabouts_score(self.num_roundabouts),
-                scoring.temp_agency_score(all_player_temps, self.num_temp_agencies),
-                scoring.permit_refusal_score(self.num_permit_refusals),
-                sum((street.get_park_score() for street in self.neighbourhood.streets)),
+        if temp_agency_score is None:
+            temp_agency_score = scoring.temp_agency_score(
+                other_player_temps + (self.num_temp_agencies,), self.num_temp_agencies
             )
+
+        return {
+            "bis": scoring.bis_score(self.num_biss),
+            "investments": scoring.investment_score(
+                self.neighbourhood.get_all_estates(), self.investments
+            ),
+            "pools": scoring.pool_score(self.num_pools),
+            "roundabouts": scoring.roundabouts_score(self.num_roundabouts),
+            "temp_agencies": temp_agency_score,
+            "permit_refusals": scoring.permit_refusal_score(self.num_permit_refusals),
+            "parks": sum(
+                (street.get_park_score() for street in self.neighbourhood.streets)
+            ),
+            "plans": sum(
+                points for points in self.plans_completed if points is not None
+            ),
+        }
+
+    def get_score(
+        self,
+        other_player_temps: Tuple[int, ...] = (),
+        temp_agency_score: Optional[int] = None,
+    ) -> int:
+        return sum(
+            self.get_score_breakdown(other_player_temps, temp_agency_score).values()
         )
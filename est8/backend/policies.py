@@ -0,0 +1,166 @@
+"""Automated players that choose a move each turn."""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from random import Random
+from typing import Optional, Set, Tuple
+
+from est8.backend.definitions import ActionEnum, CardPair
+from est8.backend.fence_solver import get_estate_values, plan_street_fences
+from est8.backend.legal_moves import generate_legal_moves
+from est8.backend.move import Move
+from est8.backend.street_index import StreetIndex
+from est8.backend.transcript import MoveValidator
+
+# Highest house number that can be built, used to bound open-ended plots.
+MAX_HOUSE_NUMBER = 17
+
+
+class Policy(ABC):
+    """Base class of automated players."""
+
+    def reset(self) -> None:
+        """Prepare to play a new game."""
+
+    @abstractmethod
+    def choose_move(
+        self, state: MoveValidator, card_pairs: Tuple[CardPair, ...]
+    ) -> Move:
+        """Choose a legal move for the player in the given state."""
+
+
+class RandomPolicy(Policy):
+    """Choose uniformly at random between every legal move."""
+
+    def __init__(self, rng: Optional[Random] = None):
+        self.rng: Random = rng if rng is not None else Random()
+
+    def choose_move(
+        self, state: MoveValidator, card_pairs: Tuple[CardPair, ...]
+    ) -> Move:
+        return self.rng.choice(list(generate_legal_moves(state, card_pairs)))
+
+
+@dataclass(frozen=True)
+class GreedyWeights:
+    """Weights of each term the GreedyPolicy uses to value a move."""
+
+    fit: float = 10.0
+    pool: float = 3.0
+    park: float = 2.0
+    fence: float = 1.0
+    invest: float = 1.5
+    bis: float = -2.0
+    temp: float = 0.5
+
+
+def get_number_fit(street: StreetIndex, plot_no: int, number: int) -> float:
+    """
+    Measure how well a number suits a plot, from 0 (worst) to 1 (best).
+
+    A number fits well when its position between the bounds of the run of empty plots
+    around it matches the plot's position within that run. That leaves the most room for
+    the numbers still to come.
+    """
+    start = plot_no
+    while start > 0 and not street.is_built[start - 1]:
+        start -= 1
+    end = plot_no
+    while end < street.num_houses - 1 and not street.is_built[end + 1]:
+        end += 1
+
+    lower = max(street.lower[plot_no], -1)
+    upper = min(street.upper[plot_no], MAX_HOUSE_NUMBER + 1)
+    ideal = (plot_no - start + 1) / (end - start + 2)
+    actual = (number - lower) / max(upper - lower, 1)
+    return 1.0 - abs(ideal - actual)
+
+
+def get_planned_fences(state: MoveValidator) -> Set[Tuple[int, int]]:
+    """Get the (street_no, fence_index) of every fence in each street's best fence plan."""
+    estate_values = get_estate_values(state.game_definition, state.investments)
+    return {
+        (street_no, fence_index)
+        for street_no, street in enumerate(state.streets)
+        for fence_index in plan_street_fences(
+            street, estate_values, assume_all_built=True
+        ).new_fences
+    }
+
+
+class GreedyPolicy(Policy):
+    """
+    Choose the legal move that scores highest under a simple weighted heuristic.
+
+    Only fences that are part of the best fence plan for the finished street are
+    rewarded. Ties are broken at random.
+    """
+
+    def __init__(
+        self, weights: Optional[GreedyWeights] = None, rng: Optional[Random] = None
+    ):
+        self.weights: GreedyWeights = (
+            weights if weights is not None else GreedyWeights()
+        )
+        self.rng: Random = rng if rng is not None else Random()
+
+    def value_move(
+        self,
+        state: MoveValidator,
+        card_pairs: Tuple[CardPair, ...],
+        move: Move,
+        planned_fences: Optional[Set[Tuple[int, int]]] = None,
+    ) -> float:
+        """
+        Value a move under the heuristic.
+
+        :param planned_fences: As from `get_planned_fences`. If not given, every fence
+            is rewarded.
+        """
+        if move.card_pair_index is None:
+            return float("-inf")
+
+        weights = self.weights
+        card_pair = card_pairs[move.card_pair_index]
+        action = card_pair.action_card.action
+        street = state.streets[move.street_no]
+        number = card_pair.number_card.number + move.temp_offset
+
+        value = weights.fit * get_number_fit(street, move.plot_no, number)
+        if action == ActionEnum.pool and street.definition.can_have_pool_at(
+            move.plot_no
+        ):
+            value += weights.pool
+        elif action == ActionEnum.park:
+            value += weights.park
+        elif action == ActionEnum.temp:
+            value += weights.temp
+        if move.fence is not None and (
+            planned_fences is None or move.fence in planned_fences
+        ):
+            value += weights.fence
+        if move.invest_estate_size is not None:
+            value += weights.invest
+        if move.bis is not None:
+            value += weights.bis
+        return value
+
+    def choose_move(
+        self, state: MoveValidator, card_pairs: Tuple[CardPair, ...]
+    ) -> Move:
+        planned_fences = None
+        if any(
+            card_pair.action_card.action == ActionEnum.fence for card_pair in card_pairs
+        ):
+            planned_fences = get_planned_fences(state)
+
+        best_moves = []
+        best_value = float("-inf")
+        for move in generate_legal_moves(state, card_pairs):
+            value = self.value_move(state, card_pairs, move, planned_fences)
+            if value > best_value:
+                best_value = value
+                best_moves = [move]
+            elif value == best_value:
+                best_moves.append(move)
+        return self.rng.choice(best_moves)
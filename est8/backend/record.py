@@ -0,0 +1,203 @@
+"""Record of a played game, and its compact fixed-size binary encoding."""
+
+import mmap
+import struct
+
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+from est8.backend.definitions import ActionEnum, CardDefinition, CardPair
+from est8.backend.errors import CorpusFormatError, MoveError
+from est8.backend.move import Move
+
+# A card is stored as its number and the value of its action.
+CARD_STRUCT = struct.Struct("<BB")
+
+# A move is stored as 11 signed bytes, with -1 representing "not used".
+# card_pair_index, street_no, plot_no, temp_offset, fence street, fence index,
+# invest estate size, bis street, bis plot, roundabout street, roundabout plot.
+MOVE_STRUCT = struct.Struct("<11b")
+
+_NOT_USED = -1
+MOVE_FIELD_MIN = -128
+MOVE_FIELD_MAX = 127
+
+# Limits of the fields in the game header, see `est8.backend.corpus`.
+MAX_TURNS = 0xFFFF
+MAX_PLAYERS = 0xFF
+MAX_CARD_PAIRS_PER_DRAW = 0xFF
+
+# Encoded data is decoded either from bytes or straight out of a mapped file.
+Buffer = Union[bytes, mmap.mmap]
+
+
+@dataclass(frozen=True)
+class GameRecord:
+    """
+    Everything needed to replay a game: the cards drawn and the moves made each turn.
+
+    draws[turn] is the tuple of CardPairs drawn on that turn, and moves[turn][player]
+    is the Move made by that player in response.
+    """
+
+    draws: Tuple[Tuple[CardPair, ...], ...]
+    moves: Tuple[Tuple[Move, ...], ...]
+
+    def __post_init__(self) -> None:
+        if len(self.moves) != len(self.draws):
+            raise CorpusFormatError(
+                f"Record has {len(self.draws)} draws but {len(self.moves)} turns of moves."
+            )
+        if self.num_turns > MAX_TURNS:
+            raise CorpusFormatError(f"Record has more than {MAX_TURNS} turns.")
+        if self.num_players > MAX_PLAYERS:
+            raise CorpusFormatError(f"Record has more than {MAX_PLAYERS} players.")
+        if self.num_card_pairs_per_draw > MAX_CARD_PAIRS_PER_DRAW:
+            raise CorpusFormatError(
+                f"Record has more than {MAX_CARD_PAIRS_PER_DRAW} card pairs per draw."
+            )
+
+        for card_pairs, moves in zip(self.draws, self.moves):
+            if len(card_pairs) != self.num_card_pairs_per_draw:
+                raise CorpusFormatError(
+                    "Every draw must have the same number of cards."
+                )
+            if len(moves) != self.num_players:
+                raise CorpusFormatError("Every turn must have a move for every player.")
+            for move in moves:
+                assert_move_encodable(move)
+
+    @property
+    def num_turns(self) -> int:
+        return len(self.draws)
+
+    @property
+    def num_players(self) -> int:
+        return len(self.moves[0]) if self.moves else 0
+
+    @property
+    def num_card_pairs_per_draw(self) -> int:
+        return len(self.draws[0]) if self.draws else 0
+
+
+def turn_size(num_card_pairs_per_draw: int, num_players: int) -> int:
+    """Get the number of bytes used to encode a single turn."""
+    return (
+        num_card_pairs_per_draw * 2 * CARD_STRUCT.size + num_players * MOVE_STRUCT.size
+    )
+
+
+def encode_card(card: CardDefinition) -> bytes:
+    return CARD_STRUCT.pack(card.number, card.action.value)
+
+
+def decode_card(buffer: Buffer, offset: int = 0) -> CardDefinition:
+    number, action_value = CARD_STRUCT.unpack_from(buffer, offset)
+    return CardDefinition(number=number, action=ActionEnum(action_value))
+
+
+def _optional(value: Optional[int]) -> int:
+    return _NOT_USED if value is None else value
+
+
+def _location(location: Optional[Tuple[int, int]]) -> Tuple[int, int]:
+    return (_NOT_USED, _NOT_USED) if location is None else location
+
+
+def assert_move_encodable(move: Move) -> None:
+    """Raise a MoveError if the move has fields that `encode_move` cannot store."""
+    optional_fields = (
+        move.card_pair_index,
+        move.invest_estate_size,
+        *(
+            location[0]
+            for location in (move.fence, move.bis, move.roundabout)
+            if location
+        ),
+    )
+    if any(value is not None and value < 0 for value in optional_fields):
+        raise MoveError("Move has a negative card pair, estate size or street number.")
+
+    if not all(
+        MOVE_FIELD_MIN <= value <= MOVE_FIELD_MAX for value in _move_fields(move)
+    ):
+        raise MoveError("Move has a field too large to be recorded.")
+
+
+def _move_fields(move: Move) -> Tuple[int, ...]:
+    return (
+        _optional(move.card_pair_index),
+        move.street_no,
+        move.plot_no,
+        move.temp_offset,
+        *_location(move.fence),
+        _optional(move.invest_estate_size),
+        *_location(move.bis),
+        *_location(move.roundabout),
+    )
+
+
+def encode_move(move: Move) -> bytes:
+    return MOVE_STRUCT.pack(*_move_fields(move))
+
+
+def decode_move(buffer: Buffer, offset: int = 0) -> Move:
+    (
+        card_pair_index,
+        street_no,
+        plot_no,
+        temp_offset,
+        fence_street,
+        fence_index,
+        invest_estate_size,
+        bis_street,
+        bis_plot,
+        roundabout_street,
+        roundabout_plot,
+    ) = MOVE_STRUCT.unpack_from(buffer, offset)
+    return Move(
+        card_pair_index=None if card_pair_index == _NOT_USED else card_pair_index,
+        street_no=street_no,
+        plot_no=plot_no,
+        temp_offset=temp_offset,
+        fence=None if fence_street == _NOT_USED else (fence_street, fence_index),
+        invest_estate_size=(
+            None if invest_estate_size == _NOT_USED else invest_estate_size
+        ),
+        bis=None if bis_street == _NOT_USED else (bis_street, bis_plot),
+        roundabout=(
+            None
+            if roundabout_street == _NOT_USED
+            else (roundabout_street, roundabout_plot)
+        ),
+    )
+
+
+def encode_turn(card_pairs: Tuple[CardPair, ...], moves: Tuple[Move, ...]) -> bytes:
+    """Encode a turn as the drawn card pairs followed by each player's move."""
+    parts = []
+    for card_pair in card_pairs:
+        parts.append(encode_card(card_pair.number_card))
+        parts.append(encode_card(card_pair.action_card))
+    for move in moves:
+        parts.append(encode_move(move))
+    return b"".join(parts)
+
+
+def decode_turn(
+    buffer: Buffer, offset: int, num_card_pairs_per_draw: int, num_players: int
+) -> Tuple[Tuple[CardPair, ...], Tuple[Move, ...]]:
+    """Decode a single turn that was encoded by `encode_turn`."""
+    card_pairs = []
+    for _ in range(num_card_pairs_per_draw):
+        number_card = decode_card(buffer, offset)
+        action_card = decode_card(buffer, offset + CARD_STRUCT.size)
+        card_pairs.append(CardPair(number_card=number_card, action_card=action_card))
+        offset += 2 * CARD_STRUCT.size
+
+    moves = []
+    for _ in range(num_players):
+        moves.append(decode_move(buffer, offset))
+        offset += MOVE_STRUCT.size
+
+    return tuple(card_pairs), tuple(moves)
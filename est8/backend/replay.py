@@ -0,0 +1,129 @@
+"""
+Replaying recorded games to reconstruct the final Player states.
+
+Records are normally trusted - every move was validated when it was first played - so
+by default moves are written straight into the street state without any validity checks.
+Pass verify=True to replay through the validated Player API instead.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from est8.backend.definitions import ActionEnum, CardPair, GameDefinition
+from est8.backend.house import House
+from est8.backend.move import Move, apply_move, get_house_for_move
+from est8.backend.plans import PlanRace
+from est8.backend.player import Player
+from est8.backend.record import GameRecord
+
+
+def _build_house_unchecked(
+    player: Player, street_no: int, plot_no: int, house: House
+) -> None:
+    """Build a house with the same side effects as Player.place_house, but no checks."""
+    street = player.neighbourhood.streets[street_no]
+
+    if house.is_bis:
+        left_no, right_no = street.get_possible_bis_numbers(plot_no)
+        house.number = left_no if left_no is not None else right_no
+        player.num_biss += 1
+
+    if house.is_roundabout:
+        street.fences[plot_no] = True
+        street.fences[plot_no + 1] = True
+        player.num_roundabouts += 1
+
+    street.houses[plot_no] = house
+
+    if house.has_park and street.num_parks < len(street.definition.park_scoring) - 1:
+        street.num_parks += 1
+    if house.has_pool:
+        player.num_pools += 1
+    if house.built_by_temps:
+        player.num_temp_agencies += 1
+
+
+def apply_move_unchecked(
+    player: Player, card_pairs: Tuple[CardPair, ...], move: Move
+) -> None:
+    """Apply a move that is already known to be valid, skipping all validity checks."""
+    if move.card_pair_index is None:
+        player.num_permit_refusals += 1
+        return
+
+    if move.roundabout is not None:
+        street_no, plot_no = move.roundabout
+        _build_house_unchecked(player, street_no, plot_no, House(is_roundabout=True))
+
+    _build_house_unchecked(
+        player,
+        move.street_no,
+        move.plot_no,
+        get_house_for_move(player.game_definition, card_pairs, move),
+    )
+
+    action = card_pairs[move.card_pair_index].action_card.action
+    if action == ActionEnum.bis and move.bis is not None:
+        street_no, plot_no = move.bis
+        _build_house_unchecked(player, street_no, plot_no, House(is_bis=True))
+    elif action == ActionEnum.fence and move.fence is not None:
+        street_no, fence_index = move.fence
+        player.neighbourhood.streets[street_no].fences[fence_index] = True
+    elif action == ActionEnum.invest and move.invest_estate_size is not None:
+        investments = player.investments
+        investments[move.invest_estate_size] = (
+            investments.get(move.invest_estate_size, 0) + 1
+        )
+
+
+def replay(
+    game_definition: GameDefinition, record: GameRecord, verify: bool = False
+) -> List[Player]:
+    """
+    Replay a recorded game, returning the final state of each player.
+
+    :param verify: If True, every move is checked as it is applied and the relevant
+        Est8Error is raised for the first invalid move.
+    """
+    players = [Player.new(game_definition) for _ in range(record.num_players)]
+    plan_race = PlanRace(players)
+    apply = apply_move if verify else apply_move_unchecked
+
+    for card_pairs, moves in zip(record.draws, record.moves):
+        for player, move in zip(players, moves):
+            apply(player, card_pairs, move)
+        plan_race.end_turn(moves)
+
+    return players
+
+
+def score_players(players: List[Player]) -> Tuple[int, ...]:
+    """Get the score of each player, taking every other player's temps into account."""
+    all_temps = tuple(player.num_temp_agencies for player in players)
+    return tuple(
+        player.get_score(all_temps[:index] + all_temps[index + 1 :])
+        for index, player in enumerate(players)
+    )
+
+
+def score_breakdowns(players: List[Player]) -> Tuple[Dict[str, int], ...]:
+    """Get each player's score in each category, as from `score_players`."""
+    all_temps = tuple(player.num_temp_agencies for player in players)
+    return tuple(
+        player.get_score_breakdown(all_temps[:index] + all_temps[index + 1 :])
+        for index, player in enumerate(players)
+    )
+
+
+def rescore(
+    game_definition: GameDefinition,
+    records: Iterable[GameRecord],
+    verify: bool = False,
+) -> Iterator[Tuple[int, ...]]:
+    """
+    Replay each record and yield the scores of its players under game_definition.
+
+    This is the way to evaluate a historical corpus under a new ScoringDefinition:
+    use `dataclasses.replace(game_definition, scoring=new_scoring)`.
+    """
+    for record in records:
+        yield score_players(replay(game_definition, record, verify=verify))
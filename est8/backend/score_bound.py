@@ -0,0 +1,150 @@
+"""
+An optimistic upper bound on the final score a player can reach from their current state.
+
+The bound never underestimates, so a search can discard any branch whose bound is no
+better than a score it has already found. Each score category is bounded separately:
+ - bis, pools, roundabouts and permit refusals by the best score reachable by changing
+   their count by no more than the number of empty plots allows,
+ - parks by building a park on every empty plot of the street,
+ - temp agencies by first place on the podium,
+ - investments by the best fence partition of each street once every plot is built,
+   with every estate size at its most valuable remaining investment level,
+ - plans by the most points of every plan not yet completed.
+
+Streets are re-bounded only when a move changes them.
+"""
+
+from copy import copy
+from typing import Dict, List, Sequence
+
+from est8.backend.fence_solver import plan_street_fences
+from est8.backend.move import Move
+from est8.backend.plans import streets_changed_by_move
+from est8.backend.player import Player
+
+
+def best_score_in_range(scores: Sequence[int], start: int, stop: int) -> int:
+    """Get the best score for any count in [start, stop], clamped to the score table."""
+    last = len(scores) - 1
+    return max(scores[min(count, last)] for count in range(start, max(start, stop) + 1))
+
+
+class ScoreBound:
+    """Upper bound on a player's final score, kept up to date as moves are made."""
+
+    def __init__(self, player: Player):
+        self.player: Player = player
+        num_streets = len(player.neighbourhood.streets)
+        self._empty_plots: List[int] = [0] * num_streets
+        self._empty_pool_plots: List[int] = [0] * num_streets
+        self._parks: List[int] = [0] * num_streets
+        self._investments: List[int] = [0] * num_streets
+        self._estate_values: Dict[int, int] = {}
+        self._investments_seen: Dict[int, int] = {}
+        self._update_estate_values()
+        for street_no in range(num_streets):
+            self.street_changed(street_no)
+
+    def copy(self, player: Player) -> "ScoreBound":
+        """
+        Copy the bound for a copy of its player, without re-bounding every street.
+
+        The player must be in the same state as this bound's player.
+        """
+        other = copy(self)
+        other.player = player
+        other._empty_plots = list(self._empty_plots)
+        other._empty_pool_plots = list(self._empty_pool_plots)
+        other._parks = list(self._parks)
+        other._investments = list(self._investments)
+        return other
+
+    def _update_estate_values(self) -> None:
+        invest = self.player.game_definition.scoring.invest
+        self._investments_seen = dict(self.player.investments)
+        self._estate_values = {
+            estate_size: max(
+                values[
+                    min(self._investments_seen.get(estate_size, 0), len(values) - 1) :
+                ]
+            )
+            for estate_size, values in invest.map.items()
+        }
+
+    def street_changed(self, street_no: int) -> None:
+        street = self.player.neighbourhood.streets[street_no]
+        definition = street.definition
+        empty_plots = [
+            plot_no for plot_no, house in enumerate(street.houses) if house is None
+        ]
+        self._empty_plots[street_no] = len(empty_plots)
+        self._empty_pool_plots[street_no] = sum(
+            1 for plot_no in empty_plots if definition.can_have_pool_at(plot_no)
+        )
+        self._parks[street_no] = best_score_in_range(
+            definition.park_scoring,
+            street.num_parks,
+            street.num_parks + len(empty_plots),
+        )
+        self._investments[street_no] = plan_street_fences(
+            street, self._estate_values, assume_all_built=True
+        ).value
+
+    def update(self, move: Move) -> None:
+        """Bring the bound up to date after the move has been applied to the player."""
+        if self.player.investments != self._investments_seen:
+            self._update_estate_values()
+            for street_no in range(len(self._investments)):
+                self.street_changed(street_no)
+        else:
+            for street_no in streets_changed_by_move(move):
+                self.street_changed(street_no)
+
+    def breakdown(self) -> Dict[str, int]:
+        """Get the bound on each score category, keyed as Player.get_score_breakdown."""
+        player = self.player
+        game_definition = player.game_definition
+        scoring = game_definition.scoring
+        empty_plots = sum(self._empty_plots)
+
+        max_roundabouts = min(
+            game_definition.max_roundabouts, player.num_roundabouts + empty_plots
+        )
+        if player.num_temp_agencies > 0 or empty_plots > 0:
+            temp_agencies = max(scoring.temp_agency + (0,))
+        else:
+            temp_agencies = 0
+
+        return {
+            "bis": best_score_in_range(
+                scoring.bis, player.num_biss, player.num_biss + empty_plots
+            ),
+            "investments": sum(self._investments),
+            "pools": best_score_in_range(
+                scoring.pool,
+                player.num_pools,
+                player.num_pools + sum(self._empty_pool_plots),
+            ),
+            "roundabouts": best_score_in_range(
+                scoring.roundabout, player.num_roundabouts, max_roundabouts
+            ),
+            "temp_agencies": temp_agencies,
+            "permit_refusals": best_score_in_range(
+                scoring.permit_refusal,
+                player.num_permit_refusals,
+                len(scoring.permit_refusal) - 1,
+            ),
+            "parks": sum(self._parks),
+            "plans": sum(
+                (
+                    points
+                    if points is not None
+                    else (max(plan.points) if plan.estates else 0)
+                )
+                for points, plan in zip(player.plans_completed, game_definition.plans)
+            ),
+        }
+
+    @property
+    def value(self) -> int:
+        return sum(self.breakdown().values())
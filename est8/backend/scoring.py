@@ -4,4 +4,9 @@ from .player import Player
 
 
 def get_score_for_player(player: Player) -> int:
-    pass
+    """
+    Get a player's score, ignoring other players' temp agencies.
+
+    Plans only count once they have been awarded, e.g. by a PlanRace.
+    """
+    return player.get_score()
@@ -0,0 +1,244 @@
+"""
+Compact differences between successive states of a Player.
+
+Rather than sending a Player's whole neighbourhood after every turn, a StateDelta holds
+only what changed: newly built houses, new fences, counter and investment increments,
+newly completed plans and the change in each score category. Applying each delta in turn to a mirror of the
+player keeps it in sync with the original.
+"""
+
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from est8.backend.definitions import GameDefinition
+from est8.backend.house import House
+from est8.backend.player import Player
+from est8.backend.temp_ranking import TempAgencyRanking
+
+# Player counters that are included in deltas.
+COUNTERS = (
+    "num_biss",
+    "num_permit_refusals",
+    "num_pools",
+    "num_roundabouts",
+    "num_temp_agencies",
+)
+
+
+@dataclass(frozen=True)
+class StateDelta:
+    """
+    Everything that changed about a player between two snapshots.
+
+    Each field holds only the entries that changed:
+     - houses: (street_no, plot_no, house) for each newly built house.
+     - fences: (street_no, fence_index) for each newly built fence.
+     - parks: (street_no, increase in parks built).
+     - counters: (counter name, increase).
+     - investments: (estate size, increase in investment).
+     - plans: (plan index, points scored) for each newly completed plan.
+     - score: (score category, change in score).
+    """
+
+    houses: Tuple[Tuple[int, int, House], ...] = ()
+    fences: Tuple[Tuple[int, int], ...] = ()
+    parks: Tuple[Tuple[int, int], ...] = ()
+    counters: Tuple[Tuple[str, int], ...] = ()
+    investments: Tuple[Tuple[int, int], ...] = ()
+    plans: Tuple[Tuple[int, int], ...] = ()
+    score: Tuple[Tuple[str, int], ...] = ()
+
+    @property
+    def is_empty(self) -> bool:
+        return not any(
+            (
+                self.houses,
+                self.fences,
+                self.parks,
+                self.counters,
+                self.investments,
+                self.plans,
+                self.score,
+            )
+        )
+
+
+@dataclass(frozen=True)
+class PlayerSnapshot:
+    """The parts of a Player's state at one point in time that deltas are made from."""
+
+    houses: Tuple[Tuple[Optional[House], ...], ...]
+    fences: Tuple[Tuple[bool, ...], ...]
+    parks: Tuple[int, ...]
+    counters: Tuple[int, ...]
+    investments: Tuple[Tuple[int, int], ...]
+    plans: Tuple[Optional[int], ...]
+    score: Tuple[Tuple[str, int], ...]
+
+    @classmethod
+    def take(
+        cls,
+        player: Player,
+        other_player_temps: Tuple[int, ...] = (),
+        temp_agency_score: Optional[int] = None,
+    ) -> "PlayerSnapshot":
+        # Houses are never modified once built, so they don't need copying.
+        streets = player.neighbourhood.streets
+        return cls(
+            houses=tuple(tuple(street.houses) for street in streets),
+            fences=tuple(tuple(street.fences) for street in streets),
+            parks=tuple(street.num_parks for street in streets),
+            counters=tuple(getattr(player, counter) for counter in COUNTERS),
+            investments=tuple(player.investments.items()),
+            plans=tuple(player.plans_completed),
+            score=tuple(
+                player.get_score_breakdown(
+                    other_player_temps, temp_agency_score
+                ).items()
+            ),
+        )
+
+
+Key = TypeVar("Key")
+
+
+def _changes(
+    before: Sequence[Tuple[Key, int]], after: Sequence[Tuple[Key, int]]
+) -> Tuple[Tuple[Key, int], ...]:
+    """Get the (key, change) of every key whose value changed."""
+    before_values = dict(before)
+    return tuple(
+        (key, value - before_values.get(key, 0))
+        for key, value in after
+        if value != before_values.get(key, 0)
+    )
+
+
+def diff_snapshots(before: PlayerSnapshot, after: PlayerSnapshot) -> StateDelta:
+    """Get the delta that turns the before state into the after state."""
+    houses: List[Tuple[int, int, House]] = []
+    fences: List[Tuple[int, int]] = []
+    for street_no, (houses_before, houses_after) in enumerate(
+        zip(before.houses, after.houses)
+    ):
+        for plot_no, (house_before, house_after) in enumerate(
+            zip(houses_before, houses_after)
+        ):
+            if house_after is not None and house_after is not house_before:
+                houses.append((street_no, plot_no, house_after))
+
+        for fence_index, (fence_before, fence_after) in enumerate(
+            zip(before.fences[street_no], after.fences[street_no])
+        ):
+            if fence_after and not fence_before:
+                fences.append((street_no, fence_index))
+
+    return StateDelta(
+        houses=tuple(houses),
+        fences=tuple(fences),
+        parks=_changes(list(enumerate(before.parks)), list(enumerate(after.parks))),
+        counters=_changes(
+            list(zip(COUNTERS, before.counters)), list(zip(COUNTERS, after.counters))
+        ),
+        investments=_changes(before.investments, after.investments),
+        plans=tuple(
+            (plan_index, points)
+            for plan_index, (points_before, points) in enumerate(
+                zip(before.plans, after.plans)
+            )
+            if points is not None and points_before is None
+        ),
+        score=_changes(before.score, after.score),
+    )
+
+
+class DeltaTracker:
+    """
+    Produces a StateDelta for each player in a game every time `emit()` is called.
+
+    Score deltas take into account every other tracked player's temp agencies. Pass the
+    game's TempAgencyRanking, and `set_temp_agency_score` as its on_score_change
+    callback, so that temp agency scores are only updated for the players whose podium
+    position changed rather than re-ranked for every player on each emit.
+    """
+
+    def __init__(
+        self, players: List[Player], temp_ranking: Optional[TempAgencyRanking] = None
+    ):
+        self.players: List[Player] = players
+        self._temp_scores: Optional[List[int]] = (
+            None
+            if temp_ranking is None
+            else [temp_ranking.score(index) for index in range(len(players))]
+        )
+        self._snapshots: List[PlayerSnapshot] = self._take_snapshots()
+
+    def set_temp_agency_score(self, player_no: int, score: int) -> None:
+        """Record a player's new temp agency score, as pushed by a TempAgencyRanking."""
+        if self._temp_scores is not None:
+            self._temp_scores[player_no] = score
+
+    def _take_snapshots(self) -> List[PlayerSnapshot]:
+        if self._temp_scores is not None:
+            temp_scores = self._temp_scores
+            return [
+                PlayerSnapshot.take(player, temp_agency_score=temp_scores[index])
+                for index, player in enumerate(self.players)
+            ]
+
+        all_temps = tuple(player.num_temp_agencies for player in self.players)
+        return [
+            PlayerSnapshot.take(player, all_temps[:index] + all_temps[index + 1 :])
+            for index, player in enumerate(self.players)
+        ]
+
+    def emit(self) -> Tuple[StateDelta, ...]:
+        """Get each player's delta since the last time this was called."""
+        snapshots = self._take_snapshots()
+        deltas = tuple(
+            diff_snapshots(before, after)
+            for before, after in zip(self._snapshots, snapshots)
+        )
+        self._snapshots = snapshots
+        return deltas
+
+
+class PlayerMirror:
+    """
+    A copy of a Player kept in sync by applying StateDeltas, as a client would.
+
+    The mirrored score breakdown is kept from the deltas, so the mirror never has to
+    compute scores itself.
+    """
+
+    def __init__(self, game_definition: GameDefinition):
+        self.player: Player = Player.new(game_definition)
+        self.score_breakdown: Dict[str, int] = self.player.get_score_breakdown(())
+
+    @property
+    def score(self) -> int:
+        return sum(self.score_breakdown.values())
+
+    def apply(self, delta: StateDelta) -> None:
+        player = self.player
+        streets = player.neighbourhood.streets
+
+        for street_no, plot_no, house in delta.houses:
+            # Copy so that the mirror never shares state with the original.
+            streets[street_no].houses[plot_no] = replace(house)
+        for street_no, fence_index in delta.fences:
+            streets[street_no].fences[fence_index] = True
+        for street_no, increase in delta.parks:
+            streets[street_no].num_parks += increase
+        for counter, increase in delta.counters:
+            setattr(player, counter, getattr(player, counter) + increase)
+        for estate_size, increase in delta.investments:
+            player.investments[estate_size] = (
+                player.investments.get(estate_size, 0) + increase
+            )
+        for plan_index, points in delta.plans:
+            player.plans_completed[plan_index] = points
+        for category, change in delta.score:
+            self.score_breakdown[category] = (
+                self.score_breakdown.get(category, 0) + change
+            )
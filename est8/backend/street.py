@@ -200,14 +200,14 @@ class Street:
         """Return True if there is a fence to the right of the given plot_no, otherwise False."""
         return self.fences[plot_no + 1]
 
-    def get_complete_estates(self) -> List[int]:
+    def get_complete_estate_spans(self) -> List[Tuple[int, int]]:
         """
-        Get the estate sizes in this street.
+        Get the (start, end) plot numbers of each complete estate in this street.
 
         A complete estate is bounded by fences on either side and every house in between
-        has been built.
+        has been built. The estate covers plots start to end - 1.
         """
-        estates: List[int] = []
+        spans: List[Tuple[int, int]] = []
 
         fence_indices = [
             fence_index
@@ -221,8 +221,17 @@ class Street:
                     for house in self.houses[start:end]
                 )
             ):
-                estates.append(end - start)
-        return estates
+                spans.append((start, end))
+        return spans
+
+    def get_complete_estates(self) -> List[int]:
+        """
+        Get the estate sizes in this street.
+
+        A complete estate is bounded by fences on either side and every house in between
+        has been built.
+        """
+        return [end - start for start, end in self.get_complete_estate_spans()]
 
     def get_park_score(self) -> int:
         return self.definition.park_score(self.num_parks)
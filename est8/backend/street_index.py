@@ -0,0 +1,226 @@
+"""
+Incrementally maintained summary of a Street for answering placement queries quickly.
+
+A Street answers "can this number go in this plot?" by scanning the whole street. The
+StreetIndex instead keeps, for every plot, the exclusive bounds that a house number
+placed there must lie between. The bounds are updated as houses are built so that each
+query is O(1).
+
+Every plot in a run of empty plots shares the same bounds, so whether a number fits
+anywhere in the street is answered from a summary of the open intervals of those runs.
+The summary is rebuilt at most once per change to the street.
+"""
+
+from bisect import bisect_left
+from copy import copy
+from typing import List, Optional, Tuple
+
+from est8.backend.definitions import StreetDefinition
+from est8.backend.street import Street
+
+# Bounds used when there is no house constraining a plot. These match the checks made by
+# Street.assert_place_house_is_valid, including numbering resetting to above 0 after a
+# roundabout.
+NO_LOWER_BOUND = -1
+ROUNDABOUT_LOWER_BOUND = 0
+NO_UPPER_BOUND = 99999
+
+
+class StreetIndex:
+    """Placement bounds for every plot of a single street."""
+
+    def __init__(self, definition: StreetDefinition):
+        self.definition: StreetDefinition = definition
+        num_houses = definition.num_houses
+
+        # House number in each plot, or None if empty or a roundabout.
+        self.numbers: List[Optional[int]] = [None] * num_houses
+        self.is_built: List[bool] = [False] * num_houses
+        self.is_roundabout: List[bool] = [False] * num_houses
+
+        # Indexed in the same way as Street.fences.
+        self.fences: List[bool] = [True] + [False] * (num_houses - 1) + [True]
+
+        # A number n can be placed in plot p if lower[p] < n < upper[p].
+        self.lower: List[int] = [NO_LOWER_BOUND] * num_houses
+        self.upper: List[int] = [NO_UPPER_BOUND] * num_houses
+
+        # Free interval summaries, or None if they need rebuilding.
+        self._free_intervals: Optional[List[Tuple[int, int]]] = None
+        self._roundabout_intervals: Optional[List[Tuple[int, int]]] = None
+
+    @classmethod
+    def from_street(cls, street: Street) -> "StreetIndex":
+        """Build an index describing the current state of the given street."""
+        index = cls(street.definition)
+        for plot_no, house in enumerate(street.houses):
+            if house is None:
+                continue
+            if house.is_roundabout:
+                index.place_roundabout(plot_no)
+            elif house.number is not None:
+                index.place_number(plot_no, house.number)
+        index.fences = list(street.fences)
+        return index
+
+    def copy(self) -> "StreetIndex":
+        other = copy(self)
+        other.numbers = list(self.numbers)
+        other.is_built = list(self.is_built)
+        other.is_roundabout = list(self.is_roundabout)
+        other.fences = list(self.fences)
+        other.lower = list(self.lower)
+        other.upper = list(self.upper)
+        # The summaries are never modified in place, so can be shared until rebuilt.
+        return other
+
+    @property
+    def num_houses(self) -> int:
+        return self.definition.num_houses
+
+    def is_valid_plot(self, plot_no: int) -> bool:
+        return 0 <= plot_no < self.definition.num_houses
+
+    def can_place_number(self, plot_no: int, number: int) -> bool:
+        """Return True if a house with the given number can be built at plot_no."""
+        return (
+            self.is_valid_plot(plot_no)
+            and not self.is_built[plot_no]
+            and self.lower[plot_no] < number < self.upper[plot_no]
+        )
+
+    def get_bis_number(self, plot_no: int) -> Optional[int]:
+        """
+        Get the number a bis would take if built at plot_no, or None if it cannot be built.
+
+        As with Street.place_house, the house to the left takes priority.
+        """
+        if not self.is_valid_plot(plot_no) or self.is_built[plot_no]:
+            return None
+        if plot_no > 0 and not self.fences[plot_no]:
+            left_no = self.numbers[plot_no - 1]
+            if left_no is not None:
+                return left_no
+        if plot_no < self.num_houses - 1 and not self.fences[plot_no + 1]:
+            return self.numbers[plot_no + 1]
+        return None
+
+    def get_empty_runs(self) -> List[Tuple[int, int, int]]:
+        """Get (lower bound, upper bound, length) of each run of adjacent empty plots."""
+        runs = []
+        run_length = 0
+        for plot_no in range(self.num_houses):
+            if not self.is_built[plot_no]:
+                run_length += 1
+            if run_length and (
+                plot_no == self.num_houses - 1 or self.is_built[plot_no + 1]
+            ):
+                runs.append((self.lower[plot_no], self.upper[plot_no], run_length))
+                run_length = 0
+        return runs
+
+    @staticmethod
+    def _merge_intervals(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Merge open intervals of integers into sorted, disjoint ones."""
+        merged: List[Tuple[int, int]] = []
+        for lower, upper in sorted(intervals):
+            if upper - lower < 2:
+                # No integer lies strictly between the bounds.
+                continue
+            if merged and lower < merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], upper))
+            else:
+                merged.append((lower, upper))
+        return merged
+
+    def _build_summaries(
+        self,
+    ) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+        runs = self.get_empty_runs()
+        self._free_intervals = self._merge_intervals(
+            [(lower, upper) for lower, upper, _ in runs]
+        )
+
+        # A roundabout built at one end of a run resets the bounds for the rest of the
+        # run. It can't help plots in other runs, as their nearest house still bounds
+        # them.
+        with_roundabouts = [(lower, upper) for lower, upper, _ in runs]
+        for lower, upper, length in runs:
+            if length > 1:
+                with_roundabouts.append((ROUNDABOUT_LOWER_BOUND, upper))
+                with_roundabouts.append((lower, NO_UPPER_BOUND))
+        self._roundabout_intervals = self._merge_intervals(with_roundabouts)
+        return self._free_intervals, self._roundabout_intervals
+
+    @staticmethod
+    def _intervals_contain(intervals: List[Tuple[int, int]], number: int) -> bool:
+        index = bisect_left(intervals, (number, NO_LOWER_BOUND)) - 1
+        return index >= 0 and number < intervals[index][1]
+
+    def can_place_number_anywhere(
+        self, number: int, allow_roundabout: bool = False
+    ) -> bool:
+        """
+        Return True if a house with the given number can be built in any plot.
+
+        :param allow_roundabout: Also allow building a roundabout in the street first.
+        """
+        free, with_roundabouts = self._free_intervals, self._roundabout_intervals
+        if free is None or with_roundabouts is None:
+            free, with_roundabouts = self._build_summaries()
+        return self._intervals_contain(
+            with_roundabouts if allow_roundabout else free, number
+        )
+
+    def can_place_roundabout(self, plot_no: int) -> bool:
+        return self.is_valid_plot(plot_no) and not self.is_built[plot_no]
+
+    def can_place_fence(self, fence_index: int) -> bool:
+        return 0 <= fence_index < len(self.fences) and not self.fences[fence_index]
+
+    def place_number(self, plot_no: int, number: int) -> None:
+        """Record a house (or bis) with the given number being built at plot_no."""
+        self.numbers[plot_no] = number
+        self.is_built[plot_no] = True
+        self._free_intervals = self._roundabout_intervals = None
+
+        # Tighten bounds of plots either side, up to the nearest roundabouts.
+        for other in range(plot_no + 1, self.num_houses):
+            if self.is_roundabout[other]:
+                break
+            if number > self.lower[other]:
+                self.lower[other] = number
+        for other in range(plot_no - 1, -1, -1):
+            if self.is_roundabout[other]:
+                break
+            if number < self.upper[other]:
+                self.upper[other] = number
+
+    def place_roundabout(self, plot_no: int) -> None:
+        """Record a roundabout being built at plot_no, along with its fences."""
+        self.is_built[plot_no] = True
+        self.is_roundabout[plot_no] = True
+        self._free_intervals = self._roundabout_intervals = None
+        self.fences[plot_no] = True
+        self.fences[plot_no + 1] = True
+
+        # The roundabout resets the numbering either side, so recompute those bounds.
+        highest = ROUNDABOUT_LOWER_BOUND
+        for other in range(plot_no + 1, self.num_houses):
+            if self.is_roundabout[other]:
+                break
+            self.lower[other] = highest
+            number = self.numbers[other]
+            if number is not None and number > highest:
+                highest = number
+        lowest = NO_UPPER_BOUND
+        for other in range(plot_no - 1, -1, -1):
+            if self.is_roundabout[other]:
+                break
+            self.upper[other] = lowest
+            number = self.numbers[other]
+            if number is not None and number < lowest:
+                lowest = number
+
+    def place_fence(self, fence_index: int) -> None:
+        self.fences[fence_index] = True
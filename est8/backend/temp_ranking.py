@@ -0,0 +1,154 @@
+"""
+Incrementally maintained temp agency podium positions for every player in a game.
+
+ScoringDefinition.temp_agency_score sorts every player's temps on each call. In games
+with many players, the TempAgencyRanking instead keeps a Fenwick tree over the distinct
+numbers of temps used. A player's podium position is the number of distinct temp counts
+greater than their own, which the tree answers in O(log n).
+
+When a player's temps change, only the players whose podium position actually changed
+are notified of their new score.
+"""
+
+from typing import Callable, Dict, List, Optional, Set
+
+from est8.backend.definitions import GameDefinition
+
+
+class _FenwickTree:
+    """Prefix sums over a fixed number of integer slots, with O(log n) updates."""
+
+    def __init__(self, size: int):
+        self._tree: List[int] = [0] * (size + 1)
+
+    @property
+    def size(self) -> int:
+        return len(self._tree) - 1
+
+    def add(self, index: int, value: int) -> None:
+        index += 1
+        while index < len(self._tree):
+            self._tree[index] += value
+            index += index & -index
+
+    def prefix_sum(self, end: int) -> int:
+        """Get the sum of slots [0, end)."""
+        total = 0
+        index = min(end, self.size)
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+
+class TempAgencyRanking:
+    """
+    Podium positions for the temp agencies used by each player in a game.
+
+    Players who have used no temps are not ranked and cannot score.
+
+    :param on_score_change: Called with (player_no, new temp agency score) for each
+        player whose podium position changes.
+    """
+
+    def __init__(
+        self,
+        game_definition: GameDefinition,
+        num_players: int,
+        on_score_change: Optional[Callable[[int, int], None]] = None,
+    ):
+        self.podium_scores = game_definition.scoring.temp_agency
+        self.on_score_change = on_score_change
+
+        # Nobody can use more temps than there are plots to build on.
+        max_temps = sum(
+            street.num_houses for street in game_definition.neighbourhood.streets
+        )
+        self._distinct_temps = _FenwickTree(max_temps + 1)
+        self._players_by_temps: Dict[int, Set[int]] = {}
+        self._temps: List[int] = [0] * num_players
+
+    def _grow(self, num_temps: int) -> None:
+        """Make room in the tree for a number of temps larger than expected."""
+        old_tree = self._distinct_temps
+        self._distinct_temps = _FenwickTree(max(num_temps + 1, 2 * old_tree.size))
+        for temps in self._players_by_temps:
+            self._distinct_temps.add(temps, 1)
+
+    def temps(self, player_no: int) -> int:
+        return self._temps[player_no]
+
+    def podium_position(self, player_no: int) -> Optional[int]:
+        """Get the player's podium position (0 is first), or None if they are unranked."""
+        temps = self._temps[player_no]
+        if temps == 0:
+            return None
+        return len(self._players_by_temps) - self._distinct_temps.prefix_sum(temps + 1)
+
+    def score(self, player_no: int) -> int:
+        """Get the player's temp agency score, as ScoringDefinition.temp_agency_score."""
+        position = self.podium_position(player_no)
+        if position is None or position >= len(self.podium_scores):
+            return 0
+        return self.podium_scores[position]
+
+    def _add(self, player_no: int, temps: int) -> bool:
+        """Rank the player at the given temps, returning True if that count is new."""
+        players = self._players_by_temps.get(temps)
+        appeared = players is None
+        if players is None:
+            if temps >= self._distinct_temps.size:
+                self._grow(temps)
+            players = self._players_by_temps[temps] = set()
+            self._distinct_temps.add(temps, 1)
+        players.add(player_no)
+        return appeared
+
+    def _remove(self, player_no: int, temps: int) -> bool:
+        """Unrank the player, returning True if nobody else had the same temps."""
+        players = self._players_by_temps[temps]
+        players.discard(player_no)
+        if players:
+            return False
+        del self._players_by_temps[temps]
+        self._distinct_temps.add(temps, -1)
+        return True
+
+    def set_temps(self, player_no: int, temps: int) -> List[int]:
+        """
+        Record the number of temps a player has used.
+
+        :return: The players whose podium position changed, which may include this player.
+        """
+        old_temps = self._temps[player_no]
+        if temps == old_temps:
+            return []
+
+        old_position = self.podium_position(player_no)
+        vanished = old_temps > 0 and self._remove(player_no, old_temps)
+        appeared = temps > 0 and self._add(player_no, temps)
+        self._temps[player_no] = temps
+
+        # Other players only move if a distinct count above them appeared or vanished.
+        # If both happened, only those between the two counts see a net change.
+        if appeared and vanished:
+            moved_counts = range(min(temps, old_temps), max(temps, old_temps))
+        elif appeared:
+            moved_counts = range(1, temps)
+        elif vanished:
+            moved_counts = range(1, old_temps)
+        else:
+            moved_counts = range(0)
+
+        changed: Set[int] = set()
+        for other_temps in moved_counts:
+            changed.update(self._players_by_temps.get(other_temps, ()))
+        changed.discard(player_no)
+        if self.podium_position(player_no) != old_position:
+            changed.add(player_no)
+
+        changed_players = sorted(changed)
+        if self.on_score_change is not None:
+            for changed_player in changed_players:
+                self.on_score_change(changed_player, self.score(changed_player))
+        return changed_players
@@ -0,0 +1,150 @@
+"""
+Validation of a whole game transcript submitted by a client.
+
+A transcript is the sequence of card pairs drawn and the moves one player made in
+response. The transcript is checked in a single pass using StreetIndexes, which are
+updated incrementally as each move is applied, rather than by building a Player.
+"""
+
+from copy import copy
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from est8.backend.errors import (
+    BisPlacementError,
+    Est8Error,
+    FencePlacementError,
+    HousePlacementError,
+    InvestmentError,
+    MoveError,
+    RoundaboutPlacementError,
+)
+from est8.backend.definitions import CardPair, GameDefinition
+from est8.backend.move import Move, assert_move_matches_cards
+from est8.backend.street_index import StreetIndex
+
+
+@dataclass(frozen=True)
+class TranscriptViolation:
+    """The first invalid move in a transcript, and why it was invalid."""
+
+    turn_index: int
+    error: Est8Error
+
+
+class MoveValidator:
+    """
+    State of a single player's game, holding only what is needed to check moves.
+
+    Moves are applied to the validator as they are checked. Check a move against a
+    `copy()` to find out whether it is valid without committing to it.
+    """
+
+    def __init__(self, game_definition: GameDefinition):
+        self.game_definition = game_definition
+        self.streets: List[StreetIndex] = [
+            StreetIndex(street_definition)
+            for street_definition in game_definition.neighbourhood.streets
+        ]
+        self.investments: Dict[int, int] = {
+            estate_size: 0 for estate_size in game_definition.scoring.invest.map.keys()
+        }
+        self.num_roundabouts = 0
+
+    def copy(self) -> "MoveValidator":
+        other = copy(self)
+        other.streets = [street.copy() for street in self.streets]
+        other.investments = dict(self.investments)
+        return other
+
+    def _get_street(
+        self, street_no: int, error_type: type = HousePlacementError
+    ) -> StreetIndex:
+        if street_no < 0 or street_no >= len(self.streets):
+            raise error_type("Street number is not valid.")
+        return self.streets[street_no]
+
+    def check_and_apply(self, card_pairs: Tuple[CardPair, ...], move: Move) -> None:
+        """Raise the relevant Est8Error if the move is invalid, otherwise apply it."""
+        if move.card_pair_index is None:
+            return
+
+        assert_move_matches_cards(self.game_definition, card_pairs, move)
+
+        if move.roundabout is not None:
+            if self.num_roundabouts >= self.game_definition.max_roundabouts:
+                raise RoundaboutPlacementError(
+                    "Maximum number of roundabouts have been placed."
+                )
+            street_no, plot_no = move.roundabout
+            street = self._get_street(street_no)
+            if not street.can_place_roundabout(plot_no):
+                raise RoundaboutPlacementError("Cannot place roundabout here.")
+            street.place_roundabout(plot_no)
+            self.num_roundabouts += 1
+
+        number = card_pairs[move.card_pair_index].number_card.number + move.temp_offset
+        street = self._get_street(move.street_no)
+        if not street.can_place_number(move.plot_no, number):
+            raise HousePlacementError(
+                f"Cannot place house {number} at plot {move.plot_no}."
+            )
+        street.place_number(move.plot_no, number)
+
+        if move.bis is not None:
+            street_no, plot_no = move.bis
+            street = self._get_street(street_no)
+            bis_number = street.get_bis_number(plot_no)
+            if bis_number is None:
+                raise BisPlacementError(
+                    "A Bis must be placed next to a house with no fence between them."
+                )
+            street.place_number(plot_no, bis_number)
+
+        if move.fence is not None:
+            street_no, fence_index = move.fence
+            street = self._get_street(street_no, FencePlacementError)
+            if not street.can_place_fence(fence_index):
+                raise FencePlacementError("Cannot place fence here.")
+            street.place_fence(fence_index)
+
+        if move.invest_estate_size is not None:
+            estate_size = move.invest_estate_size
+            if estate_size not in self.investments:
+                raise InvestmentError(
+                    f"Cannot invest in estates of size {estate_size}."
+                )
+            if self.investments[
+                estate_size
+            ] >= self.game_definition.max_investments_in_estate_size(estate_size):
+                raise InvestmentError(
+                    f"Already fully invested in estates of size {estate_size}."
+                )
+            self.investments[estate_size] += 1
+
+
+def validate_transcript(
+    game_definition: GameDefinition,
+    draws: Sequence[Tuple[CardPair, ...]],
+    moves: Sequence[Move],
+) -> Optional[TranscriptViolation]:
+    """
+    Check that every move in a single player's transcript is valid.
+
+    :param draws: The card pairs drawn on each turn.
+    :param moves: The move the player made on each turn.
+    :return: The first violation found, or None if the whole transcript is valid.
+    """
+    validator = MoveValidator(game_definition)
+
+    for turn_index, move in enumerate(moves):
+        if turn_index >= len(draws):
+            return TranscriptViolation(
+                turn_index, MoveError("No cards were drawn for this turn.")
+            )
+        try:
+            validator.check_and_apply(draws[turn_index], move)
+        except Est8Error as error:
+            return TranscriptViolation(turn_index, error)
+
+    return None
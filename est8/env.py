@@ -0,0 +1,204 @@
+"""
+Many single player games stepped together, for training agents with reinforcement learning.
+
+Observations, action masks, rewards, done flags and final scores are written in place
+into arrays that are allocated once, so `reset` and `step` always return the same
+arrays. Everything else is worked out afresh on each step: the legal moves of each game
+are found again, and the reward comes from scoring the whole player again.
+
+Observations are float32 rows of the player's state as encoded by `encode_player`,
+followed by, for each card pair drawn, the number and a one-hot encoding of the action.
+
+An action chooses the card pair, the plot to build on and the temp agency offset:
+((card_pair_index * number of plots) + plot) * number of offsets + offset index, where
+plots are numbered through every street in turn. The last action is a permit refusal.
+Any fence, investment or bis that goes with the house is chosen by a GreedyPolicy.
+Roundabouts are never built.
+
+The reward for each step is the change in the player's final score, so the rewards of a
+game add up to its score. When a game finishes it is replaced by a new one straight
+away, so the observation returned is the first of the new game. The score of the
+finished game is kept in `final_scores`.
+"""
+
+from random import Random
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from est8.analysis.oracle import get_final_score
+from est8.backend.definitions import ActionEnum, CardPair, GameDefinition
+from est8.backend.encoding import encode_player, get_encoding_size
+from est8.backend.errors import MoveError
+from est8.backend.game import player_has_finished
+from est8.backend.legal_moves import generate_legal_moves
+from est8.backend.move import Move
+from est8.backend.player import Player
+from est8.backend.policies import GreedyPolicy, get_planned_fences
+from est8.backend.replay import apply_move_unchecked
+from est8.backend.transcript import MoveValidator
+
+ACTIONS = tuple(ActionEnum)
+
+
+class VectorEnv:
+    """
+    A number of independent games, with observations written to shared arrays.
+
+    Only the arrays of observations, action masks, rewards, done flags and final scores
+    are reused between steps; legal moves and scores are recomputed on every step.
+    """
+
+    def __init__(
+        self, game_definition: GameDefinition, num_envs: int, seed: Optional[int] = None
+    ):
+        self.game_definition = game_definition
+        self.num_envs = num_envs
+        streets = game_definition.neighbourhood.streets
+        num_card_pairs = game_definition.num_cards_drawn_at_once
+
+        self._plot_starts: List[int] = []
+        num_plots = 0
+        for street in streets:
+            self._plot_starts.append(num_plots)
+            num_plots += street.num_houses
+        self.num_plots = num_plots
+        self.num_offsets = 2 * game_definition.max_temp_agency_offset + 1
+        self.num_actions = num_card_pairs * num_plots * self.num_offsets + 1
+        self.permit_refusal_action = self.num_actions - 1
+
+        self._player_size = get_encoding_size(game_definition)
+        self.num_features = self._player_size + num_card_pairs * (1 + len(ACTIONS))
+
+        self.observations = np.zeros((num_envs, self.num_features), dtype=np.float32)
+        self.action_masks = np.zeros((num_envs, self.num_actions), dtype=bool)
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self.final_scores = np.zeros(num_envs, dtype=np.float32)
+
+        rng = Random(seed)
+        self._rngs = [Random(rng.getrandbits(64)) for _ in range(num_envs)]
+        self._greedy = GreedyPolicy(rng=Random(rng.getrandbits(64)))
+        self._states: List[MoveValidator] = []
+        self._players: List[Player] = []
+        self._card_generators: List[Iterator[Tuple[CardPair, ...]]] = []
+        self._card_pairs: List[Tuple[CardPair, ...]] = []
+        self._scores: List[int] = []
+        # For each game, the move played by each legal action.
+        self._moves: List[Dict[int, Move]] = []
+        for _ in range(num_envs):
+            self._states.append(MoveValidator(game_definition))
+            self._players.append(Player.new(game_definition))
+            self._card_generators.append(iter(()))
+            self._card_pairs.append(())
+            self._scores.append(0)
+            self._moves.append({})
+
+    def get_action(self, move: Move) -> int:
+        """Get the action that builds the house of a move."""
+        if move.card_pair_index is None:
+            return self.permit_refusal_action
+        plot = self._plot_starts[move.street_no] + move.plot_no
+        offset_index = move.temp_offset + self.game_definition.max_temp_agency_offset
+        return (
+            move.card_pair_index * self.num_plots + plot
+        ) * self.num_offsets + offset_index
+
+    def get_move(self, env_no: int, action: int) -> Optional[Move]:
+        """Get the move an action would play in a game, or None if it isn't legal."""
+        return self._moves[env_no].get(action)
+
+    def _reset_game(self, env_no: int) -> None:
+        self._states[env_no] = MoveValidator(self.game_definition)
+        self._players[env_no] = Player.new(self.game_definition)
+        self._card_generators[env_no] = self.game_definition.generate_card_pairs(
+            self._rngs[env_no]
+        )
+        self._card_pairs[env_no] = next(self._card_generators[env_no])
+        self._scores[env_no] = get_final_score(self._players[env_no])
+
+    def _update_moves(self, env_no: int) -> None:
+        state = self._states[env_no]
+        card_pairs = self._card_pairs[env_no]
+        mask = self.action_masks[env_no]
+        mask[:] = False
+
+        planned_fences = None
+        if any(
+            card_pair.action_card.action == ActionEnum.fence for card_pair in card_pairs
+        ):
+            planned_fences = get_planned_fences(state)
+
+        # Keep the move the greedy policy likes best for each action.
+        moves: Dict[int, Move] = {}
+        values: Dict[int, float] = {}
+        for move in generate_legal_moves(state, card_pairs):
+            action = self.get_action(move)
+            value = self._greedy.value_move(state, card_pairs, move, planned_fences)
+            if action not in moves or value > values[action]:
+                moves[action] = move
+                values[action] = value
+                mask[action] = True
+        self._moves[env_no] = moves
+
+    def _write_observation(self, env_no: int) -> None:
+        row = self.observations[env_no]
+        encode_player(self._players[env_no], out=row[: self._player_size])
+
+        start = self._player_size
+        for card_pair in self._card_pairs[env_no]:
+            row[start] = card_pair.number_card.number
+            start += 1
+            row[start : start + len(ACTIONS)] = 0
+            row[start + ACTIONS.index(card_pair.action_card.action)] = 1
+            start += len(ACTIONS)
+
+    def reset(self) -> np.ndarray:
+        """Start a new game in every environment, and return the observations."""
+        for env_no in range(self.num_envs):
+            self._reset_game(env_no)
+            self._update_moves(env_no)
+            self._write_observation(env_no)
+        self.rewards[:] = 0
+        self.dones[:] = False
+        return self.observations
+
+    def step(self, actions: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Play an action in every game.
+
+        Every action is checked before any game is changed, so no game is stepped if
+        any action is illegal.
+
+        :return: The observations, rewards and whether each game finished.
+        """
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} actions, got {len(actions)}.")
+        moves = []
+        for env_no, action in enumerate(actions):
+            move = self._moves[env_no].get(int(action))
+            if move is None:
+                raise MoveError(f"Action {action} is not legal in game {env_no}.")
+            moves.append(move)
+
+        for env_no, move in enumerate(moves):
+            state = self._states[env_no]
+            player = self._players[env_no]
+            card_pairs = self._card_pairs[env_no]
+            state.check_and_apply(card_pairs, move)
+            apply_move_unchecked(player, card_pairs, move)
+
+            score = get_final_score(player)
+            self.rewards[env_no] = score - self._scores[env_no]
+            self._scores[env_no] = score
+
+            done = player_has_finished(player)
+            self.dones[env_no] = done
+            if done:
+                self.final_scores[env_no] = score
+                self._reset_game(env_no)
+            else:
+                self._card_pairs[env_no] = next(self._card_generators[env_no])
+            self._update_moves(env_no)
+            self._write_observation(env_no)
+        return self.observations, self.rewards, self.dones
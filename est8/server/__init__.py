@@ -0,0 +1 @@
+"""Network server hosting many concurrent headless games over TCP."""
@@ -0,0 +1,39 @@
+"""Run a GameServer from the command line."""
+
+import argparse
+import asyncio
+import logging
+import tracemalloc
+
+from est8.backend.definitions import GameDefinition
+from est8.server.server import GameServer
+
+
+async def run(host: str, port: int, players_per_game: int) -> None:
+    server = GameServer(GameDefinition.default(), players_per_game)
+    port = await server.start(host, port)
+    # Printed rather than logged so that scripts starting a server can find the port.
+    print(f"Serving games of {players_per_game} players on {host}:{port}", flush=True)
+    await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Host est8 games over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--players", type=int, default=1, help="Players per game.")
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Trace memory allocations so they can be reported by stats requests.",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.trace_memory:
+        tracemalloc.start()
+    asyncio.run(run(args.host, args.port, args.players))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Client for playing games on a GameServer."""
+
+import asyncio
+
+from typing import Optional
+
+from est8.backend.move import Move
+from est8.server.protocol import (
+    Message,
+    move_to_json,
+    read_message,
+    write_message,
+)
+
+
+class GameClient:
+    """A single player's connection to a GameServer."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+        self.player_no: Optional[int] = None
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> "GameClient":
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def receive(self) -> Message:
+        """Wait for the next message from the server."""
+        message = await read_message(self.reader)
+        if message is None:
+            raise ConnectionError("Server closed the connection.")
+        return message
+
+    async def join(self) -> Message:
+        """Ask to join a game and wait for it to start."""
+        await write_message(self.writer, {"type": "join"})
+        message = await self.receive()
+        if message["type"] == "start":
+            self.player_no = message["player_no"]
+        return message
+
+    async def send_move(self, move: Move) -> Message:
+        """
+        Submit a move for the current turn.
+
+        :return: The server's reply - either "accepted" or an "error" to try again.
+        """
+        await write_message(self.writer, {"type": "move", "move": move_to_json(move)})
+        return await self.receive()
+
+    async def close(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
@@ -0,0 +1,289 @@
+"""
+Load testing a GameServer with many simulated clients on one asyncio event loop.
+
+Each simulated client plays complete games using an automated policy, timing the round
+trip of every move it submits. A separate monitoring connection samples the server's
+stats to find the memory used per active game.
+
+Run `python -m est8.server.load_test --help` for the command line interface; use
+`--json` to get a machine readable report that can be tracked between releases.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import subprocess
+import sys
+import time
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from random import Random
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from est8.backend.definitions import GameDefinition
+from est8.backend.move import Move
+from est8.backend.policies import GreedyPolicy, Policy, RandomPolicy
+from est8.backend.transcript import MoveValidator
+from est8.server.client import GameClient
+from est8.server.protocol import card_pairs_from_json, read_message, write_message
+
+POLICIES: Dict[str, Callable[[Random], Policy]] = {
+    "random": lambda rng: RandomPolicy(rng),
+    "greedy": lambda rng: GreedyPolicy(rng=rng),
+}
+
+
+@dataclass
+class LoadTestReport:
+    """Results of a load test. Latencies are in seconds and memory in bytes."""
+
+    num_clients: int
+    num_games: int
+    num_moves: int
+    duration: float
+    moves_per_second: float
+    latency_p50: float
+    latency_p95: float
+    latency_p99: float
+    peak_active_games: int
+    memory_per_game: Optional[float]
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Get the nearest-rank percentile of some already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def play_client(
+    host: str,
+    port: int,
+    game_definition: GameDefinition,
+    policy: Policy,
+    num_games: int,
+    latencies: List[float],
+) -> None:
+    """Play num_games complete games as a single client, recording move latencies."""
+    for _ in range(num_games):
+        client = await GameClient.connect(host, port)
+        state = MoveValidator(game_definition)
+        try:
+            await client.join()
+            while True:
+                message = await client.receive()
+                if message["type"] == "turn_result":
+                    continue
+                if message["type"] == "refused":
+                    continue
+                if message["type"] != "turn":
+                    break
+
+                card_pairs = card_pairs_from_json(message["card_pairs"])
+                move = policy.choose_move(state, card_pairs)
+                start = time.perf_counter()
+                reply = await client.send_move(move)
+                latencies.append(time.perf_counter() - start)
+
+                if reply["type"] != "accepted":
+                    # The client's view of its state must have diverged from the
+                    # server's, so give up on placing anything this turn.
+                    move = Move.permit_refusal()
+                    await client.send_move(move)
+                state.check_and_apply(card_pairs, move)
+        finally:
+            await client.close()
+
+
+async def monitor_server(
+    host: str,
+    port: int,
+    interval: float,
+    samples: List[Tuple[int, Optional[int]]],
+    ready: asyncio.Event,
+    stop: asyncio.Event,
+) -> None:
+    """
+    Record (active games, traced memory) samples until stop is set.
+
+    ready is set once the first sample has been taken.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await write_message(writer, {"type": "stats"})
+        while True:
+            stats = await read_message(reader)
+            if stats is None:
+                return
+            samples.append((stats["active_games"], stats["traced_memory"]))
+            ready.set()
+            try:
+                await asyncio.wait_for(stop.wait(), interval)
+                return
+            except asyncio.TimeoutError:
+                await write_message(writer, {"type": "stats"})
+    finally:
+        writer.close()
+
+
+def get_memory_per_game(
+    samples: List[Tuple[int, Optional[int]]],
+) -> Tuple[int, Optional[float]]:
+    """
+    Get the peak number of active games, and the memory used per game at that peak.
+
+    Memory is measured relative to the first sample, taken before any client connected.
+    """
+    if not samples:
+        return 0, None
+    baseline = samples[0][1]
+    peak_games, peak_memory = max(samples, key=lambda sample: sample[0])
+    if baseline is None or peak_memory is None or peak_games == 0:
+        return peak_games, None
+    return peak_games, (peak_memory - baseline) / peak_games
+
+
+async def run_load_test(
+    host: str,
+    port: int,
+    num_clients: int,
+    policy: str = "greedy",
+    games_per_client: int = 1,
+    game_definition: Optional[GameDefinition] = None,
+    seed: Optional[int] = None,
+    monitor_interval: float = 0.1,
+) -> LoadTestReport:
+    """
+    Run num_clients simulated clients concurrently against the server at host:port.
+
+    :param policy: Name of the policy from POLICIES that the clients play with.
+    :param seed: Seed for the clients' policies, so their choices can be reproduced.
+    """
+    if game_definition is None:
+        game_definition = GameDefinition.default()
+    rng = Random(seed)
+    latencies: List[float] = []
+    samples: List[Tuple[int, Optional[int]]] = []
+    ready = asyncio.Event()
+    stop = asyncio.Event()
+
+    monitor = asyncio.ensure_future(
+        monitor_server(host, port, monitor_interval, samples, ready, stop)
+    )
+    # Take the baseline measurement before any clients connect.
+    await ready.wait()
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(
+                play_client(
+                    host,
+                    port,
+                    game_definition,
+                    POLICIES[policy](Random(rng.getrandbits(64))),
+                    games_per_client,
+                    latencies,
+                )
+                for _ in range(num_clients)
+            )
+        )
+    finally:
+        duration = time.perf_counter() - start
+        stop.set()
+        await monitor
+
+    latencies.sort()
+    peak_active_games, memory_per_game = get_memory_per_game(samples)
+    return LoadTestReport(
+        num_clients=num_clients,
+        num_games=num_clients * games_per_client,
+        num_moves=len(latencies),
+        duration=duration,
+        moves_per_second=len(latencies) / duration if duration > 0 else 0.0,
+        latency_p50=percentile(latencies, 0.50),
+        latency_p95=percentile(latencies, 0.95),
+        latency_p99=percentile(latencies, 0.99),
+        peak_active_games=peak_active_games,
+        memory_per_game=memory_per_game,
+    )
+
+
+@contextmanager
+def spawn_server(
+    players_per_game: int, host: str = "127.0.0.1", trace_memory: bool = True
+) -> Iterator[int]:
+    """Run a GameServer in a subprocess for the duration of the context, yielding its port."""
+    command = [
+        sys.executable,
+        "-m",
+        "est8.server",
+        "--host",
+        host,
+        "--port",
+        "0",
+        "--players",
+        str(players_per_game),
+    ]
+    if trace_memory:
+        command.append("--trace-memory")
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    assert process.stdout is not None
+    try:
+        line = process.stdout.readline()
+        match = re.search(r":(\d+)$", line.strip())
+        if match is None:
+            raise RuntimeError(f"Game server failed to start: {line!r}")
+        yield int(match.group(1))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test an est8 game server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=None,
+        help="Port of a running server. If not given, a server is started locally.",
+    )
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--players", type=int, default=1, help="Players per game.")
+    parser.add_argument("--games", type=int, default=1, help="Games per client.")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Output JSON.")
+    args = parser.parse_args()
+
+    def run(port: int) -> LoadTestReport:
+        return asyncio.run(
+            run_load_test(
+                args.host,
+                port,
+                args.clients,
+                policy=args.policy,
+                games_per_client=args.games,
+                seed=args.seed,
+            )
+        )
+
+    if args.port is None:
+        with spawn_server(args.players, args.host) as port:
+            report = run(port)
+    else:
+        report = run(args.port)
+
+    if args.json:
+        print(json.dumps(asdict(report)))
+    else:
+        for key, value in asdict(report).items():
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Length-prefixed message protocol spoken between game server and clients.
+
+Every message is a JSON object, sent as a 4 byte big-endian length followed by that
+many bytes of UTF-8 encoded JSON. Every message has a "type":
+
+Client to server:
+ - join: Ask to be seated in the next game.
+ - move: {"move": <move>} The move for the current turn.
+ - stats: Ask for a snapshot of the server's load, instead of joining a game.
+
+A player who sends a message that can't be read - a bad length prefix, or bytes that
+aren't a JSON object with a type - is disconnected, and takes a permit refusal on each
+of their remaining turns. A message that can be read, but isn't a valid move for the
+current turn, is answered with an error and the player may try again.
+
+Server to client:
+ - start: {"player_no": int, "num_players": int} The game has started.
+ - turn: {"turn": int, "card_pairs": [<card pair>, ...]} Cards drawn for this turn.
+ - refused: {"turn": int, "card_pairs": [<card pair>, ...]} Sent instead of turn to a
+   player who cannot build any of the cards drawn. They have automatically taken a
+   permit refusal, and must not send a move this turn.
+ - accepted: The submitted move was valid.
+ - turn_result: {"deltas": [<state delta>, ...]} How each player's state changed this
+   turn, in player order.
+ - error: {"message": str} The submitted message or move was invalid; try again.
+ - game_over: {"scores": [int, ...] or null, "reason": str} The game has ended.
+ - stats: {"active_games": int, "waiting_players": int, "games_finished": int,
+   "traced_memory": int or null} Snapshot of the server's load.
+"""
+
+import asyncio
+import json
+import struct
+
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from est8.backend.errors import Est8Error
+from est8.backend.definitions import ActionEnum, CardDefinition, CardPair
+from est8.backend.house import House
+from est8.backend.move import Move
+from est8.backend.state_delta import StateDelta
+
+LENGTH_STRUCT = struct.Struct("!I")
+MAX_MESSAGE_SIZE = 64 * 1024
+
+Message = Dict[str, Any]
+
+
+class ProtocolError(Est8Error):
+    pass
+
+
+def encode_message(message: Message) -> bytes:
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return LENGTH_STRUCT.pack(len(payload)) + payload
+
+
+def decode_payload(payload: bytes) -> Message:
+    try:
+        message = json.loads(payload.decode("utf-8"))
+    except ValueError as error:
+        raise ProtocolError(f"Message is not valid JSON: {error}")
+    if not isinstance(message, dict) or "type" not in message:
+        raise ProtocolError("Message must be an object with a type.")
+    return message
+
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[Message]:
+    """
+    Read the next message from the stream.
+
+    :return: The message, or None if the other end closed the connection cleanly.
+    """
+    try:
+        header = await reader.readexactly(LENGTH_STRUCT.size)
+    except asyncio.IncompleteReadError as error:
+        if not error.partial:
+            return None
+        raise ConnectionError("Connection closed part way through a message.")
+
+    (length,) = LENGTH_STRUCT.unpack(header)
+    if length > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"Message of {length} bytes is too large.")
+
+    try:
+        payload = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        raise ConnectionError("Connection closed part way through a message.")
+    return decode_payload(payload)
+
+
+async def write_message(writer: asyncio.StreamWriter, message: Message) -> None:
+    writer.write(encode_message(message))
+    await writer.drain()
+
+
+def card_to_json(card: CardDefinition) -> Tuple[int, str]:
+    return card.number, card.action.name
+
+
+def card_from_json(data: List[Any]) -> CardDefinition:
+    number, action_name = data
+    return CardDefinition(number=number, action=ActionEnum[action_name])
+
+
+def card_pairs_to_json(card_pairs: Tuple[CardPair, ...]) -> List[Any]:
+    return [
+        [card_to_json(card_pair.number_card), card_to_json(card_pair.action_card)]
+        for card_pair in card_pairs
+    ]
+
+
+def card_pairs_from_json(data: List[Any]) -> Tuple[CardPair, ...]:
+    return tuple(
+        CardPair(number_card=card_from_json(number), action_card=card_from_json(action))
+        for number, action in data
+    )
+
+
+def move_to_json(move: Move) -> Dict[str, Any]:
+    return asdict(move)
+
+
+_INT_FIELDS = {"street_no", "plot_no", "temp_offset"}
+_OPTIONAL_INT_FIELDS = {"card_pair_index", "invest_estate_size"}
+_OPTIONAL_LOCATION_FIELDS = {"fence", "bis", "roundabout"}
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def move_from_json(data: Any) -> Move:
+    """Construct a Move from its JSON form, raising ProtocolError if it is malformed."""
+    if not isinstance(data, dict):
+        raise ProtocolError("Move must be an object.")
+
+    kwargs: Dict[str, Any] = {}
+    for key, value in data.items():
+        if key in _INT_FIELDS:
+            valid = _is_int(value)
+        elif key in _OPTIONAL_INT_FIELDS:
+            valid = value is None or _is_int(value)
+        elif key in _OPTIONAL_LOCATION_FIELDS:
+            valid = value is None or (
+                isinstance(value, (list, tuple))
+                and len(value) == 2
+                and all(_is_int(item) for item in value)
+            )
+            if valid and value is not None:
+                value = tuple(value)
+        else:
+            raise ProtocolError(f"Unknown move field {key}.")
+
+        if not valid:
+            raise ProtocolError(f"Invalid value for move field {key}.")
+        kwargs[key] = value
+
+    if "card_pair_index" not in kwargs:
+        raise ProtocolError("Move must have a card_pair_index.")
+    return Move(**kwargs)
+
+
+def house_to_json(house: House) -> List[Any]:
+    return [
+        house.number,
+        int(house.is_bis),
+        int(house.has_pool),
+        int(house.has_park),
+        int(house.is_roundabout),
+        int(house.built_by_temps),
+    ]
+
+
+def house_from_json(data: List[Any]) -> House:
+    number, is_bis, has_pool, has_park, is_roundabout, built_by_temps = data
+    return House(
+        number=number,
+        is_bis=bool(is_bis),
+        has_pool=bool(has_pool),
+        has_park=bool(has_park),
+        is_roundabout=bool(is_roundabout),
+        built_by_temps=bool(built_by_temps),
+    )
+
+
+def state_delta_to_json(delta: StateDelta) -> Dict[str, Any]:
+    """Encode a StateDelta compactly, leaving out any fields with no changes."""
+    data: Dict[str, Any] = {}
+    if delta.houses:
+        data["h"] = [
+            [street_no, plot_no, house_to_json(house)]
+            for street_no, plot_no, house in delta.houses
+        ]
+    if delta.fences:
+        data["f"] = delta.fences
+    if delta.parks:
+        data["p"] = delta.parks
+    if delta.counters:
+        data["c"] = delta.counters
+    if delta.investments:
+        data["i"] = delta.investments
+    if delta.plans:
+        data["pl"] = delta.plans
+    if delta.score:
+        data["s"] = delta.score
+    return data
+
+
+def state_delta_from_json(data: Dict[str, Any]) -> StateDelta:
+    def pairs(key: str) -> Tuple[Any, ...]:
+        return tuple(tuple(pair) for pair in data.get(key, ()))
+
+    return StateDelta(
+        houses=tuple(
+            (street_no, plot_no, house_from_json(house))
+            for street_no, plot_no, house in data.get("h", ())
+        ),
+        fences=pairs("f"),
+        parks=pairs("p"),
+        counters=pairs("c"),
+        investments=pairs("i"),
+        plans=pairs("pl"),
+        score=pairs("s"),
+    )
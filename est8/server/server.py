@@ -0,0 +1,343 @@
+"""
+Asyncio TCP server hosting many concurrent games on a single event loop.
+
+Clients connect and send a join message. As soon as enough clients are waiting, they
+are seated together in a new game. Each turn every player is sent the same card pairs,
+and the turn ends once every player has submitted a valid move. Players who cannot build
+any of the cards are instead told they have taken a permit refusal, and are not waited
+for. Every player is then sent the change in each player's state as StateDeltas.
+
+A player who disconnects, or sends a message that can't be read as a JSON object, is
+dropped from the game and takes a permit refusal on each of their remaining turns. Any
+other message that isn't a valid move, including a move that can't be decoded, is
+answered with an error and the player is asked for their move again. The game is only abandoned
+once every player has been dropped. Clients that disconnect before being seated are
+removed from the queue of waiting players.
+
+Monitoring clients may instead send a stats message, and are then sent a snapshot of
+the server's load in reply to each stats message they send.
+"""
+
+import asyncio
+import logging
+import tracemalloc
+
+from dataclasses import dataclass, field
+from random import Random
+from typing import Any, Awaitable, List, Optional, Set
+
+from est8.backend.errors import Est8Error
+from est8.backend.definitions import GameDefinition
+from est8.backend.game import Game
+from est8.backend.move import Move
+from est8.backend.state_delta import DeltaTracker
+from est8.server.protocol import (
+    Message,
+    ProtocolError,
+    card_pairs_to_json,
+    encode_message,
+    move_from_json,
+    read_message,
+    state_delta_to_json,
+    write_message,
+)
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class _Connection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    seated: asyncio.Event = field(default_factory=asyncio.Event)
+    finished: asyncio.Event = field(default_factory=asyncio.Event)
+    dropped: bool = False
+
+
+class GameServer:
+    """
+    Server that seats connecting clients into games of players_per_game players.
+
+    :param seed: Seed for the random number generator that each game's own generator
+        is derived from, so a sequence of games can be reproduced.
+    """
+
+    def __init__(
+        self,
+        game_definition: GameDefinition,
+        players_per_game: int = 1,
+        seed: Optional[int] = None,
+    ):
+        self.game_definition: GameDefinition = game_definition
+        self.players_per_game: int = players_per_game
+        self.games: Set[Game] = set()
+        self.num_games_finished: int = 0
+
+        self._rng = Random(seed)
+        self._waiting: List[_Connection] = []
+        self._game_tasks: Set[asyncio.Task] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def num_active_games(self) -> int:
+        return len(self.games)
+
+    @property
+    def num_waiting_players(self) -> int:
+        return len(self._waiting)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """
+        Start listening for connections.
+
+        :return: The port being listened on, which is useful when port 0 is requested.
+        """
+        self._server = await asyncio.start_server(
+            self._handle_connection, host, port, limit=2**16
+        )
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        assert self._server is not None, "Server must be started first."
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop accepting connections and end every game in progress."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in list(self._game_tasks):
+            task.cancel()
+        await asyncio.gather(*self._game_tasks, return_exceptions=True)
+        for connection in self._waiting:
+            connection.writer.close()
+            connection.finished.set()
+        self._waiting.clear()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connection = _Connection(reader, writer)
+        try:
+            message = await read_message(reader)
+        except (ConnectionError, ProtocolError):
+            writer.close()
+            return
+
+        if message is not None and message["type"] == "stats":
+            await self._serve_stats(connection)
+            return
+
+        if message is None or message["type"] != "join":
+            writer.close()
+            return
+
+        self._waiting.append(connection)
+        if len(self._waiting) >= self.players_per_game:
+            seated = self._waiting[: self.players_per_game]
+            del self._waiting[: self.players_per_game]
+            for seated_connection in seated:
+                seated_connection.seated.set()
+            task = asyncio.ensure_future(self._run_game(seated))
+            self._game_tasks.add(task)
+            task.add_done_callback(self._game_tasks.discard)
+        else:
+            await self._wait_to_be_seated(connection)
+
+        # Keep the connection open until its game has finished with it.
+        await connection.finished.wait()
+
+    async def _wait_to_be_seated(self, connection: _Connection) -> None:
+        """
+        Wait until the connection is seated in a game.
+
+        Clients send nothing while waiting, so anything read from them in the meantime -
+        usually the end of the stream - means they are leaving the queue.
+        """
+        seated = asyncio.ensure_future(connection.seated.wait())
+        leaving = asyncio.ensure_future(read_message(connection.reader))
+        await asyncio.wait({seated, leaving}, return_when=asyncio.FIRST_COMPLETED)
+
+        if connection.seated.is_set():
+            # Nothing has been consumed from the stream unless a whole message arrived.
+            leaving.cancel()
+            await asyncio.gather(leaving, return_exceptions=True)
+            return
+
+        seated.cancel()
+        await asyncio.gather(seated, leaving, return_exceptions=True)
+        if connection in self._waiting:
+            self._waiting.remove(connection)
+        connection.writer.close()
+        connection.finished.set()
+
+    def get_stats(self) -> Message:
+        """
+        Get a snapshot of the server's load.
+
+        traced_memory is the memory currently allocated by the server in bytes, if
+        tracemalloc is tracing; otherwise it is None.
+        """
+        return {
+            "type": "stats",
+            "active_games": self.num_active_games,
+            "waiting_players": self.num_waiting_players,
+            "games_finished": self.num_games_finished,
+            "traced_memory": (
+                tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+            ),
+        }
+
+    async def _serve_stats(self, connection: _Connection) -> None:
+        """Reply to stats requests until the monitoring client disconnects."""
+        try:
+            while True:
+                await write_message(connection.writer, self.get_stats())
+                message = await read_message(connection.reader)
+                if message is None or message["type"] != "stats":
+                    break
+        except (ConnectionError, ProtocolError):
+            pass
+        connection.writer.close()
+
+    @staticmethod
+    async def _gather_or_cancel(*coroutines: Awaitable[Any]) -> None:
+        """Run the coroutines concurrently, cancelling the rest if any of them fail."""
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    @staticmethod
+    def _drop(connection: _Connection, reason: object) -> None:
+        """Stop talking to a player, who takes permit refusals from now on."""
+        if not connection.dropped:
+            log.info(f"Player dropped: {reason}")
+        connection.dropped = True
+        connection.writer.close()
+
+    async def _send(self, connection: _Connection, message: Message) -> None:
+        """Send a message to a player, dropping them if the connection has failed."""
+        if connection.dropped:
+            return
+        try:
+            await write_message(connection.writer, message)
+        except ConnectionError as error:
+            self._drop(connection, error)
+
+    async def _broadcast(
+        self, connections: List[_Connection], message: Message
+    ) -> None:
+        await self._gather_or_cancel(
+            *(self._send(connection, message) for connection in connections)
+        )
+
+    async def _collect_move(
+        self, game: Game, player_no: int, connection: _Connection
+    ) -> None:
+        """Read messages from a player until they submit a valid move."""
+        while not connection.dropped:
+            try:
+                message = await read_message(connection.reader)
+            except (ConnectionError, ProtocolError) as error:
+                self._drop(connection, error)
+                break
+            if message is None:
+                self._drop(connection, "Player disconnected.")
+                break
+
+            try:
+                if message["type"] != "move":
+                    raise ProtocolError("Expected a move.")
+                game.submit_move(player_no, move_from_json(message.get("move")))
+            except Est8Error as error:
+                await self._send(connection, {"type": "error", "message": str(error)})
+                continue
+
+            await self._send(connection, {"type": "accepted"})
+            return
+
+        game.submit_move(player_no, Move.permit_refusal())
+
+    async def _run_game(self, connections: List[_Connection]) -> None:
+        game = Game(
+            self.game_definition, len(connections), Random(self._rng.getrandbits(64))
+        )
+        tracker = DeltaTracker(game.players, game.temp_ranking)
+        # Only players whose podium position changes have their temp score updated.
+        game.temp_ranking.on_score_change = tracker.set_temp_agency_score
+        self.games.add(game)
+        reason = "finished"
+        scores = None
+        try:
+            for player_no, connection in enumerate(connections):
+                await self._send(
+                    connection,
+                    {
+                        "type": "start",
+                        "player_no": player_no,
+                        "num_players": len(connections),
+                    },
+                )
+
+            while not game.is_over:
+                if all(connection.dropped for connection in connections):
+                    raise ConnectionError("Every player disconnected.")
+                card_pairs = game.draw()
+                turn = {
+                    "turn": game.turn,
+                    "card_pairs": card_pairs_to_json(card_pairs),
+                }
+                # Players who were automatically refused are told so, not asked to move.
+                refused = [game.has_submitted(n) for n in range(len(connections))]
+                await self._gather_or_cancel(
+                    *(
+                        self._send(
+                            connection,
+                            {"type": "refused" if is_refused else "turn", **turn},
+                        )
+                        for connection, is_refused in zip(connections, refused)
+                    )
+                )
+                await self._gather_or_cancel(
+                    *(
+                        self._collect_move(game, player_no, connection)
+                        for player_no, (connection, is_refused) in enumerate(
+                            zip(connections, refused)
+                        )
+                        if not is_refused
+                    )
+                )
+                game.end_turn()
+                await self._broadcast(
+                    connections,
+                    {
+                        "type": "turn_result",
+                        "deltas": [
+                            state_delta_to_json(delta) for delta in tracker.emit()
+                        ],
+                    },
+                )
+
+            scores = list(game.scores())
+        except (ConnectionError, ProtocolError) as error:
+            log.info(f"Game abandoned: {error}")
+            reason = "abandoned"
+        except asyncio.CancelledError:
+            reason = "server closed"
+            raise
+        finally:
+            self.games.discard(game)
+            self.num_games_finished += 1
+            game_over = encode_message(
+                {"type": "game_over", "scores": scores, "reason": reason}
+            )
+            for connection in connections:
+                if not connection.writer.is_closing():
+                    connection.writer.write(game_over)
+                    connection.writer.close()
+                connection.finished.set()
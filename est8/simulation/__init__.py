@@ -0,0 +1 @@
+"""Headless simulation of many games, across processes and machines."""
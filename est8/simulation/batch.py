@@ -0,0 +1,67 @@
+"""
+Playing headless games between policies, reproducibly.
+
+Every game of a run is seeded from the run's seed and the game's number alone, so any
+range of games can be played again, in any order and on any process, with identical
+results.
+"""
+
+from hashlib import blake2b
+from random import Random
+from typing import Callable, Optional, Sequence
+
+from est8.backend.definitions import GameDefinition
+from est8.backend.game import Game
+from est8.backend.policies import Policy
+
+# Makes a policy when called with rng=. Must be picklable, e.g. a Policy class or a
+# functools.partial of one, so that it can be sent to worker processes.
+PolicyFactory = Callable[..., Policy]
+
+
+def derive_seed(seed: int, game_no: int) -> int:
+    """Get the seed of a single game of a run."""
+    digest = blake2b(f"{seed}:{game_no}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def play_game(
+    game_definition: GameDefinition,
+    policies: Sequence[Policy],
+    seed: int,
+    on_turn: Optional[Callable[[Game], None]] = None,
+) -> Game:
+    """
+    Play a game to the end with a policy for each player.
+
+    Every policy is asked for a move every turn, even when the player has to take a
+    permit refusal, so policies that track their own state see every move they make.
+
+    :param on_turn: Called with the game at the start of every turn.
+    """
+    game = Game(game_definition, num_players=len(policies), rng=Random(seed))
+    for policy in policies:
+        policy.reset()
+
+    while not game.is_over:
+        if on_turn is not None:
+            on_turn(game)
+        card_pairs = game.draw()
+        for player_no, policy in enumerate(policies):
+            game.submit_move(
+                player_no,
+                policy.choose_move(game.get_validator(player_no), card_pairs),
+            )
+        game.end_turn()
+    return game
+
+
+def play_seeded_game(
+    game_definition: GameDefinition, factories: Sequence[PolicyFactory], seed: int
+) -> Game:
+    """Play a game with a policy from each factory, each seeded from the game's seed."""
+    policies = [
+        factory(rng=Random(derive_seed(seed, seat)))
+        for seat, factory in enumerate(factories)
+    ]
+    return play_game(game_definition, policies, seed)
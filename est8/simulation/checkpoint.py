@@ -0,0 +1,211 @@
+"""
+Simulations that checkpoint their progress to a file, and resume from it after a restart.
+
+Games are played in tasks of consecutive game numbers. Every game's cards and policies
+are seeded from the run's seed and the game's number alone, so the position of every
+random stream is given by which tasks are complete: resuming only has to play the tasks
+that are not, and statistics merge identically in any order, so a resumed run gives
+bit-identical statistics to one that was never interrupted.
+
+File layout (all little-endian):
+ - Header: magic, format version, reserved, hash of the game definition and seats, seed,
+   number of games, games per task, number of tasks, length of the statistics.
+ - A byte per task, set once the task is complete.
+ - The statistics of the complete tasks, as UTF-8 JSON.
+
+The file is replaced atomically at each checkpoint, and read through mmap.
+"""
+
+import json
+import os
+import pickle
+import struct
+import time
+from copy import deepcopy
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from hashlib import sha256
+from typing import Optional, Sequence, Tuple
+
+from est8.backend.atomic_io import MappedFile, atomic_write
+from est8.backend.definitions import GameDefinition
+from est8.backend.errors import CheckpointFormatError
+from est8.simulation.batch import PolicyFactory
+from est8.simulation.pool import get_max_in_flight, run_windowed
+from est8.simulation.statistics import SimulationStatistics, aggregate_games
+
+MAGIC = b"EST8CKP\x00"
+VERSION = 1
+
+HEADER_STRUCT = struct.Struct("<8sHH32sQQIIQ")
+# Fixed so the run digest doesn't change with the Python version's default protocol.
+PICKLE_PROTOCOL = 4
+
+
+def get_run_digest(
+    game_definition: GameDefinition, seats: Sequence[Tuple[str, PolicyFactory]]
+) -> bytes:
+    """
+    Get a hash of what is being simulated, to check a checkpoint is for this run.
+
+    Each seat's factory is hashed by pickling it, which covers its class and any
+    parameters bound to it with functools.partial.
+    """
+    digest = sha256(game_definition.digest())
+    for name, factory in seats:
+        digest.update(name.encode() + b"\x00")
+        digest.update(pickle.dumps(factory, protocol=PICKLE_PROTOCOL))
+    return digest.digest()
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    run_digest: bytes
+    seed: int
+    num_games: int
+    games_per_task: int
+    # Whether each task is complete.
+    completed: Tuple[bool, ...]
+    # Statistics of the complete tasks.
+    statistics: SimulationStatistics
+
+    def get_task_range(self, task_no: int) -> range:
+        start = task_no * self.games_per_task
+        return range(start, min(start + self.games_per_task, self.num_games))
+
+
+def write_checkpoint(path: str, checkpoint: Checkpoint) -> None:
+    """
+    Write a checkpoint to path, atomically, so a crash while writing leaves the previous
+    checkpoint intact.
+    """
+    statistics = json.dumps(checkpoint.statistics.to_json()).encode("utf-8")
+    header = HEADER_STRUCT.pack(
+        MAGIC,
+        VERSION,
+        0,
+        checkpoint.run_digest,
+        checkpoint.seed,
+        checkpoint.num_games,
+        checkpoint.games_per_task,
+        len(checkpoint.completed),
+        len(statistics),
+    )
+
+    with atomic_write(path, sync=True) as file:
+        file.write(header)
+        file.write(bytes(checkpoint.completed))
+        file.write(statistics)
+
+
+def read_checkpoint(path: str) -> Checkpoint:
+    with MappedFile(
+        path, CheckpointFormatError, "est8 checkpoint", HEADER_STRUCT.size
+    ) as mapped:
+        buffer = mapped.buffer
+        (
+            magic,
+            version,
+            _,
+            run_digest,
+            seed,
+            num_games,
+            games_per_task,
+            num_tasks,
+            statistics_size,
+        ) = HEADER_STRUCT.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise CheckpointFormatError("File is not an est8 checkpoint.")
+        if version != VERSION:
+            raise CheckpointFormatError(f"Unsupported checkpoint version {version}.")
+        if len(buffer) != HEADER_STRUCT.size + num_tasks + statistics_size:
+            raise CheckpointFormatError("Checkpoint is truncated.")
+
+        start = HEADER_STRUCT.size
+        completed = tuple(bool(flag) for flag in buffer[start : start + num_tasks])
+        statistics = SimulationStatistics.from_json(
+            json.loads(buffer[start + num_tasks :].decode("utf-8"))
+        )
+
+    return Checkpoint(
+        run_digest=run_digest,
+        seed=seed,
+        num_games=num_games,
+        games_per_task=games_per_task,
+        completed=completed,
+        statistics=statistics,
+    )
+
+
+def run_checkpointed_simulation(
+    game_definition: GameDefinition,
+    seats: Sequence[Tuple[str, PolicyFactory]],
+    num_games: int,
+    path: str,
+    seed: int = 0,
+    games_per_task: int = 1000,
+    max_workers: Optional[int] = None,
+    checkpoint_interval: float = 60.0,
+) -> SimulationStatistics:
+    """
+    Play games on a process pool like `simulate_statistics`, checkpointing to path.
+
+    If path already has a checkpoint of the same run, only the games that it doesn't
+    have are played.
+
+    :param checkpoint_interval: Least number of seconds between checkpoints. A final
+        checkpoint is always written once every game is done, or if the run is stopped
+        early, e.g. by KeyboardInterrupt or a worker process dying.
+    :raises CheckpointFormatError: If path has a checkpoint of a different run.
+    """
+    run_digest = get_run_digest(game_definition, seats)
+    num_tasks = -(-num_games // games_per_task)
+    if os.path.exists(path):
+        checkpoint = read_checkpoint(path)
+        if (
+            checkpoint.run_digest,
+            checkpoint.seed,
+            checkpoint.num_games,
+            checkpoint.games_per_task,
+        ) != (run_digest, seed, num_games, games_per_task):
+            raise CheckpointFormatError(f"Checkpoint at {path} is for a different run.")
+    else:
+        checkpoint = Checkpoint(
+            run_digest=run_digest,
+            seed=seed,
+            num_games=num_games,
+            games_per_task=games_per_task,
+            completed=(False,) * num_tasks,
+            statistics=SimulationStatistics(),
+        )
+
+    last_checkpoint = time.monotonic()
+    tasks = (
+        (
+            task_no,
+            (game_definition, seats, seed, checkpoint.get_task_range(task_no)),
+        )
+        for task_no in range(num_tasks)
+        if not checkpoint.completed[task_no]
+    )
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for task_no, task_statistics in run_windowed(
+                executor, aggregate_games, tasks, get_max_in_flight(max_workers)
+            ):
+                # Merge into a copy and swap it in along with the completed flags,
+                # so checkpoint always has exactly the tasks it says are complete,
+                # even if the run is stopped part way through a merge.
+                statistics = deepcopy(checkpoint.statistics)
+                statistics.merge(task_statistics)
+                completed = list(checkpoint.completed)
+                completed[task_no] = True
+                checkpoint = replace(
+                    checkpoint, completed=tuple(completed), statistics=statistics
+                )
+                if time.monotonic() - last_checkpoint >= checkpoint_interval:
+                    write_checkpoint(path, checkpoint)
+                    last_checkpoint = time.monotonic()
+        finally:
+            write_checkpoint(path, checkpoint)
+    return checkpoint.statistics
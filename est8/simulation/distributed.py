@@ -0,0 +1,329 @@
+"""
+Simulating games across machines: a coordinator hands out work to workers over TCP.
+
+A work item is a range of game numbers to play with a given game definition, seed and
+policy in each seat. The definition is named by its key from `get_definition_key`, and
+the policies by name, so the coordinator and every worker must be given the same
+definitions and policies. Workers connect to the coordinator and pull one item at a
+time. For each item, they send back the `results` records of its games as raw bytes.
+
+Once no items are left to hand out, idle workers steal items that are still being
+played elsewhere, so a slow worker doesn't hold up the end of a run. The first result
+for an item is kept. If a worker disconnects before finishing its item, the item goes
+back in the queue. Every game is seeded from the item's seed and the game's number, so
+it doesn't matter which worker plays it, or how many times it is played.
+
+Messages use the framing of `est8.server.protocol`. Worker to coordinator:
+ - ready: Ask for a work item.
+ - result: {"task": int} The records of a work item follow as a binary frame: a 4 byte
+   big-endian length followed by that many bytes of records.
+
+Coordinator to worker:
+ - work: {"task": int, "definition": str, "seats": [str, ...], "seed": int,
+   "start": int, "stop": int} Play games start to stop of the given run.
+ - done: There is no more work; disconnect.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from est8.backend.definitions import GameDefinition
+from est8.server.protocol import (
+    LENGTH_STRUCT,
+    ProtocolError,
+    read_message,
+    write_message,
+)
+from est8.simulation.batch import PolicyFactory, derive_seed, play_seeded_game
+from est8.simulation.results import get_record_dtype, write_game_records
+
+log = logging.getLogger(__name__)
+
+MAX_RESULT_SIZE = 256 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    definition_key: str
+    # Name of the policy in each seat.
+    seats: Tuple[str, ...]
+    seed: int
+    game_nos: range
+
+
+def split_work(
+    definition_key: str,
+    seats: Sequence[str],
+    seed: int,
+    num_games: int,
+    games_per_item: int = 1000,
+) -> List[WorkItem]:
+    """Split a run of num_games games into work items."""
+    return [
+        WorkItem(
+            definition_key=definition_key,
+            seats=tuple(seats),
+            seed=seed,
+            game_nos=range(start, min(start + games_per_item, num_games)),
+        )
+        for start in range(0, num_games, games_per_item)
+    ]
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    try:
+        (length,) = LENGTH_STRUCT.unpack(await reader.readexactly(LENGTH_STRUCT.size))
+        if length > MAX_RESULT_SIZE:
+            raise ProtocolError(f"Result of {length} bytes is too large.")
+        return await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        raise ConnectionError("Connection closed part way through a result.")
+
+
+async def write_frame(writer: asyncio.StreamWriter, payload: bytes) -> None:
+    writer.write(LENGTH_STRUCT.pack(len(payload)))
+    writer.write(payload)
+    await writer.drain()
+
+
+class SimulationCoordinator:
+    """
+    Hands out work items to connecting workers, and collects their records.
+
+    :param definitions: Game definition of the work items, keyed by definition key.
+    :param max_attempts: Number of workers a work item can be lost on before the run
+        fails.
+    :param max_copies: Most workers that a work item is played on at once, by stealing.
+    """
+
+    def __init__(
+        self,
+        definitions: Dict[str, GameDefinition],
+        work_items: Sequence[WorkItem],
+        max_attempts: int = 3,
+        max_copies: int = 2,
+    ):
+        self.definitions = definitions
+        self.work_items = list(work_items)
+        self.max_attempts = max_attempts
+        self.max_copies = max_copies
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+        self._pending: Deque[int] = deque(range(len(self.work_items)))
+        # Task -> number of workers playing it, and when it was first handed out.
+        self._running: Dict[int, int] = {}
+        self._started: Dict[int, float] = {}
+        self._attempts: Dict[int, int] = {}
+        self._results: Dict[int, np.ndarray] = {}
+        self._error: Optional[Exception] = None
+        self._changed: Optional[asyncio.Condition] = None
+        self._finished: Optional[asyncio.Event] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self._error is not None or len(self._results) == len(self.work_items)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """
+        Start listening for workers.
+
+        :return: The port being listened on, which is useful when port 0 is requested.
+        """
+        self._changed = asyncio.Condition()
+        self._finished = asyncio.Event()
+        if self.is_finished:
+            self._finished.set()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def wait(self) -> List[np.ndarray]:
+        """
+        Wait for every work item to be done, then stop.
+
+        :return: The records of each work item, in order.
+        :raises ProtocolError: If a work item was lost on max_attempts workers.
+        """
+        assert self._finished is not None, "Coordinator must be started first."
+        await self._finished.wait()
+        await self.close()
+        if self._error is not None:
+            raise self._error
+        return [self._results[task] for task in range(len(self.work_items))]
+
+    async def close(self) -> None:
+        """Stop accepting workers, and disconnect any that are still connected."""
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def _notify(self) -> None:
+        assert self._changed is not None and self._finished is not None
+        async with self._changed:
+            if self.is_finished:
+                self._finished.set()
+            self._changed.notify_all()
+
+    async def _next_task(self) -> Optional[int]:
+        """Wait for a task and assign it, or get None once there is no more work."""
+        assert self._changed is not None
+        async with self._changed:
+            while not self.is_finished:
+                if self._pending:
+                    task = self._pending.popleft()
+                    self._assign(task)
+                    return task
+
+                # Steal the longest running task that isn't already being played enough.
+                stealable = [
+                    task
+                    for task, num_copies in self._running.items()
+                    if num_copies < self.max_copies
+                ]
+                if stealable:
+                    task = min(stealable, key=lambda task: self._started[task])
+                    self._assign(task)
+                    return task
+                await self._changed.wait()
+        return None
+
+    def _assign(self, task: int) -> None:
+        if not self._running.get(task):
+            self._started[task] = time.monotonic()
+        self._running[task] = self._running.get(task, 0) + 1
+
+    def _unassign(self, task: int) -> None:
+        self._running[task] -= 1
+        if not self._running[task]:
+            del self._running[task]
+
+    async def _complete(self, task: int, payload: bytes) -> None:
+        item = self.work_items[task]
+        dtype = get_record_dtype(self.definitions[item.definition_key])
+        if len(payload) != dtype.itemsize * len(item.game_nos) * len(item.seats):
+            raise ProtocolError(f"Result for task {task} is the wrong size.")
+
+        self._unassign(task)
+        if task not in self._results:
+            self._results[task] = np.frombuffer(payload, dtype=dtype)
+        await self._notify()
+
+    async def _lose(self, task: int) -> None:
+        """Put a task back in the queue, if no other worker is playing it."""
+        self._unassign(task)
+        if task not in self._results and task not in self._running:
+            self._attempts[task] = self._attempts.get(task, 0) + 1
+            if self._attempts[task] >= self.max_attempts:
+                self._error = ProtocolError(
+                    f"Work item {task} was lost on {self._attempts[task]} workers."
+                )
+            else:
+                self._pending.appendleft(task)
+        await self._notify()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._writers.add(writer)
+        task: Optional[int] = None
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+
+                if message["type"] == "ready" and task is None:
+                    task = await self._next_task()
+                    if task is None:
+                        await write_message(writer, {"type": "done"})
+                        break
+                    item = self.work_items[task]
+                    await write_message(
+                        writer,
+                        {
+                            "type": "work",
+                            "task": task,
+                            "definition": item.definition_key,
+                            "seats": list(item.seats),
+                            "seed": item.seed,
+                            "start": item.game_nos.start,
+                            "stop": item.game_nos.stop,
+                        },
+                    )
+                elif (
+                    message["type"] == "result"
+                    and task is not None
+                    and message.get("task") == task
+                ):
+                    await self._complete(task, await read_frame(reader))
+                    task = None
+                else:
+                    raise ProtocolError(f"Unexpected {message['type']} message.")
+        except (ConnectionError, ProtocolError) as error:
+            log.warning("Lost worker: %s", error)
+        finally:
+            if task is not None:
+                await self._lose(task)
+            self._writers.discard(writer)
+            writer.close()
+
+
+async def run_worker(
+    host: str,
+    port: int,
+    definitions: Dict[str, GameDefinition],
+    agents: Dict[str, PolicyFactory],
+) -> int:
+    """
+    Connect to a coordinator, and play the work items it gives out until it is done.
+
+    :param definitions: Game definitions that may be asked for, keyed by definition key.
+    :param agents: Factory for each policy that may be asked for, keyed by name.
+    :return: The number of work items played.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    num_items = 0
+    try:
+        while True:
+            await write_message(writer, {"type": "ready"})
+            message = await read_message(reader)
+            if message is None or message["type"] == "done":
+                break
+            if message["type"] != "work":
+                raise ProtocolError(f"Unexpected {message['type']} message.")
+
+            game_definition = definitions[message["definition"]]
+            factories = [agents[name] for name in message["seats"]]
+            game_nos = range(message["start"], message["stop"])
+            records = np.zeros(
+                len(game_nos) * len(factories), dtype=get_record_dtype(game_definition)
+            )
+            for index, game_no in enumerate(game_nos):
+                game = play_seeded_game(
+                    game_definition, factories, derive_seed(message["seed"], game_no)
+                )
+                write_game_records(
+                    records[index * len(factories) : (index + 1) * len(factories)],
+                    game_no,
+                    game,
+                )
+
+            await write_message(writer, {"type": "result", "task": message["task"]})
+            await write_frame(writer, records.tobytes())
+            num_items += 1
+    except ConnectionError as error:
+        # The coordinator stops as soon as every item is done, which may be while this
+        # worker is playing a stolen item.
+        log.info("Lost coordinator: %s", error)
+    finally:
+        writer.close()
+    return num_items
@@ -0,0 +1,50 @@
+"""
+Running many tasks on an executor while only keeping a few of them in flight.
+
+Submitting every task up front keeps a future, and then a result, alive for each task
+until the run finishes, so memory grows with the number of tasks. Here only a window of
+tasks is submitted at a time: each finished task is replaced by the next one, and its
+future is dropped as soon as its result has been handed over.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+Key = TypeVar("Key")
+Result = TypeVar("Result")
+
+
+def get_max_in_flight(max_workers: Optional[int]) -> int:
+    """Get how many tasks to keep in flight, so every worker has one queued up."""
+    return 2 * (max_workers or os.cpu_count() or 1)
+
+
+def run_windowed(
+    executor: Executor,
+    fn: Callable[..., Result],
+    tasks: Iterable[Tuple[Key, Tuple[Any, ...]]],
+    max_in_flight: int,
+) -> Iterator[Tuple[Key, Result]]:
+    """
+    Run fn(*args) for each (key, args) of tasks, yielding (key, result) as each finishes.
+
+    Tasks are read from the iterable lazily, and no more than max_in_flight of them are
+    submitted to the executor at once.
+    """
+    tasks = iter(tasks)
+    pending: Dict[Future, Key] = {}
+
+    def submit(count: int) -> None:
+        for key, args in islice(tasks, count):
+            pending[executor.submit(fn, *args)] = key
+
+    submit(max_in_flight)
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        finished = [(pending.pop(future), future) for future in done]
+        # Keep the workers busy while the finished results are handled.
+        submit(len(finished))
+        for key, future in finished:
+            yield key, future.result()
@@ -0,0 +1,218 @@
+"""
+Per-game results of a batch simulation, written by workers straight into shared memory.
+
+Each player of each game has a fixed-layout record in a NumPy structured array that
+lives in a `multiprocessing.shared_memory` block. Workers are only sent the name of the
+block and the games to play, and write their records in place, so no results are
+pickled. The coordinator reads the records from the same block without copying them.
+
+Record fields:
+ - game_no, player_no
+ - score: the player's final score,
+ - breakdown: the score in each of SCORE_CATEGORIES,
+ - estates: the number of complete estates of each size, from 1 up to the largest
+   size that can be invested in. Larger estates are counted with the largest size.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from est8.backend.definitions import GameDefinition
+from est8.backend.game import Game
+from est8.backend.player import Player
+from est8.simulation.batch import PolicyFactory, derive_seed, play_seeded_game
+
+SCORE_CATEGORIES = (
+    "bis",
+    "investments",
+    "pools",
+    "roundabouts",
+    "temp_agencies",
+    "permit_refusals",
+    "parks",
+    "plans",
+)
+
+
+def get_record_dtype(game_definition: GameDefinition) -> np.dtype:
+    """Get the layout of the record of one player of one game."""
+    return np.dtype(
+        [
+            ("game_no", "<u8"),
+            ("player_no", "<u2"),
+            ("score", "<i4"),
+            ("breakdown", "<i4", (len(SCORE_CATEGORIES),)),
+            ("estates", "<u2", (max(game_definition.scoring.invest.map),)),
+        ]
+    )
+
+
+def write_player_records(
+    records: np.ndarray,
+    game_no: int,
+    players: Sequence[Player],
+    breakdowns: Sequence[Dict[str, int]],
+) -> None:
+    """Write a record for each player of a finished game into records, in player order."""
+    max_size = records.dtype["estates"].shape[0]
+    for player_no, (record, player, breakdown) in enumerate(
+        zip(records, players, breakdowns)
+    ):
+        record["game_no"] = game_no
+        record["player_no"] = player_no
+        record["score"] = sum(breakdown.values())
+        record["breakdown"] = [breakdown[category] for category in SCORE_CATEGORIES]
+        estates = record["estates"]
+        estates[:] = 0
+        for size in player.neighbourhood.get_all_estates():
+            estates[min(size, max_size) - 1] += 1
+
+
+def write_game_records(records: np.ndarray, game_no: int, game: Game) -> None:
+    """Write a record for each player of a finished game into records, in player order."""
+    write_player_records(records, game_no, game.players, game.score_breakdowns())
+
+
+class SharedResults:
+    """
+    Result records in a shared memory block, for num_games games of num_players each.
+
+    Make one with `create` in the coordinator, and open it with `attach` in workers.
+    Every view of `records` must be released before the block is closed.
+    """
+
+    def __init__(
+        self,
+        shared_memory: SharedMemory,
+        game_definition: GameDefinition,
+        num_games: int,
+        num_players: int,
+        is_owner: bool,
+    ):
+        self.shared_memory = shared_memory
+        self.num_games = num_games
+        self.num_players = num_players
+        self._is_owner = is_owner
+        buffer = shared_memory.buf
+        assert buffer is not None, "The shared memory block is closed."
+        # Unlike np.ndarray(buffer=...), frombuffer holds on to the buffer, so closing
+        # the block while a view is alive raises a BufferError rather than crashing.
+        self.records: np.ndarray = np.frombuffer(
+            buffer,
+            dtype=get_record_dtype(game_definition),
+            count=num_games * num_players,
+        )
+
+    @classmethod
+    def create(
+        cls, game_definition: GameDefinition, num_games: int, num_players: int
+    ) -> "SharedResults":
+        size = get_record_dtype(game_definition).itemsize * num_games * num_players
+        shared_memory = SharedMemory(create=True, size=max(size, 1))
+        results = cls(shared_memory, game_definition, num_games, num_players, True)
+        results.records[:] = np.zeros(1, dtype=results.records.dtype)
+        return results
+
+    @classmethod
+    def attach(
+        cls,
+        name: str,
+        game_definition: GameDefinition,
+        num_games: int,
+        num_players: int,
+    ) -> "SharedResults":
+        return cls(
+            SharedMemory(name=name), game_definition, num_games, num_players, False
+        )
+
+    @property
+    def name(self) -> str:
+        return self.shared_memory.name
+
+    def game_records(self, game_index: int) -> np.ndarray:
+        """Get a view of the records of every player of a game."""
+        start = game_index * self.num_players
+        return self.records[start : start + self.num_players]
+
+    def close(self) -> None:
+        """
+        Close this process's view of the block, freeing it if this process made it.
+
+        :raises BufferError: If any view of the records is still alive.
+        """
+        del self.records
+        if self._is_owner:
+            self.shared_memory.unlink()
+        self.shared_memory.close()
+
+    def __enter__(self) -> "SharedResults":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+
+def simulate_games(
+    name: str,
+    game_definition: GameDefinition,
+    factories: Sequence[PolicyFactory],
+    seed: int,
+    num_games: int,
+    game_indices: range,
+) -> int:
+    """
+    Play games and write their records into the shared results with the given name.
+
+    :return: The number of games played.
+    """
+    results = SharedResults.attach(name, game_definition, num_games, len(factories))
+    try:
+        for game_index in game_indices:
+            game = play_seeded_game(
+                game_definition, factories, derive_seed(seed, game_index)
+            )
+            write_game_records(results.game_records(game_index), game_index, game)
+    finally:
+        results.close()
+    return len(game_indices)
+
+
+def simulate_to_shared_memory(
+    game_definition: GameDefinition,
+    factories: Sequence[PolicyFactory],
+    num_games: int,
+    seed: int = 0,
+    games_per_task: int = 100,
+    max_workers: Optional[int] = None,
+) -> SharedResults:
+    """
+    Play games on a process pool, with results written to shared memory.
+
+    The caller owns the returned results, and must close them to free the memory.
+
+    :param factories: Factory for the policy of each seat.
+    """
+    results = SharedResults.create(game_definition, num_games, len(factories))
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    simulate_games,
+                    results.name,
+                    game_definition,
+                    factories,
+                    seed,
+                    num_games,
+                    range(start, min(start + games_per_task, num_games)),
+                )
+                for start in range(0, num_games, games_per_task)
+            ]
+            for future in futures:
+                future.result()
+    except BaseException:
+        results.close()
+        raise
+    return results
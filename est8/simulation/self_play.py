@@ -0,0 +1,244 @@
+"""
+Fitting linear evaluation weights for the encoding of a player by self-play.
+
+Each iteration plays a batch of games in worker processes. Players choose the move that
+leads to the state the current weights value most, and every state a player reaches is
+recorded, through `encode_players`, with the player's final score. Workers write their
+samples to their own file as soon as their games are done, so memory use doesn't grow
+with the number of games. The next weights are the least squares fit of final score to
+features, accumulated file by file. The first iteration plays with a GreedyPolicy, as
+there are no weights yet.
+
+Weights have one value per feature of the encoding, then a constant term.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from random import Random
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from est8.backend.definitions import CardPair, GameDefinition
+from est8.backend.encoding import encode_players, get_encoding_size
+from est8.backend.legal_moves import generate_legal_moves
+from est8.backend.move import Move
+from est8.backend.player import Player
+from est8.backend.policies import GreedyPolicy, Policy
+from est8.backend.replay import apply_move_unchecked
+from est8.backend.transcript import MoveValidator
+from est8.simulation.batch import derive_seed, play_game
+from est8.simulation.pool import get_max_in_flight, run_windowed
+
+
+class LinearPolicy(Policy):
+    """
+    Choose the move leading to the state with the best value under linear weights.
+
+    The player's state is tracked from the moves chosen, so the policy must be asked for
+    every move of a game, as `play_game` does.
+    """
+
+    def __init__(
+        self,
+        game_definition: GameDefinition,
+        weights: np.ndarray,
+        exploration: float = 0.0,
+        rng: Optional[Random] = None,
+    ):
+        """
+        :param exploration: Chance of choosing a legal move at random instead.
+        """
+        self.game_definition = game_definition
+        self.weights = weights
+        self.exploration = exploration
+        self.rng: Random = rng if rng is not None else Random()
+        self.player = Player.new(game_definition)
+
+    def reset(self) -> None:
+        self.player = Player.new(self.game_definition)
+
+    def value_moves(
+        self, card_pairs: Tuple[CardPair, ...], moves: List[Move]
+    ) -> np.ndarray:
+        """Get the value of the state each move leads to."""
+        players = []
+        for move in moves:
+            player = self.player.copy()
+            apply_move_unchecked(player, card_pairs, move)
+            players.append(player)
+        return encode_players(players) @ self.weights[:-1] + self.weights[-1]
+
+    def choose_move(
+        self, state: MoveValidator, card_pairs: Tuple[CardPair, ...]
+    ) -> Move:
+        moves = list(generate_legal_moves(state, card_pairs))
+        if len(moves) == 1:
+            move = moves[0]
+        elif self.exploration and self.rng.random() < self.exploration:
+            move = self.rng.choice(moves)
+        else:
+            values = self.value_moves(card_pairs, moves)
+            move = moves[self.rng.choice(np.flatnonzero(values == values.max()))]
+        apply_move_unchecked(self.player, card_pairs, move)
+        return move
+
+
+@dataclass(frozen=True)
+class SelfPlayIteration:
+    """The outcome of playing one batch of games."""
+
+    # Weights the games were played with, or None for the GreedyPolicy.
+    weights: Optional[np.ndarray]
+    # Weights fitted to the samples from the games.
+    fitted_weights: np.ndarray
+    mean_score: float
+    num_samples: int
+    paths: Tuple[str, ...]
+
+
+def play_batch(
+    game_definition: GameDefinition,
+    weights: Optional[np.ndarray],
+    seed: int,
+    game_nos: range,
+    num_players: int,
+    exploration: float,
+    path: str,
+) -> Tuple[str, int, float]:
+    """
+    Play a range of games, and write every (features, final score) sample to path.
+
+    :return: (path, number of samples, total final score of every player).
+    """
+    features: List[np.ndarray] = []
+    scores: List[int] = []
+    total_score = 0.0
+    for game_no in game_nos:
+        game_seed = derive_seed(seed, game_no)
+        policies: List[Policy] = []
+        for player_no in range(num_players):
+            rng = Random(derive_seed(game_seed, player_no))
+            if weights is None:
+                policies.append(GreedyPolicy(rng=rng))
+            else:
+                policies.append(
+                    LinearPolicy(game_definition, weights, exploration, rng)
+                )
+
+        # Record each player's state at the start of every turn, and at the end.
+        num_turns_before = len(features)
+        game = play_game(
+            game_definition,
+            policies,
+            game_seed,
+            on_turn=lambda game: features.append(encode_players(game.players)),
+        )
+        features.append(encode_players(game.players))
+        final_scores = game.scores()
+        total_score += sum(final_scores)
+        scores.extend(final_scores * (len(features) - num_turns_before))
+
+    size = get_encoding_size(game_definition)
+    np.savez(
+        path,
+        features=(
+            np.concatenate(features) if features else np.empty((0, size), np.float32)
+        ),
+        scores=np.array(scores, dtype=np.float32),
+    )
+    return path, len(scores), total_score
+
+
+def fit_weights(paths: Iterable[str]) -> np.ndarray:
+    """Fit weights to the samples in the files written by `play_batch`."""
+    gram: Optional[np.ndarray] = None
+    moments: Optional[np.ndarray] = None
+    for path in paths:
+        with np.load(path) as samples:
+            features = samples["features"].astype(np.float64)
+            scores = samples["scores"].astype(np.float64)
+        features = np.hstack((features, np.ones((len(features), 1))))
+        if gram is None or moments is None:
+            gram = np.zeros((features.shape[1], features.shape[1]))
+            moments = np.zeros(features.shape[1])
+        gram += features.T @ features
+        moments += features.T @ scores
+
+    if gram is None or moments is None:
+        raise ValueError("There are no samples to fit weights to.")
+    # Solving the normal equations by least squares copes with features that never vary.
+    return np.linalg.lstsq(gram, moments, rcond=None)[0]
+
+
+def run_self_play(
+    game_definition: GameDefinition,
+    directory: str,
+    num_iterations: int,
+    num_games: int,
+    num_players: int = 1,
+    games_per_batch: int = 100,
+    exploration: float = 0.1,
+    seed: int = 0,
+    max_workers: Optional[int] = None,
+) -> List[SelfPlayIteration]:
+    """
+    Alternate between playing games with the latest weights and fitting new ones.
+
+    Samples are written to directory, along with the weights fitted each iteration.
+
+    :param num_games: Number of games to play each iteration.
+    :param games_per_batch: Number of games each worker plays before writing them out.
+    """
+    iterations: List[SelfPlayIteration] = []
+    weights: Optional[np.ndarray] = None
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for iteration in range(num_iterations):
+            iteration_seed = derive_seed(seed, iteration)
+            tasks = (
+                (
+                    start,
+                    (
+                        game_definition,
+                        weights,
+                        iteration_seed,
+                        range(start, min(start + games_per_batch, num_games)),
+                        num_players,
+                        exploration,
+                        os.path.join(
+                            directory,
+                            f"iteration-{iteration:03d}-games-{start:09d}.npz",
+                        ),
+                    ),
+                )
+                for start in range(0, num_games, games_per_batch)
+            )
+
+            paths = []
+            num_samples = 0
+            total_score = 0.0
+            for _, (path, batch_samples, batch_score) in run_windowed(
+                executor, play_batch, tasks, get_max_in_flight(max_workers)
+            ):
+                paths.append(path)
+                num_samples += batch_samples
+                total_score += batch_score
+
+            paths.sort()
+            fitted_weights = fit_weights(paths)
+            np.save(
+                os.path.join(directory, f"iteration-{iteration:03d}-weights.npy"),
+                fitted_weights,
+            )
+            iterations.append(
+                SelfPlayIteration(
+                    weights=weights,
+                    fitted_weights=fitted_weights,
+                    mean_score=total_score / max(num_games * num_players, 1),
+                    num_samples=num_samples,
+                    paths=tuple(paths),
+                )
+            )
+            weights = fitted_weights
+    return iterations
@@ -0,0 +1,307 @@
+"""
+Summary statistics of simulation results, kept in constant memory as games are played.
+
+Every score and score category of every player is an integer in a bounded range, so a
+histogram with a bin per value summarises it exactly: its size depends on the range of
+scores, not the number of games. Quantiles are read from the histogram. Counts and sums
+are kept as integers too, so statistics merged from any number of workers, in any order,
+are identical to those of playing every game in one process.
+
+Statistics are kept separately for each (policy name, game definition) pair.
+"""
+
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from est8.backend.atomic_io import atomic_write
+from est8.backend.definitions import GameDefinition
+from est8.simulation.batch import PolicyFactory, derive_seed, play_seeded_game
+from est8.simulation.pool import get_max_in_flight, run_windowed
+from est8.simulation.results import (
+    SCORE_CATEGORIES,
+    get_record_dtype,
+    write_game_records,
+)
+
+# The total score, then each category of the score breakdown.
+FIELDS = ("score",) + SCORE_CATEGORIES
+
+
+def get_definition_key(game_definition: GameDefinition) -> str:
+    """Get the key of a game definition's statistics."""
+    return game_definition.digest().hex()[:16]
+
+
+class Distribution:
+    """The count, sums and histogram of a stream of integers."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.total_squares = 0
+        # counts[i] is the number of times offset + i has been seen.
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def _cover(self, low: int, high: int) -> None:
+        """Grow the histogram to have a bin for every value from low to high."""
+        if len(self.counts) == 0:
+            self.offset = low
+            self.counts = np.zeros(high - low + 1, dtype=np.int64)
+            return
+        new_offset = min(self.offset, low)
+        new_size = max(self.offset + len(self.counts) - 1, high) - new_offset + 1
+        if new_offset != self.offset or new_size != len(self.counts):
+            counts = np.zeros(new_size, dtype=np.int64)
+            start = self.offset - new_offset
+            counts[start : start + len(self.counts)] = self.counts
+            self.offset = new_offset
+            self.counts = counts
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.int64)
+        if len(values) == 0:
+            return
+        low, high = int(values.min()), int(values.max())
+        self._cover(low, high)
+        start = low - self.offset
+        self.counts[start : start + high - low + 1] += np.bincount(values - low)
+        self.count += len(values)
+        self.total += int(values.sum())
+        self.total_squares += int((values * values).sum())
+
+    def merge(self, other: "Distribution") -> None:
+        if other.count == 0:
+            return
+        self._cover(other.offset, other.offset + len(other.counts) - 1)
+        start = other.offset - self.offset
+        self.counts[start : start + len(other.counts)] += other.counts
+        self.count += other.count
+        self.total += other.total
+        self.total_squares += other.total_squares
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float("nan")
+
+    @property
+    def variance(self) -> float:
+        """The population variance."""
+        if not self.count:
+            return float("nan")
+        return (self.count * self.total_squares - self.total**2) / self.count**2
+
+    def quantile(self, fraction: float) -> int:
+        """Get the smallest value that at least fraction of the values are at most."""
+        if not self.count:
+            raise ValueError("There are no values to get a quantile of.")
+        cumulative = np.cumsum(self.counts)
+        index = np.searchsorted(cumulative, max(fraction * self.count, 1))
+        return self.offset + int(index)
+
+    def histogram(self) -> Dict[int, int]:
+        """Get the number of times each value has been seen, for every value seen."""
+        return {
+            self.offset + int(index): int(self.counts[index])
+            for index in np.flatnonzero(self.counts)
+        }
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "total_squares": self.total_squares,
+            "offset": self.offset,
+            "counts": self.counts.tolist(),
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Distribution":
+        distribution = cls()
+        distribution.count = data["count"]
+        distribution.total = data["total"]
+        distribution.total_squares = data["total_squares"]
+        distribution.offset = data["offset"]
+        distribution.counts = np.array(data["counts"], dtype=np.int64)
+        return distribution
+
+
+class SimulationStatistics:
+    """A Distribution of each of FIELDS, for each (policy name, definition key)."""
+
+    def __init__(self):
+        self.distributions: Dict[Tuple[str, str], Dict[str, Distribution]] = {}
+
+    def _get_distributions(self, key: Tuple[str, str]) -> Dict[str, Distribution]:
+        if key not in self.distributions:
+            self.distributions[key] = {field: Distribution() for field in FIELDS}
+        return self.distributions[key]
+
+    def add_records(
+        self,
+        definition_key: str,
+        policy_names: Sequence[str],
+        records: np.ndarray,
+    ) -> None:
+        """
+        Add result records, as written by `write_game_records`.
+
+        :param policy_names: The name of the policy in each seat.
+        """
+        for player_no, policy_name in enumerate(policy_names):
+            seat_records = records[records["player_no"] == player_no]
+            distributions = self._get_distributions((policy_name, definition_key))
+            distributions["score"].add(seat_records["score"])
+            for index, category in enumerate(SCORE_CATEGORIES):
+                distributions[category].add(seat_records["breakdown"][:, index])
+
+    def merge(self, other: "SimulationStatistics") -> None:
+        for key, other_distributions in other.distributions.items():
+            distributions = self._get_distributions(key)
+            for field, distribution in other_distributions.items():
+                distributions[field].merge(distribution)
+
+    def get(
+        self, policy_name: str, definition_key: str, field: str = "score"
+    ) -> Distribution:
+        return self.distributions[(policy_name, definition_key)][field]
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Get the mean, standard deviation and quartiles of every distribution."""
+        summary: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (policy_name, definition_key), distributions in self.distributions.items():
+            for field, distribution in distributions.items():
+                if not distribution.count:
+                    continue
+                summary.setdefault(f"{policy_name}@{definition_key}", {})[field] = {
+                    "count": distribution.count,
+                    "mean": distribution.mean,
+                    "std": distribution.variance**0.5,
+                    "min": distribution.quantile(0),
+                    "p25": distribution.quantile(0.25),
+                    "median": distribution.quantile(0.5),
+                    "p75": distribution.quantile(0.75),
+                    "max": distribution.quantile(1),
+                }
+        return summary
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "distributions": [
+                {
+                    "policy": policy_name,
+                    "definition": definition_key,
+                    "fields": {
+                        field: distribution.to_json()
+                        for field, distribution in distributions.items()
+                    },
+                }
+                for (policy_name, definition_key), distributions in sorted(
+                    self.distributions.items()
+                )
+            ]
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "SimulationStatistics":
+        statistics = cls()
+        for entry in data["distributions"]:
+            statistics.distributions[(entry["policy"], entry["definition"])] = {
+                field: Distribution.from_json(distribution)
+                for field, distribution in entry["fields"].items()
+            }
+        return statistics
+
+    def write_snapshot(self, path: str) -> None:
+        """
+        Write these statistics and their summary to a JSON file at path, atomically.
+        """
+        with atomic_write(path, "w") as file:
+            json.dump({"summary": self.summary(), **self.to_json()}, file)
+
+    @classmethod
+    def read_snapshot(cls, path: str) -> "SimulationStatistics":
+        with open(path) as file:
+            return cls.from_json(json.load(file))
+
+
+def aggregate_games(
+    game_definition: GameDefinition,
+    seats: Sequence[Tuple[str, PolicyFactory]],
+    seed: int,
+    game_nos: range,
+) -> SimulationStatistics:
+    """Play a range of games and get their statistics."""
+    records = np.zeros(
+        len(game_nos) * len(seats), dtype=get_record_dtype(game_definition)
+    )
+    for index, game_no in enumerate(game_nos):
+        game = play_seeded_game(
+            game_definition,
+            [factory for _, factory in seats],
+            derive_seed(seed, game_no),
+        )
+        write_game_records(
+            records[index * len(seats) : (index + 1) * len(seats)], game_no, game
+        )
+
+    statistics = SimulationStatistics()
+    statistics.add_records(
+        get_definition_key(game_definition), [name for name, _ in seats], records
+    )
+    return statistics
+
+
+def simulate_statistics(
+    game_definition: GameDefinition,
+    seats: Sequence[Tuple[str, PolicyFactory]],
+    num_games: int,
+    seed: int = 0,
+    games_per_task: int = 1000,
+    max_workers: Optional[int] = None,
+    snapshot_path: Optional[str] = None,
+    snapshot_interval: float = 60.0,
+) -> SimulationStatistics:
+    """
+    Play games on a process pool, keeping only their statistics.
+
+    Each worker sends back the statistics of its games, which are merged as they arrive.
+    Only a few tasks are queued at once, so memory doesn't grow with num_games.
+
+    :param seats: The name of the policy in each seat, and a factory for it.
+    :param snapshot_path: If given, the statistics so far are written here at most every
+        snapshot_interval seconds, and once all games are done.
+    """
+    statistics = SimulationStatistics()
+    last_snapshot = time.monotonic()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        tasks = (
+            (
+                start,
+                (
+                    game_definition,
+                    seats,
+                    seed,
+                    range(start, min(start + games_per_task, num_games)),
+                ),
+            )
+            for start in range(0, num_games, games_per_task)
+        )
+        for _, task_statistics in run_windowed(
+            executor, aggregate_games, tasks, get_max_in_flight(max_workers)
+        ):
+            statistics.merge(task_statistics)
+            if (
+                snapshot_path is not None
+                and time.monotonic() - last_snapshot >= snapshot_interval
+            ):
+                statistics.write_snapshot(snapshot_path)
+                last_snapshot = time.monotonic()
+
+    if snapshot_path is not None:
+        statistics.write_snapshot(snapshot_path)
+    return statistics
@@ -0,0 +1,289 @@
+"""
+Sweeping the scoring and street parameters of a game, to balance variants of it.
+
+A configuration is a dict of parameter values, applied to a base GameDefinition by the
+functions in PARAMETERS. Configurations come from a grid over every combination of
+candidate values, or a random sample of them.
+
+Every configuration plays the same numbered games with the same seed, so they all see
+the same card draws and policy random streams: differences between them come from the
+parameters rather than the luck of the draw.
+
+Configurations that only differ in the values of their score tables allow exactly the
+same moves. With rescore=True only the first of them is simulated, and the records of
+its games are replayed and rescored under each of the others. This assumes the policies
+would have made the same moves under the other scoring, so it is off by default: it is
+only right for policies that don't look at the score. Investment values are never
+rescored, as they guide where the built-in policies plan their fences.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from functools import partial
+from itertools import product
+from random import Random
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from est8.backend.definitions import GameDefinition, InvestDefinition
+from est8.backend.replay import replay, score_breakdowns
+from est8.simulation.batch import PolicyFactory, derive_seed, play_seeded_game
+from est8.simulation.pool import get_max_in_flight, run_windowed
+from est8.simulation.results import (
+    get_record_dtype,
+    write_game_records,
+    write_player_records,
+)
+from est8.simulation.statistics import SimulationStatistics, get_definition_key
+
+Configuration = Dict[str, Any]
+
+
+def _set_scoring_table(
+    name: str, game_definition: GameDefinition, value: Sequence[int]
+) -> GameDefinition:
+    changes: Dict[str, Any] = {name: tuple(value)}
+    return replace(game_definition, scoring=replace(game_definition.scoring, **changes))
+
+
+def _set_invest_map(
+    game_definition: GameDefinition, value: Dict[int, Sequence[int]]
+) -> GameDefinition:
+    invest = InvestDefinition(
+        map={size: tuple(values) for size, values in value.items()}
+    )
+    return replace(
+        game_definition, scoring=replace(game_definition.scoring, invest=invest)
+    )
+
+
+def _set_street_values(
+    name: str, game_definition: GameDefinition, value: Sequence[Sequence[int]]
+) -> GameDefinition:
+    """Set a field of every street, from a value for each street."""
+    neighbourhood = game_definition.neighbourhood
+    if len(value) != len(neighbourhood.streets):
+        raise ValueError(f"{name} needs a value for each of the streets.")
+    streets = []
+    for street, street_value in zip(neighbourhood.streets, value):
+        changes: Dict[str, Any] = {name: tuple(street_value)}
+        streets.append(replace(street, **changes))
+    return replace(
+        game_definition, neighbourhood=replace(neighbourhood, streets=tuple(streets))
+    )
+
+
+# Name of each parameter -> function to get a definition with the parameter set.
+PARAMETERS: Dict[str, Callable[[GameDefinition, Any], GameDefinition]] = {
+    "bis": partial(_set_scoring_table, "bis"),
+    "permit_refusal": partial(_set_scoring_table, "permit_refusal"),
+    "pool": partial(_set_scoring_table, "pool"),
+    "roundabout": partial(_set_scoring_table, "roundabout"),
+    "temp_agency": partial(_set_scoring_table, "temp_agency"),
+    "invest_map": _set_invest_map,
+    "park_scoring": partial(_set_street_values, "park_scoring"),
+    "pool_locations": partial(_set_street_values, "pool_locations"),
+}
+
+
+def apply_configuration(
+    game_definition: GameDefinition, configuration: Configuration
+) -> GameDefinition:
+    for name, value in configuration.items():
+        if name not in PARAMETERS:
+            raise ValueError(f"Unknown sweep parameter {name}.")
+        game_definition = PARAMETERS[name](game_definition, value)
+    return game_definition
+
+
+def grid_search(space: Dict[str, Sequence[Any]]) -> List[Configuration]:
+    """Get every combination of the candidate values of each parameter."""
+    names = sorted(space)
+    return [
+        dict(zip(names, values)) for values in product(*(space[name] for name in names))
+    ]
+
+
+def random_search(
+    space: Dict[str, Sequence[Any]], num_configurations: int, seed: int = 0
+) -> List[Configuration]:
+    """Get configurations with each parameter picked at random from its candidates."""
+    rng = Random(seed)
+    names = sorted(space)
+    return [
+        {name: rng.choice(space[name]) for name in names}
+        for _ in range(num_configurations)
+    ]
+
+
+def _zeroed(table: Sequence[int]) -> Tuple[int, ...]:
+    return (0,) * len(table)
+
+
+def get_rules_digest(game_definition: GameDefinition) -> bytes:
+    """
+    Get a hash of everything about a definition but the values of its score tables.
+
+    The lengths of the tables are kept, as some of them limit which moves are legal.
+    Investment values are kept too, as policies plan their fences from them.
+    """
+    scoring = game_definition.scoring
+    neighbourhood = game_definition.neighbourhood
+    return replace(
+        game_definition,
+        scoring=replace(
+            scoring,
+            bis=_zeroed(scoring.bis),
+            permit_refusal=_zeroed(scoring.permit_refusal),
+            pool=_zeroed(scoring.pool),
+            roundabout=_zeroed(scoring.roundabout),
+            temp_agency=_zeroed(scoring.temp_agency),
+        ),
+        neighbourhood=replace(
+            neighbourhood,
+            streets=tuple(
+                replace(street, park_scoring=_zeroed(street.park_scoring))
+                for street in neighbourhood.streets
+            ),
+        ),
+    ).digest()
+
+
+def get_win_points(scores: Sequence[int]) -> List[float]:
+    """Get each seat's share of a win, which is split between tied winners."""
+    best = max(scores)
+    winners = sum(score == best for score in scores)
+    return [1 / winners if score == best else 0.0 for score in scores]
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    configuration: Configuration
+    definition_key: str
+    statistics: SimulationStatistics
+    # Share of the games won by each policy, with ties shared between the winners.
+    win_shares: Dict[str, float]
+    # Whether the games were rescored from another configuration's records.
+    rescored: bool
+
+
+def sweep_games(
+    game_definitions: Sequence[GameDefinition],
+    seats: Sequence[Tuple[str, PolicyFactory]],
+    seed: int,
+    game_nos: range,
+) -> List[Tuple[SimulationStatistics, Dict[str, float]]]:
+    """
+    Play a range of games under the first definition, and rescore them under the rest.
+
+    :return: The statistics and win points of each policy under each definition.
+    """
+    names = [name for name, _ in seats]
+    records = [
+        np.zeros(len(game_nos) * len(seats), dtype=get_record_dtype(game_definition))
+        for game_definition in game_definitions
+    ]
+    for index, game_no in enumerate(game_nos):
+        game = play_seeded_game(
+            game_definitions[0],
+            [factory for _, factory in seats],
+            derive_seed(seed, game_no),
+        )
+        rows = slice(index * len(seats), (index + 1) * len(seats))
+        write_game_records(records[0][rows], game_no, game)
+        game_record = game.to_record()
+        for game_definition, definition_records in zip(
+            game_definitions[1:], records[1:]
+        ):
+            players = replay(game_definition, game_record)
+            write_player_records(
+                definition_records[rows], game_no, players, score_breakdowns(players)
+            )
+
+    results = []
+    for game_definition, definition_records in zip(game_definitions, records):
+        statistics = SimulationStatistics()
+        statistics.add_records(
+            get_definition_key(game_definition), names, definition_records
+        )
+        win_points = {name: 0.0 for name in names}
+        for game_scores in definition_records["score"].reshape(-1, len(seats)):
+            for name, points in zip(names, get_win_points(game_scores.tolist())):
+                win_points[name] += points
+        results.append((statistics, win_points))
+    return results
+
+
+def run_sweep(
+    game_definition: GameDefinition,
+    configurations: Sequence[Configuration],
+    seats: Sequence[Tuple[str, PolicyFactory]],
+    num_games: int,
+    seed: int = 0,
+    games_per_task: int = 1000,
+    max_workers: Optional[int] = None,
+    rescore: bool = False,
+) -> List[SweepResult]:
+    """
+    Play num_games games under each configuration on a process pool.
+
+    :param game_definition: The definition each configuration is applied to.
+    :param seats: The name of the policy in each seat, and a factory for it.
+    :param rescore: Whether to rescore the games of configurations that only differ in
+        the values of their score tables, rather than simulate them. Only use this with
+        policies that choose the same moves whatever the scoring.
+    :return: The result of each configuration, in order.
+    """
+    definitions = [
+        apply_configuration(game_definition, configuration)
+        for configuration in configurations
+    ]
+
+    # Indices of the configurations that can share games, the first being simulated.
+    groups: Dict[Any, List[int]] = {}
+    for index, definition in enumerate(definitions):
+        key = get_rules_digest(definition) if rescore else index
+        groups.setdefault(key, []).append(index)
+
+    names = [name for name, _ in seats]
+    statistics = [SimulationStatistics() for _ in configurations]
+    win_points = [{name: 0.0 for name in names} for _ in configurations]
+    tasks = (
+        (
+            group,
+            (
+                [definitions[index] for index in group],
+                seats,
+                seed,
+                range(start, min(start + games_per_task, num_games)),
+            ),
+        )
+        for group in groups.values()
+        for start in range(0, num_games, games_per_task)
+    )
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for group, group_results in run_windowed(
+            executor, sweep_games, tasks, get_max_in_flight(max_workers)
+        ):
+            for index, (task_statistics, task_points) in zip(group, group_results):
+                statistics[index].merge(task_statistics)
+                for name, points in task_points.items():
+                    win_points[index][name] += points
+
+    rescored = {index for group in groups.values() for index in group[1:]}
+    return [
+        SweepResult(
+            configuration=configuration,
+            definition_key=get_definition_key(definition),
+            statistics=statistics[index],
+            win_shares={
+                name: points / max(num_games, 1)
+                for name, points in win_points[index].items()
+            },
+            rescored=index in rescored,
+        )
+        for index, (configuration, definition) in enumerate(
+            zip(configurations, definitions)
+        )
+    ]
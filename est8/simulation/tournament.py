@@ -0,0 +1,247 @@
+"""
+Round-robin tournaments between policies, rated as results arrive.
+
+Each round plays every combination of players_per_game agents on one deal of the cards.
+The agents of a combination play every rotation of the seating on the same deal, so
+each agent plays each seat equally often and every seating faces the same draws.
+
+Every game is scored as a round of pairwise matches between its players: a player beats
+another by scoring more. An agent's rating is the Elo difference that would give its
+share of the points against the field, with a normal approximation confidence interval
+on that share.
+
+The results of a deal aren't independent: every seating plays the same cards, and each
+game gives several pairwise results. So the interval treats each deal as one sample,
+taking the standard error of the share from the spread of the points the agent scored
+on each deal (a cluster-robust standard error, with deals as the clusters). Ratings
+only depend on the totals of each deal, so they are updated as each game finishes, in
+whatever order. A tournament can stop once every rating's interval is narrow enough.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import combinations
+from math import log10, sqrt
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from est8.backend.definitions import GameDefinition
+from est8.simulation.batch import PolicyFactory, derive_seed, play_seeded_game
+from est8.simulation.pool import get_max_in_flight, run_windowed
+
+# Number of standard deviations either side of a rating for its confidence interval.
+Z_95 = 1.96
+
+
+def elo_from_fraction(fraction: float) -> float:
+    """Get the Elo difference at which the expected share of the points is fraction."""
+    fraction = min(max(fraction, 0.001), 0.999)
+    return -400 * log10(1 / fraction - 1)
+
+
+@dataclass(frozen=True)
+class Rating:
+    elo: float
+    lower: float
+    upper: float
+    # Number of pairwise results the rating is from.
+    num_results: int
+    # Number of deals those results were played on.
+    num_deals: int
+
+
+class RatingTable:
+    """Running totals of the pairwise results of each agent."""
+
+    def __init__(self, agent_names: Sequence[str]):
+        self.agent_names = list(agent_names)
+        self.num_games = 0
+        self._num_results: Dict[str, int] = {name: 0 for name in agent_names}
+        self._points: Dict[str, float] = {name: 0.0 for name in agent_names}
+        # agent -> deal -> (points, number of results)
+        self._deals: Dict[str, Dict[Hashable, Tuple[float, int]]] = {
+            name: {} for name in agent_names
+        }
+        # (agent, opponent) -> (points, number of results)
+        self._pairwise: Dict[Tuple[str, str], Tuple[float, int]] = {}
+
+    def _add_result(
+        self, name: str, opponent: str, points: float, deal: Hashable
+    ) -> None:
+        self._num_results[name] += 1
+        self._points[name] += points
+        deal_points, deal_count = self._deals[name].get(deal, (0.0, 0))
+        self._deals[name][deal] = (deal_points + points, deal_count + 1)
+        total, count = self._pairwise.get((name, opponent), (0.0, 0))
+        self._pairwise[(name, opponent)] = (total + points, count + 1)
+
+    def add_game(
+        self, seating: Sequence[str], scores: Sequence[int], deal: Hashable
+    ) -> None:
+        """
+        Add the result of a game with the given agent in each seat.
+
+        :param deal: Identifies the cards the game was played with. Games on the same
+            deal, such as the rotations of a seating, count as one sample.
+        """
+        self.num_games += 1
+        for seat, other_seat in combinations(range(len(seating)), 2):
+            if scores[seat] > scores[other_seat]:
+                points = 1.0
+            elif scores[seat] == scores[other_seat]:
+                points = 0.5
+            else:
+                points = 0.0
+            self._add_result(seating[seat], seating[other_seat], points, deal)
+            self._add_result(seating[other_seat], seating[seat], 1.0 - points, deal)
+
+    def rating(self, name: str) -> Rating:
+        """
+        Get an agent's rating, with a confidence interval from the spread between deals.
+
+        The interval is unbounded until the agent has played on at least two deals.
+        """
+        num_results = self._num_results[name]
+        deals = self._deals[name].values()
+        num_deals = len(deals)
+        if num_results == 0:
+            return Rating(
+                elo=0.0,
+                lower=float("-inf"),
+                upper=float("inf"),
+                num_results=0,
+                num_deals=0,
+            )
+
+        fraction = self._points[name] / num_results
+        if num_deals < 2:
+            return Rating(
+                elo=elo_from_fraction(fraction),
+                lower=float("-inf"),
+                upper=float("inf"),
+                num_results=num_results,
+                num_deals=num_deals,
+            )
+
+        # Each deal's residual is how far its points are from the share over all deals.
+        squared_residuals = sum(
+            (points - fraction * count) ** 2 for points, count in deals
+        )
+        variance = num_deals / (num_deals - 1) * squared_residuals / num_results**2
+        margin = Z_95 * sqrt(variance)
+        return Rating(
+            elo=elo_from_fraction(fraction),
+            lower=elo_from_fraction(fraction - margin),
+            upper=elo_from_fraction(fraction + margin),
+            num_results=num_results,
+            num_deals=num_deals,
+        )
+
+    def ratings(self) -> Dict[str, Rating]:
+        return {name: self.rating(name) for name in self.agent_names}
+
+    def pairwise_fraction(self, name: str, opponent: str) -> Optional[float]:
+        """Get the share of the points name has taken from opponent, if they've met."""
+        total, count = self._pairwise.get((name, opponent), (0.0, 0))
+        return total / count if count else None
+
+    def has_converged(self, precision: float) -> bool:
+        """Whether every rating's confidence interval is at most precision Elo wide."""
+        return all(
+            rating.upper - rating.lower <= precision
+            for rating in self.ratings().values()
+        )
+
+
+def get_schedule(
+    agent_names: Sequence[str], players_per_game: int, round_no: int, seed: int
+) -> List[Tuple[Tuple[str, ...], int]]:
+    """
+    Get the (agent in each seat, game seed) of every game of a round.
+
+    Every combination of agents plays every rotation of its seating on the same deal.
+    """
+    schedule = []
+    for matchup_no, matchup in enumerate(combinations(agent_names, players_per_game)):
+        game_seed = derive_seed(derive_seed(seed, round_no), matchup_no)
+        for rotation in range(players_per_game):
+            schedule.append((matchup[rotation:] + matchup[:rotation], game_seed))
+    return schedule
+
+
+def play_seating(
+    game_definition: GameDefinition,
+    factories: Sequence[PolicyFactory],
+    game_seed: int,
+) -> Tuple[int, ...]:
+    """Play one game with a policy from each factory, and get the score of each seat."""
+    return play_seeded_game(game_definition, factories, game_seed).scores()
+
+
+@dataclass(frozen=True)
+class TournamentReport:
+    ratings: Dict[str, Rating]
+    num_games: int
+    num_rounds: int
+    # Whether the tournament stopped early because the ratings converged.
+    converged: bool
+
+
+def run_tournament(
+    game_definition: GameDefinition,
+    agents: Dict[str, PolicyFactory],
+    players_per_game: int = 2,
+    max_rounds: int = 100,
+    min_rounds: int = 1,
+    precision: Optional[float] = None,
+    seed: int = 0,
+    max_workers: Optional[int] = None,
+    on_game: Optional[
+        Callable[[Tuple[str, ...], Tuple[int, ...], RatingTable], None]
+    ] = None,
+) -> TournamentReport:
+    """
+    Play rounds of games between the agents in worker processes, and rate them.
+
+    :param agents: Factory for each agent's policy, keyed by name.
+    :param precision: Stop after min_rounds once every rating's confidence interval is
+        at most this many Elo wide.
+    :param on_game: Called with the seating, scores and updated ratings after each game.
+    """
+    agent_names = sorted(agents)
+    table = RatingTable(agent_names)
+    converged = False
+    num_rounds = 0
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for round_no in range(max_rounds):
+            tasks = (
+                (
+                    (seating, game_seed),
+                    (game_definition, [agents[name] for name in seating], game_seed),
+                )
+                for seating, game_seed in get_schedule(
+                    agent_names, players_per_game, round_no, seed
+                )
+            )
+            for (seating, game_seed), scores in run_windowed(
+                executor, play_seating, tasks, get_max_in_flight(max_workers)
+            ):
+                table.add_game(seating, scores, game_seed)
+                if on_game is not None:
+                    on_game(seating, scores, table)
+
+            num_rounds += 1
+            if (
+                precision is not None
+                and num_rounds >= min_rounds
+                and table.has_converged(precision)
+            ):
+                converged = True
+                break
+
+    return TournamentReport(
+        ratings=table.ratings(),
+        num_games=table.num_games,
+        num_rounds=num_rounds,
+        converged=converged,
+    )
@@ -0,0 +1,43 @@
+"""Fixtures shared between test modules."""
+
+from dataclasses import replace
+
+import pytest
+
+from est8.backend.definitions import (
+    GameDefinition,
+    NeighbourhoodDefinition,
+    StreetDefinition,
+)
+
+
+@pytest.fixture()
+def tiny_game_definition():
+    """A neighbourhood small enough for whole games to be searched."""
+    return replace(
+        GameDefinition.default(),
+        neighbourhood=NeighbourhoodDefinition(
+            streets=(
+                StreetDefinition(
+                    num_houses=3, pool_locations=(1,), park_scoring=(0, 2, 5)
+                ),
+                StreetDefinition(num_houses=2, pool_locations=(), park_scoring=(0, 3)),
+            )
+        ),
+    )
+
+
+@pytest.fixture()
+def small_game_definition():
+    """A neighbourhood small enough for many games to be quick to simulate."""
+    return replace(
+        GameDefinition.default(),
+        neighbourhood=NeighbourhoodDefinition(
+            streets=(
+                StreetDefinition(
+                    num_houses=4, pool_locations=(1,), park_scoring=(0, 2, 5)
+                ),
+                StreetDefinition(num_houses=3, pool_locations=(), park_scoring=(0, 3)),
+            )
+        ),
+    )
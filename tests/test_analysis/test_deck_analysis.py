@@ -0,0 +1,91 @@
+"""Tests for exact deck statistics, compared against enumerating every shuffle."""
+
+from collections import Counter
+from dataclasses import replace
+from fractions import Fraction
+from itertools import combinations, permutations
+
+import pytest
+
+from est8.analysis.deck_analysis import (
+    analyse_deck,
+    card_pair_distribution,
+    expected_turns_until_action,
+    number_gap_distribution,
+)
+from est8.backend.definitions import ActionEnum, DeckDefinition, GameDefinition
+
+
+@pytest.fixture()
+def small_deck():
+    return DeckDefinition(
+        bis_numbers=(1, 3),
+        fence_numbers=(1, 2),
+        park_numbers=(3,),
+        invest_numbers=(),
+        pool_numbers=(5,),
+        temp_agency_numbers=(),
+    )
+
+
+def test_card_pair_distribution(small_deck):
+    cards = list(small_deck.ordered_card_generator())
+    orders = list(permutations(range(len(cards)), 2))
+    expected = Counter()
+    for action_index, number_index in orders:
+        expected[(cards[number_index].number, cards[action_index].action)] += 1
+
+    distribution = card_pair_distribution(small_deck)
+    assert sum(distribution.values()) == 1
+    for key, probability in distribution.items():
+        assert probability == Fraction(expected[key], len(orders))
+
+
+def test_expected_turns_until_action(subtests, small_deck):
+    game_definition = replace(
+        GameDefinition.default(), deck=small_deck, num_cards_drawn_at_once=2
+    )
+    cards = list(small_deck.ordered_card_generator())
+    shuffles = list(permutations(cards))
+
+    for action in (ActionEnum.bis, ActionEnum.park, ActionEnum.pool):
+        with subtests.test(action=action):
+            first_turns = [
+                next(
+                    index // 2 + 1
+                    for index, card in enumerate(shuffle)
+                    if card.action == action
+                )
+                for shuffle in shuffles
+            ]
+            assert expected_turns_until_action(game_definition, action) == Fraction(
+                sum(first_turns), len(shuffles)
+            )
+
+    with subtests.test("Actions not in the deck never appear."):
+        assert expected_turns_until_action(game_definition, ActionEnum.temp) is None
+
+
+def test_number_gap_distribution(subtests, small_deck):
+    numbers = [card.number for card in small_deck.ordered_card_generator()]
+    for num_houses in range(2, len(numbers) + 1):
+        with subtests.test(num_houses=num_houses):
+            gaps = Counter()
+            num_draws = 0
+            for draw in combinations(numbers, num_houses):
+                ordered = sorted(draw)
+                gaps.update(b - a for a, b in zip(ordered, ordered[1:]))
+                num_draws += 1
+
+            num_gaps = num_draws * (num_houses - 1)
+            assert number_gap_distribution(small_deck, num_houses) == {
+                gap: Fraction(count, num_gaps) for gap, count in gaps.items()
+            }
+
+
+def test_analyse_deck():
+    report = analyse_deck(GameDefinition.default())
+    assert sum(report.card_pairs.values()) == 1
+    assert len(report.number_gaps) == 3
+    assert all(sum(gaps.values()) == 1 for gaps in report.number_gaps)
+    assert all(turns >= 1 for turns in report.turns_until_action.values())
@@ -0,0 +1,119 @@
+"""Tests for building and reading opening books."""
+
+from dataclasses import replace
+from random import Random
+
+import pytest
+
+from est8.analysis.opening_book import (
+    BookPolicy,
+    OpeningBook,
+    build_opening_book,
+)
+from est8.backend.definitions import (
+    DeckDefinition,
+    GameDefinition,
+    NeighbourhoodDefinition,
+    StreetDefinition,
+)
+from est8.backend.errors import OpeningBookFormatError
+from est8.backend.move import Move
+from est8.backend.policies import Policy
+from est8.backend.transcript import MoveValidator
+
+
+@pytest.fixture()
+def game_definition():
+    return replace(
+        GameDefinition.default(),
+        neighbourhood=NeighbourhoodDefinition(
+            streets=(
+                StreetDefinition(
+                    num_houses=3, pool_locations=(1,), park_scoring=(0, 2, 5)
+                ),
+                StreetDefinition(num_houses=2, pool_locations=(), park_scoring=(0, 3)),
+            )
+        ),
+        # A small deck, so that sample games see most of the possible first draws.
+        deck=DeckDefinition(
+            bis_numbers=(),
+            fence_numbers=(1, 2),
+            park_numbers=(1,),
+            invest_numbers=(),
+            pool_numbers=(2,),
+            temp_agency_numbers=(),
+        ),
+        num_cards_drawn_at_once=2,
+    )
+
+
+class RefusePolicy(Policy):
+    def choose_move(self, state, card_pairs):
+        return Move.permit_refusal()
+
+
+def test_opening_book(subtests, tmp_path, game_definition):
+    path = str(tmp_path / "book")
+    num_positions = build_opening_book(
+        path, game_definition, num_turns=2, num_games=6, num_rollouts=2, max_workers=2
+    )
+    assert num_positions > 0
+
+    with subtests.test("The book doesn't depend on how the work was split."):
+        other_path = str(tmp_path / "other_book")
+        build_opening_book(
+            other_path,
+            game_definition,
+            num_turns=2,
+            num_games=6,
+            num_rollouts=2,
+            max_workers=1,
+        )
+        with open(path, "rb") as file, open(other_path, "rb") as other_file:
+            assert file.read() == other_file.read()
+
+    with OpeningBook(path, game_definition) as book:
+        assert len(book) == num_positions
+        assert book.num_turns == 2
+
+        state = MoveValidator(game_definition)
+        with subtests.test("Book moves are legal and ignore the order of the cards."):
+            num_found = 0
+            for seed in range(50):
+                card_pairs = next(game_definition.generate_card_pairs(Random(seed)))
+                move = book.get_move(state, card_pairs)
+                if move is None:
+                    continue
+                num_found += 1
+                state.copy().check_and_apply(card_pairs, move)
+
+                reversed_pairs = tuple(reversed(card_pairs))
+                reversed_move = book.get_move(state, reversed_pairs)
+                assert (
+                    reversed_pairs[reversed_move.card_pair_index]
+                    == card_pairs[move.card_pair_index]
+                )
+                assert replace(reversed_move, card_pair_index=0) == replace(
+                    move, card_pair_index=0
+                )
+            assert num_found > 0
+
+        with subtests.test("Out of the book, the fallback policy is used."):
+            policy = BookPolicy(book, RefusePolicy())
+            full_state = state.copy()
+            for street in full_state.streets:
+                for plot_no in range(street.num_houses):
+                    street.place_number(plot_no, plot_no)
+            assert policy.choose_move(full_state, card_pairs).is_permit_refusal
+
+    with subtests.test("Books are for one game definition."):
+        book = OpeningBook(path, replace(game_definition, num_cards_drawn_at_once=3))
+        with pytest.raises(OpeningBookFormatError):
+            book.get_move(state, card_pairs)
+
+    with subtests.test("Truncated books are rejected."):
+        truncated_path = tmp_path / "truncated_book"
+        truncated_path.write_bytes((tmp_path / "book").read_bytes()[:-1])
+        book = OpeningBook(str(truncated_path), game_definition)
+        with pytest.raises(OpeningBookFormatError, match="truncated"):
+            book.get_move(state, card_pairs)
@@ -0,0 +1,89 @@
+"""Tests for the perfect information oracle."""
+
+from random import Random
+
+from est8.analysis.oracle import (
+    generate_card_sequences,
+    get_final_score,
+    regret_report,
+    solve,
+    solve_many,
+)
+from est8.backend.definitions import GameDefinition
+from est8.backend.legal_moves import generate_legal_moves
+from est8.backend.player import Player
+from est8.backend.policies import RandomPolicy
+from est8.backend.replay import apply_move_unchecked
+from est8.backend.transcript import MoveValidator
+
+
+def brute_force(game_definition, card_sequence, state, player, turn=0):
+    if turn == len(card_sequence):
+        return get_final_score(player)
+    card_pairs = card_sequence[turn]
+    best = None
+    for move in generate_legal_moves(state, card_pairs):
+        next_state = state.copy()
+        next_state.check_and_apply(card_pairs, move)
+        next_player = player.copy()
+        apply_move_unchecked(next_player, card_pairs, move)
+        score = brute_force(
+            game_definition, card_sequence, next_state, next_player, turn + 1
+        )
+        best = score if best is None else max(best, score)
+    return best
+
+
+def test_solve_is_optimal(subtests, tiny_game_definition):
+    for sequence_no, card_sequence in enumerate(
+        generate_card_sequences(tiny_game_definition, 3, 2, seed=1)
+    ):
+        result = solve(tiny_game_definition, card_sequence)
+
+        with subtests.test("Score is the best possible.", sequence_no=sequence_no):
+            assert result.is_optimal
+            assert result.score == brute_force(
+                tiny_game_definition,
+                card_sequence,
+                MoveValidator(tiny_game_definition),
+                Player.new(tiny_game_definition),
+            )
+
+        with subtests.test("Moves reach the score.", sequence_no=sequence_no):
+            player = Player.new(tiny_game_definition)
+            state = MoveValidator(tiny_game_definition)
+            for card_pairs, move in zip(card_sequence, result.moves):
+                state.check_and_apply(card_pairs, move)
+                apply_move_unchecked(player, card_pairs, move)
+            assert get_final_score(player) == result.score
+
+
+def test_solve_within_budget(subtests):
+    game_definition = GameDefinition.default()
+    (card_sequence,) = generate_card_sequences(game_definition, 1, 30, seed=2)
+    result = solve(game_definition, card_sequence, max_nodes=200)
+
+    with subtests.test("The search stops at the budget."):
+        assert not result.is_optimal
+        assert result.nodes_searched == 200
+
+    with subtests.test("The result is at least as good as greedy play."):
+        greedy_result = solve(game_definition, card_sequence, max_nodes=0)
+        assert result.score >= greedy_result.score
+
+
+def test_regret_report(tiny_game_definition):
+    card_sequences = generate_card_sequences(tiny_game_definition, 2, 2, seed=3)
+    oracle_results = solve_many(tiny_game_definition, card_sequences, max_workers=2)
+    assert oracle_results == [
+        solve(tiny_game_definition, sequence) for sequence in card_sequences
+    ]
+
+    reports = regret_report(
+        tiny_game_definition,
+        card_sequences,
+        {"random": lambda: RandomPolicy(Random(0))},
+        oracle_results=oracle_results,
+    )
+    assert all(regret >= 0 for regret in reports["random"].regrets)
+    assert reports["random"].num_optimal == 2
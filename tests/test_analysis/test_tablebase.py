@@ -0,0 +1,216 @@
+"""Tests for the street endgame tablebase, compared against searching every draw."""
+
+from dataclasses import replace
+from itertools import product
+
+import pytest
+
+from est8.analysis.deck_analysis import card_pair_distribution
+from est8.analysis.tablebase import (
+    HEADER_STRUCT,
+    SLOT_STRUCT,
+    EndgameModel,
+    Tablebase,
+    build_tablebase,
+)
+from est8.backend.definitions import (
+    ActionEnum,
+    DeckDefinition,
+    GameDefinition,
+    NeighbourhoodDefinition,
+    StreetDefinition,
+)
+from est8.backend.errors import TablebaseFormatError
+from est8.backend.house import House
+from est8.backend.street import Street
+from est8.backend.street_index import StreetIndex
+
+
+@pytest.fixture()
+def game_definition():
+    return replace(
+        GameDefinition.default(),
+        neighbourhood=NeighbourhoodDefinition(
+            streets=(
+                StreetDefinition(
+                    num_houses=4, pool_locations=(1, 2), park_scoring=(0, 2, 5)
+                ),
+            )
+        ),
+        deck=DeckDefinition(
+            bis_numbers=(2,),
+            fence_numbers=(1, 4),
+            park_numbers=(2, 3),
+            invest_numbers=(),
+            pool_numbers=(3,),
+            temp_agency_numbers=(1,),
+        ),
+        num_cards_drawn_at_once=2,
+        max_temp_agency_offset=1,
+    )
+
+
+def brute_force(game_definition, street_index, num_parks, turns_left, memo=None):
+    """Park/pool endgame value, trying every draw and every placement."""
+    if turns_left == 0:
+        return 0.0
+    memo = {} if memo is None else memo
+    key = (tuple(street_index.numbers), num_parks, turns_left)
+    if key in memo:
+        return memo[key]
+    definition = street_index.definition
+    distribution = card_pair_distribution(game_definition.deck)
+    offset = game_definition.max_temp_agency_offset
+    pass_value = brute_force(
+        game_definition, street_index, num_parks, turns_left - 1, memo
+    )
+
+    expected = 0.0
+    for draw in product(
+        distribution.items(), repeat=game_definition.num_cards_drawn_at_once
+    ):
+        best = pass_value
+        for (number, action), _ in draw:
+            changes = range(-offset, offset + 1) if action == ActionEnum.temp else (0,)
+            for change, plot_no in product(changes, range(definition.num_houses)):
+                if street_index.is_built[plot_no] or not street_index.can_place_number(
+                    plot_no, number + change
+                ):
+                    continue
+                gain = 0
+                next_parks = num_parks
+                if action == ActionEnum.park:
+                    next_parks += 1
+                    gain += definition.park_score(next_parks) - definition.park_score(
+                        num_parks
+                    )
+                if action == ActionEnum.pool and definition.can_have_pool_at(plot_no):
+                    gain += game_definition.scoring.pool_score(1)
+                next_index = street_index.copy()
+                next_index.place_number(plot_no, number + change)
+                best = max(
+                    best,
+                    gain
+                    + brute_force(
+                        game_definition, next_index, next_parks, turns_left - 1, memo
+                    ),
+                )
+        probability = 1.0
+        for _, pair_probability in draw:
+            probability *= float(pair_probability)
+        expected += probability * best
+    memo[key] = expected
+    return expected
+
+
+def make_street(game_definition, numbers):
+    street = Street.new(game_definition.neighbourhood.streets[0])
+    for plot_no, number in enumerate(numbers):
+        if number is not None:
+            street.place_house(plot_no, House(number=number))
+    return street
+
+
+def test_value_matches_brute_force(subtests, game_definition):
+    model = EndgameModel(game_definition)
+    for numbers in (
+        (None, None, 3, 4),
+        (1, None, None, 5),
+        (None, 2, None, 6),
+        (0, None, 3, None),
+        (None, None, None, 9),
+    ):
+        street = make_street(game_definition, numbers)
+        for num_parks, turns_left in product((0, 1), (1, 2)):
+            with subtests.test(
+                numbers=numbers, num_parks=num_parks, turns_left=turns_left
+            ):
+                position = model.get_position(0, street, num_parks)
+                assert model.park_pool_value(0, position, turns_left) == pytest.approx(
+                    brute_force(
+                        game_definition,
+                        StreetIndex.from_street(street),
+                        num_parks,
+                        turns_left,
+                    )
+                )
+
+
+def test_get_position(subtests, game_definition):
+    model = EndgameModel(game_definition)
+
+    with subtests.test("Numbers outside those drawn don't change the position."):
+        assert model.get_position(
+            0, make_street(game_definition, (1, None, None, 9)), 0
+        ) == model.get_position(0, make_street(game_definition, (1, None, None, 7)), 0)
+
+    with subtests.test("Plots no number can fill are left out."):
+        position = model.get_position(
+            0, make_street(game_definition, (2, None, 3, 4)), 0
+        )
+        assert position == (0, ())
+
+    with subtests.test("Extra parks past the end of the scoring don't count."):
+        street = make_street(game_definition, (None, None, 3, 4))
+        assert model.get_position(0, street, 2) == model.get_position(0, street, 7)
+
+
+def test_tablebase(subtests, tmp_path, game_definition):
+    path = str(tmp_path / "endgames.tb")
+    num_values = build_tablebase(path, game_definition, max_empty=2, max_turns=2)
+    model = EndgameModel(game_definition)
+    positions = list(model.enumerate_positions(0, 2))
+    assert num_values == 2 * len(positions)
+
+    with Tablebase.open(path, game_definition) as tablebase:
+        with subtests.test("Every position solved is in the table."):
+            for position, turns_left in product(positions, (1, 2)):
+                assert tablebase.probe(
+                    0, position, turns_left
+                ) == model.park_pool_value(0, position, turns_left)
+
+        with subtests.test("Probe a street directly."):
+            street = make_street(game_definition, (None, 2, None, 6))
+            assert tablebase.probe_street(0, street, 1, 2) == model.park_pool_value(
+                0, model.get_position(0, street, 1), 2
+            )
+
+        with subtests.test("Positions not solved aren't found."):
+            street = make_street(game_definition, (None, None, None, 6))
+            assert tablebase.probe_street(0, street, 0, 1) is None
+            assert tablebase.probe(0, positions[0], 3) is None
+
+        with subtests.test("Full streets have nothing left to score."):
+            street = make_street(game_definition, (1, 2, 3, 4))
+            assert tablebase.probe_street(0, street, 0, 1) == 0.0
+
+    with subtests.test("Tablebases are for one game definition."):
+        with pytest.raises(TablebaseFormatError):
+            Tablebase.open(path, replace(game_definition, num_cards_drawn_at_once=3))
+
+    with subtests.test("Tablebases are for one pool value."):
+        with Tablebase.open(path, game_definition, pool_value=3) as tablebase:
+            assert tablebase.model.pool_value == 3
+        with pytest.raises(TablebaseFormatError, match="pool value"):
+            Tablebase.open(path, game_definition, pool_value=5)
+
+    with subtests.test("Truncated tablebases are rejected."):
+        truncated_path = tmp_path / "truncated.tb"
+        truncated_path.write_bytes((tmp_path / "endgames.tb").read_bytes()[:-1])
+        with pytest.raises(TablebaseFormatError, match="truncated"):
+            Tablebase.open(str(truncated_path), game_definition)
+
+    with subtests.test("Tables must be a power of two slots long."):
+        data = bytearray((tmp_path / "endgames.tb").read_bytes())
+        header = HEADER_STRUCT.unpack_from(data)
+        HEADER_STRUCT.pack_into(data, 0, *header[:-1], 3)
+        bad_path = tmp_path / "bad_slots.tb"
+        bad_path.write_bytes(data[: HEADER_STRUCT.size + 3 * SLOT_STRUCT.size])
+        with pytest.raises(TablebaseFormatError, match="slots"):
+            Tablebase.open(str(bad_path), game_definition)
+
+    with subtests.test("Other files are rejected."):
+        other_path = tmp_path / "other"
+        other_path.write_bytes(b"not a tablebase" * 10)
+        with pytest.raises(TablebaseFormatError):
+            Tablebase.open(str(other_path), game_definition)
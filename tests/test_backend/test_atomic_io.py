@@ -0,0 +1,47 @@
+"""Tests for writing files atomically and mapping them into memory."""
+
+import pytest
+
+from est8.backend.atomic_io import MappedFile, atomic_write
+from est8.backend.errors import CorpusFormatError
+
+
+def test_atomic_write(subtests, tmp_path):
+    path = tmp_path / "file.bin"
+
+    with subtests.test("Files are written."):
+        with atomic_write(str(path), sync=True) as file:
+            file.write(b"first")
+        assert path.read_bytes() == b"first"
+
+    with subtests.test("Failed writes leave the previous file and no temporary file."):
+        with pytest.raises(RuntimeError):
+            with atomic_write(str(path)) as file:
+                file.write(b"second")
+                raise RuntimeError()
+        assert path.read_bytes() == b"first"
+        assert [child.name for child in tmp_path.iterdir()] == ["file.bin"]
+
+
+def test_mapped_file(subtests, tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"contents")
+
+    with subtests.test("Files are mapped."):
+        with MappedFile(str(path), CorpusFormatError, "est8 file") as mapped:
+            assert mapped.buffer[:] == b"contents"
+        assert mapped.buffer.closed and mapped.file.closed
+
+    for contents in (b"", b"short"):
+        with subtests.test("Short files are rejected.", contents=contents):
+            path.write_bytes(contents)
+            with pytest.raises(CorpusFormatError, match="not an est8 file"):
+                MappedFile(str(path), CorpusFormatError, "est8 file", min_size=6)
+
+    with subtests.test("Files are closed if checking them fails."):
+        path.write_bytes(b"contents")
+        mapped = MappedFile(str(path), CorpusFormatError, "est8 file")
+        with pytest.raises(CorpusFormatError):
+            with mapped.closing_on_error():
+                raise CorpusFormatError()
+        assert mapped.buffer.closed and mapped.file.closed
@@ -0,0 +1,126 @@
+"""Tests for reading and writing game corpora."""
+
+import pytest
+
+from est8.backend.errors import CorpusFormatError, MoveError
+from est8.backend.definitions import ActionEnum, CardDefinition, CardPair
+from est8.backend.corpus import (
+    HEADER_STRUCT,
+    INDEX_ENTRY_STRUCT,
+    Corpus,
+    write_corpus,
+)
+from est8.backend.move import Move
+from est8.backend.record import GameRecord, decode_move, encode_move
+
+
+def make_record(num_turns: int, num_players: int, seed: int) -> GameRecord:
+    """Create a GameRecord with distinguishable cards and moves on every turn."""
+    draws = tuple(
+        tuple(
+            CardPair(
+                number_card=CardDefinition(
+                    (seed + turn + index) % 15 + 1, ActionEnum.bis
+                ),
+                action_card=CardDefinition(index + 1, ActionEnum.fence),
+            )
+            for index in range(3)
+        )
+        for turn in range(num_turns)
+    )
+    moves = tuple(
+        tuple(
+            Move(player_no % 3, turn % 3, (seed + turn) % 10, fence=(0, player_no + 1))
+            for player_no in range(num_players)
+        )
+        for turn in range(num_turns)
+    )
+    return GameRecord(draws=draws, moves=moves)
+
+
+def test_move_encoding(subtests):
+    with subtests.test("Fully specified move round trips."):
+        move = Move(2, 1, 10, -2, (2, 3), 4, (0, 5), (1, 11))
+        assert decode_move(encode_move(move)) == move
+
+    with subtests.test("Permit refusal round trips."):
+        assert decode_move(encode_move(Move.permit_refusal())) == Move.permit_refusal()
+
+
+def test_corpus_round_trip(subtests, tmp_path):
+    records = [make_record(5, 1, 0), make_record(0, 0, 1), make_record(20, 4, 2)]
+    path = str(tmp_path / "games.corpus")
+    write_corpus(path, records)
+
+    with Corpus.open(path) as corpus:
+        with subtests.test("Number of games is stored."):
+            assert len(corpus) == 3
+
+        with subtests.test("Whole games are read back."):
+            assert list(corpus) == records
+
+        with subtests.test("Single turns can be read directly."):
+            assert corpus.num_turns(2) == 20
+            assert corpus.get_turn(2, 13) == (
+                records[2].draws[13],
+                records[2].moves[13],
+            )
+
+        with subtests.test("Out of range games and turns are rejected."):
+            with pytest.raises(IndexError):
+                corpus.get_turn(3, 0)
+            with pytest.raises(IndexError):
+                corpus.get_turn(0, 5)
+
+
+def test_corpus_rejects_other_files(subtests, tmp_path):
+    path = tmp_path / "not_a.corpus"
+    for contents in (b"x" * 100, b"", b"EST8"):
+        with subtests.test("Other files are rejected.", size=len(contents)):
+            path.write_bytes(contents)
+            with pytest.raises(CorpusFormatError):
+                Corpus.open(str(path))
+
+
+def test_corpus_rejects_truncated_files(subtests, tmp_path):
+    path = tmp_path / "games.corpus"
+    write_corpus(str(path), [make_record(4, 2, seed) for seed in range(3)])
+    contents = path.read_bytes()
+
+    with subtests.test("Games cut short are rejected when read."):
+        path.write_bytes(contents[:-1])
+        with Corpus.open(str(path)) as corpus:
+            assert corpus.num_turns(0) == 4
+            with pytest.raises(CorpusFormatError):
+                corpus[2]
+            with pytest.raises(CorpusFormatError):
+                corpus.get_turn(2, 0)
+
+    with subtests.test("Indexes cut short are rejected when opened."):
+        path.write_bytes(contents[: HEADER_STRUCT.size + INDEX_ENTRY_STRUCT.size])
+        with pytest.raises(CorpusFormatError, match="truncated"):
+            Corpus.open(str(path))
+
+
+def test_record_rejects_unencodable_games(subtests):
+    record = make_record(3, 2, 0)
+
+    with subtests.test("Draws and moves must cover the same turns."):
+        with pytest.raises(CorpusFormatError):
+            GameRecord(draws=record.draws, moves=record.moves[:2])
+
+    with subtests.test("Every turn must have a move for every player."):
+        with pytest.raises(CorpusFormatError):
+            GameRecord(
+                draws=record.draws, moves=record.moves[:2] + (record.moves[2][:1],)
+            )
+
+    for move in (
+        Move(None, street_no=200),
+        Move(-1),
+        Move(0, fence=(-1, 2)),
+        Move(0, temp_offset=-129),
+    ):
+        with subtests.test("Moves that cannot be encoded are rejected.", move=move):
+            with pytest.raises(MoveError):
+                GameRecord(draws=record.draws[:1], moves=((move, move),))
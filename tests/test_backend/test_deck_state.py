@@ -0,0 +1,132 @@
+"""Tests for tracking the cards left in the deck."""
+
+from collections import Counter
+from fractions import Fraction
+from itertools import permutations
+from random import Random
+
+import pytest
+
+from est8.backend.definitions import (
+    ActionEnum,
+    CardDefinition,
+    DeckDefinition,
+    GameDefinition,
+)
+from est8.backend.deck_state import DeckState
+from est8.backend.errors import DeckError
+
+
+@pytest.fixture()
+def small_deck():
+    return DeckDefinition(
+        bis_numbers=(1, 2),
+        fence_numbers=(1,),
+        park_numbers=(3,),
+        invest_numbers=(),
+        pool_numbers=(),
+        temp_agency_numbers=(),
+    )
+
+
+def test_deck_state_follows_generator(subtests):
+    deck = DeckDefinition.default()
+    for no_reshuffle_last_n in (0, 3):
+        generator = deck.random_card_generator(no_reshuffle_last_n, rng=Random(2))
+        state = DeckState(deck, no_reshuffle_last_n)
+
+        with subtests.test(
+            "Every drawn card was left in the deck.", n=no_reshuffle_last_n
+        ):
+            # After the first time through, each deck is missing the held back cards.
+            num_draws = 3 * deck.deck_size - 2 * no_reshuffle_last_n
+            for _ in range(num_draws):
+                state.draw(next(generator))
+            assert state.num_reshuffles == 3
+
+        with subtests.test(
+            "Held back cards are not reshuffled.", n=no_reshuffle_last_n
+        ):
+            assert state.num_remaining == deck.deck_size - no_reshuffle_last_n
+
+
+def test_reshuffled_deck_is_the_same_size(small_deck):
+    generator = small_deck.random_card_generator(rng=Random(1))
+    cards = [next(generator) for _ in range(3 * small_deck.deck_size)]
+    assert Counter(cards) == Counter(list(small_deck.ordered_card_generator()) * 3)
+
+
+def test_next_card_probabilities(subtests, small_deck):
+    state = DeckState(small_deck)
+
+    with subtests.test("Probabilities come from the whole deck at first."):
+        assert state.number_probabilities() == {
+            1: Fraction(1, 2),
+            2: Fraction(1, 4),
+            3: Fraction(1, 4),
+        }
+        assert state.probability_of_action(ActionEnum.bis) == Fraction(1, 2)
+
+    state.draw(CardDefinition(1, ActionEnum.bis))
+
+    with subtests.test("Drawn cards are removed."):
+        assert state.probability_of_number(1) == Fraction(1, 3)
+        assert state.probability_of_action(ActionEnum.park) == Fraction(1, 3)
+        assert state.probability_of_card(CardDefinition(1, ActionEnum.bis)) == 0
+
+    with subtests.test("Cards that are not left cannot be drawn."):
+        with pytest.raises(DeckError):
+            state.draw(CardDefinition(1, ActionEnum.bis))
+
+
+def test_probability_of_number_within(subtests, small_deck):
+    """Compare against every equally likely order of two decks' worth of cards."""
+    all_cards = list(small_deck.ordered_card_generator())
+    no_reshuffle_last_n = 1
+    sequences = []
+    for first in permutations(all_cards):
+        reshuffled = list(all_cards)
+        reshuffled.remove(first[-1])
+        for second in permutations(reshuffled):
+            sequences.append(first + second)
+
+    for num_drawn in range(len(all_cards)):
+        for number in (1, 2, 3):
+            for num_draws in range(len(all_cards) * 2 - 1 - num_drawn):
+                state = DeckState(small_deck, no_reshuffle_last_n)
+                drawn = tuple(all_cards[:num_drawn])
+                for card in drawn:
+                    state.draw(card)
+
+                matching = [
+                    sequence for sequence in sequences if sequence[:num_drawn] == drawn
+                ]
+                expected = Fraction(
+                    sum(
+                        1
+                        for sequence in matching
+                        if any(
+                            card.number == number
+                            for card in sequence[num_drawn : num_drawn + num_draws]
+                        )
+                    ),
+                    len(matching),
+                )
+                with subtests.test(
+                    num_drawn=num_drawn, number=number, num_draws=num_draws
+                ):
+                    assert (
+                        state.probability_of_number_within(number, num_draws)
+                        == expected
+                    )
+
+
+def test_draw_card_pairs():
+    game_definition = GameDefinition.default()
+    rng = Random(3)
+    card_pairs_generator = game_definition.generate_card_pairs(rng)
+    state = DeckState(game_definition.deck)
+    for _ in range(40):
+        state.draw_card_pairs(next(card_pairs_generator))
+    assert state.num_reshuffles == 1
+    assert state.num_remaining == 2 * game_definition.deck.deck_size - 123
@@ -1,3 +1,5 @@
+from random import Random
+
 from est8.backend.definitions import (
     NeighbourhoodDefinition,
     DeckDefinition,
@@ -118,6 +120,9 @@ def test_scoring_definition(subtests):
         with subtests.test("Test multiple estates with some investment in each."):
             assert defn.investment_score([1, 1, 3, 6], {1: 1, 3: 3, 6: 4}) == 24
 
+        with subtests.test("Test estates larger than any valued size are worth 0."):
+            assert defn.investment_score([1, 7], {}) == 1
+
     with subtests.test("Test temp agency scoring."):
         with subtests.test("0 score if player used 0 temps."):
             assert defn.temp_agency_score(tuple(), 0) == 0
@@ -176,3 +181,11 @@ def test_deck_definition(subtests):
 
         for card in last_n_cards:
             assert id(card) in [id(_card) for _card in third_drawn_cards]
+
+
+def test_seeded_card_pairs():
+    """Test that card pairs can be reproduced by seeding the random generator."""
+    defn = GameDefinition.default()
+    first = defn.generate_card_pairs(Random(5))
+    second = defn.generate_card_pairs(Random(5))
+    assert [next(first) for _ in range(40)] == [next(second) for _ in range(40)]
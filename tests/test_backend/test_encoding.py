@@ -0,0 +1,90 @@
+"""Tests for the fixed-length encoding of a player."""
+
+import numpy as np
+import pytest
+
+from est8.backend.definitions import GameDefinition
+from est8.backend.encoding import (
+    encode_player,
+    encode_players,
+    get_encoding_size,
+    get_feature_names,
+)
+from est8.backend.house import House
+from est8.backend.player import Player
+
+
+@pytest.fixture()
+def player():
+    """Create a player with a little of everything built."""
+    player = Player.new(GameDefinition.default())
+    player.place_house(0, 0, House(number=3, has_park=True))
+    player.neighbourhood.streets[0].num_parks = 1
+    player.place_house(0, 1, House(number=3, is_bis=True))
+    player.place_house(1, 2, House(number=5, has_pool=True, built_by_temps=True))
+    player.place_house(2, 0, House(is_roundabout=True))
+    player.place_fence(0, 2)
+    player.make_investment(3)
+    return player
+
+
+def test_encode_player(subtests, player):
+    game_definition = player.game_definition
+    names = get_feature_names(game_definition)
+    encoding = encode_player(player)
+
+    with subtests.test("Every value is named."):
+        assert len(names) == len(set(names)) == get_encoding_size(game_definition)
+        assert encoding.shape == (len(names),)
+        assert encoding.dtype == np.float32
+
+    values = dict(zip(names, encoding))
+    with subtests.test("Plots are encoded."):
+        assert values["street_0_plot_0_number"] == 3
+        assert values["street_0_plot_0_park"] == 1
+        assert values["street_0_plot_1_bis"] == 1
+        assert values["street_1_plot_2_pool"] == 1
+        assert values["street_1_plot_2_temp"] == 1
+        assert values["street_2_plot_0_roundabout"] == 1
+        assert values["street_2_plot_0_number"] == 0
+        assert values["street_2_plot_1_built"] == 0
+
+    with subtests.test("Streets are encoded."):
+        assert values["street_0_fence_0"] == 1
+        assert values["street_0_fence_1"] == 0
+        assert values["street_0_fence_2"] == 1
+        assert values["street_0_parks"] == 1
+        assert values["street_1_parks"] == 0
+
+    with subtests.test("Counters and investments are encoded."):
+        assert values["biss"] == 1
+        assert values["pools"] == 1
+        assert values["roundabouts"] == 1
+        assert values["temp_agencies"] == 1
+        assert values["investments_3"] == 1
+        assert values["investments_1"] == 0
+
+    with subtests.test("Encode into a given array."):
+        buffer = np.zeros(len(names) + 2, dtype=np.float32)
+        out = encode_player(player, out=buffer[1:-1])
+        assert out.base is buffer
+        assert np.array_equal(buffer[1:-1], encoding)
+        assert buffer[0] == buffer[-1] == 0
+
+    with subtests.test("Arrays of the wrong size are rejected."):
+        with pytest.raises(ValueError):
+            encode_player(player, out=np.zeros(len(names) - 1, dtype=np.float32))
+
+
+def test_encode_players(subtests, player):
+    players = [player, Player.new(player.game_definition), player]
+
+    with subtests.test("Each row is a player's encoding."):
+        encodings = encode_players(players)
+        for row, each_player in zip(encodings, players):
+            assert np.array_equal(row, encode_player(each_player))
+
+    with subtests.test("Encode into a given array."):
+        buffer = np.zeros((3, get_encoding_size(player.game_definition)))
+        assert encode_players(players, out=buffer) is buffer
+        assert np.array_equal(buffer, encodings)
@@ -0,0 +1,96 @@
+"""Tests for finding the best fences for a street."""
+
+from itertools import product
+from random import Random
+
+from est8.backend.definitions import GameDefinition, StreetDefinition
+from est8.backend.fence_solver import (
+    get_estate_values,
+    plan_street_fences,
+    solve_fence_partition,
+)
+from est8.backend.house import House
+from est8.backend.street import Street
+
+
+def brute_force_value(fences, plot_can_be_in_estate, estate_values):
+    """Try every set of fences that could be added."""
+    free = [index for index, fence in enumerate(fences) if not fence]
+    best = 0
+    for choice in product((False, True), repeat=len(free)):
+        all_fences = list(fences)
+        for index, chosen in zip(free, choice):
+            all_fences[index] = chosen
+        positions = [index for index, fence in enumerate(all_fences) if fence]
+        best = max(
+            best,
+            sum(
+                estate_values.get(end - start, 0)
+                for start, end in zip(positions, positions[1:])
+                if all(plot_can_be_in_estate[start:end])
+            ),
+        )
+    return best
+
+
+def test_get_estate_values():
+    game_definition = GameDefinition.default()
+    values = get_estate_values(game_definition, {1: 1, 6: 10})
+    assert values[1] == 3
+    assert values[2] == 2
+    assert values[6] == 12
+
+
+def test_solve_fence_partition(subtests):
+    rng = Random(7)
+    estate_values = get_estate_values(GameDefinition.default(), {2: 2, 5: 1})
+    for attempt in range(200):
+        num_plots = rng.randint(1, 11)
+        fences = [True] + [rng.random() < 0.2 for _ in range(num_plots - 1)] + [True]
+        plot_can_be_in_estate = [rng.random() < 0.85 for _ in range(num_plots)]
+
+        plan = solve_fence_partition(fences, plot_can_be_in_estate, estate_values)
+        with subtests.test("Plan is optimal.", attempt=attempt):
+            assert plan.value == brute_force_value(
+                fences, plot_can_be_in_estate, estate_values
+            )
+
+        with subtests.test("Plan's fences make the estates.", attempt=attempt):
+            assert not any(fences[index] for index in plan.new_fences)
+            all_fences = list(fences)
+            for index in plan.new_fences:
+                all_fences[index] = True
+            positions = [index for index, fence in enumerate(all_fences) if fence]
+            estates = tuple(
+                end - start
+                for start, end in zip(positions, positions[1:])
+                if all(plot_can_be_in_estate[start:end])
+                and estate_values.get(end - start, 0) > 0
+            )
+            assert estates == plan.estates
+            assert sum(estate_values[size] for size in estates) == plan.value
+
+
+def test_plan_street_fences(subtests):
+    estate_values = get_estate_values(GameDefinition.default(), {3: 1})
+    street = Street.new(
+        StreetDefinition(num_houses=6, pool_locations=(), park_scoring=(0,))
+    )
+    for plot_no in (0, 1, 2):
+        street.place_house(plot_no, House(number=plot_no))
+
+    with subtests.test("Only complete estates count."):
+        plan = plan_street_fences(street, estate_values)
+        assert plan.new_fences == (3,)
+        assert plan.estates == (3,)
+
+    with subtests.test("Planning ahead assumes every plot is built."):
+        plan = plan_street_fences(street, estate_values, assume_all_built=True)
+        assert plan.new_fences == (3,)
+        assert plan.estates == (3, 3)
+        assert plan.value == 8
+
+    with subtests.test("Roundabouts are never part of an estate."):
+        street.place_house(3, House(is_roundabout=True))
+        plan = plan_street_fences(street, estate_values, assume_all_built=True)
+        assert plan.estates == (3, 2)
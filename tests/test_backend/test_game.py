@@ -0,0 +1,82 @@
+"""Tests for the headless Game class."""
+
+from random import Random
+
+import pytest
+
+from est8.backend.errors import HousePlacementError, MoveError
+from est8.backend.definitions import GameDefinition
+from est8.backend.game import Game
+from est8.backend.move import Move
+
+
+@pytest.fixture()
+def game():
+    return Game(GameDefinition.default(), num_players=2, rng=Random(1))
+
+
+def test_game_turns(subtests, game):
+    with subtests.test("Cannot submit moves before drawing."):
+        with pytest.raises(MoveError):
+            game.submit_move(0, Move(0, 0, 0))
+
+    card_pairs = game.draw()
+
+    with subtests.test("Cannot end turn until every player has moved."):
+        game.submit_move(0, Move(0, 0, 0))
+        with pytest.raises(MoveError):
+            game.end_turn()
+
+    with subtests.test("Invalid moves are rejected without being applied."):
+        with pytest.raises(HousePlacementError):
+            game.submit_move(1, Move(1, 5, 0))
+        assert game.players[1].neighbourhood.streets[0].houses[0] is None
+
+    with subtests.test("Moves are applied when the turn ends."):
+        game.submit_move(1, Move(1, 0, 0))
+        assert game.players[0].neighbourhood.streets[0].houses[0] is None
+        game.end_turn()
+        assert game.turn == 1
+        assert (
+            game.players[0].neighbourhood.streets[0].houses[0].number
+            == card_pairs[0].number_card.number
+        )
+        assert game.to_record().moves == ((Move(0, 0, 0), Move(1, 0, 0)),)
+
+    with subtests.test("Moves are validated against the player's updated state."):
+        game.draw()
+        with pytest.raises(HousePlacementError):
+            game.submit_move(0, Move(0, 0, 0))
+
+
+def test_game_over(subtests, game):
+    with subtests.test("Game ends after enough permit refusals."):
+        for _ in range(3):
+            assert not game.is_over
+            game.play_turn([Move.permit_refusal(), Move.permit_refusal()])
+        assert game.is_over
+        assert game.scores() == (-5, -5)
+
+
+def test_game_scores_temps_across_players(game):
+    """Test that temp agency scoring compares against every player in the game."""
+    game.players[0].num_temp_agencies = 2
+    game.players[1].num_temp_agencies = 1
+    temp_scores = GameDefinition.default().scoring.temp_agency
+    assert game.scores() == (temp_scores[0], temp_scores[1])
+
+
+def test_automatic_permit_refusal(subtests, game):
+    # Fill every plot of the first player's neighbourhood.
+    for street in game._validators[0].streets:
+        for plot_no in range(street.num_houses):
+            street.place_number(plot_no, plot_no)
+
+    with subtests.test("Players with no placement refuse automatically."):
+        game.draw()
+        assert game._pending_moves == [Move.permit_refusal(), None]
+
+    with subtests.test("The refusal is counted once the turn ends."):
+        game.submit_move(1, Move(0, 0, 0))
+        game.end_turn()
+        assert game.players[0].num_permit_refusals == 1
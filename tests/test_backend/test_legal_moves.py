@@ -0,0 +1,150 @@
+"""Tests for generating legal moves."""
+
+from itertools import product
+from random import Random
+
+from est8.backend.errors import Est8Error
+from est8.backend.definitions import (
+    ActionEnum,
+    CardDefinition,
+    CardPair,
+    GameDefinition,
+)
+from est8.backend.legal_moves import (
+    generate_legal_moves,
+    has_any_legal_placement,
+    has_legal_placement,
+)
+from est8.backend.move import Move
+from est8.backend.policies import GreedyPolicy, RandomPolicy
+from est8.backend.transcript import MoveValidator
+
+
+def is_legal(state: MoveValidator, card_pairs, move: Move) -> bool:
+    try:
+        state.copy().check_and_apply(card_pairs, move)
+    except Est8Error:
+        return False
+    return True
+
+
+def all_candidate_moves(state: MoveValidator, card_pairs):
+    """Brute force every move with at most one action, on any plot or fence."""
+    locations = [
+        (street_no, index)
+        for street_no, street in enumerate(state.streets)
+        for index in range(street.num_houses + 1)
+    ]
+    for card_pair_index, (street_no, plot_no), temp_offset in product(
+        range(len(card_pairs)), locations, range(-2, 3)
+    ):
+        base = dict(
+            card_pair_index=card_pair_index,
+            street_no=street_no,
+            plot_no=plot_no,
+            temp_offset=temp_offset,
+        )
+        yield Move(**base)
+        for location in locations:
+            yield Move(**base, fence=location)
+            yield Move(**base, bis=location)
+        for estate_size in range(0, 8):
+            yield Move(**base, invest_estate_size=estate_size)
+
+
+def test_generate_legal_moves(subtests):
+    game_definition = GameDefinition.default()
+    rng = Random(3)
+    card_pairs = tuple(
+        CardPair(CardDefinition(number, ActionEnum.pool), CardDefinition(1, action))
+        for number, action in (
+            (6, ActionEnum.fence),
+            (9, ActionEnum.bis),
+            (11, ActionEnum.temp),
+        )
+    )
+
+    state = MoveValidator(game_definition)
+    for turn in range(4):
+        legal = set(generate_legal_moves(state, card_pairs))
+
+        with subtests.test("Generated moves are exactly the legal moves.", turn=turn):
+            expected = {
+                move
+                for move in all_candidate_moves(state, card_pairs)
+                if is_legal(state, card_pairs, move)
+            }
+            assert legal == expected
+
+        random_pairs = next(game_definition.generate_card_pairs(rng))
+        state.check_and_apply(
+            random_pairs, RandomPolicy(rng).choose_move(state, random_pairs)
+        )
+
+
+def test_generate_legal_moves_with_roundabouts(subtests):
+    game_definition = GameDefinition.default()
+    card_pairs = next(game_definition.generate_card_pairs(Random(0)))
+    state = MoveValidator(game_definition)
+
+    moves = list(generate_legal_moves(state, card_pairs, include_roundabouts=True))
+
+    with subtests.test("Roundabout moves are generated and legal."):
+        roundabout_moves = [move for move in moves if move.roundabout is not None]
+        assert roundabout_moves
+        assert all(is_legal(state, card_pairs, move) for move in roundabout_moves)
+
+    with subtests.test("No roundabouts once the maximum is built."):
+        state.num_roundabouts = game_definition.max_roundabouts
+        moves = generate_legal_moves(state, card_pairs, include_roundabouts=True)
+        assert all(move.roundabout is None for move in moves)
+
+
+def test_permit_refusal_when_no_moves():
+    state = MoveValidator(GameDefinition.default())
+    for street in state.streets:
+        for plot_no in range(street.num_houses):
+            street.place_number(plot_no, plot_no)
+    card_pairs = next(GameDefinition.default().generate_card_pairs())
+    assert list(generate_legal_moves(state, card_pairs)) == [Move.permit_refusal()]
+
+
+def test_policies_choose_legal_moves():
+    game_definition = GameDefinition.default()
+    rng = Random(4)
+    for policy in (RandomPolicy(rng), GreedyPolicy(rng=rng)):
+        state = MoveValidator(game_definition)
+        for card_pairs in [next(game_definition.generate_card_pairs(rng))] * 10:
+            move = policy.choose_move(state, card_pairs)
+            state.check_and_apply(card_pairs, move)
+
+
+def test_has_legal_placement(subtests):
+    game_definition = GameDefinition.default()
+    rng = Random(5)
+    state = MoveValidator(game_definition)
+    policy = GreedyPolicy(rng=rng)
+
+    for turn in range(40):
+        for number in range(-3, 21):
+            with subtests.test("Matches trying every plot.", turn=turn, number=number):
+                card_pairs = (
+                    CardPair(
+                        CardDefinition(number, ActionEnum.pool),
+                        CardDefinition(1, ActionEnum.pool),
+                    ),
+                )
+                moves = generate_legal_moves(
+                    state, card_pairs, include_roundabouts=True
+                )
+                assert has_legal_placement(state, number) == (
+                    next(moves) != Move.permit_refusal()
+                )
+
+        card_pairs = next(game_definition.generate_card_pairs(rng))
+        with subtests.test("Any card pair can be placed.", turn=turn):
+            moves = generate_legal_moves(state, card_pairs, include_roundabouts=True)
+            assert has_any_legal_placement(state, card_pairs) == (
+                next(moves) != Move.permit_refusal()
+            )
+        state.check_and_apply(card_pairs, policy.choose_move(state, card_pairs))
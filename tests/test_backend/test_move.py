@@ -0,0 +1,86 @@
+"""Tests for applying Moves to a Player."""
+
+import pytest
+
+from est8.backend.errors import MoveError, HousePlacementError
+from est8.backend.definitions import (
+    ActionEnum,
+    CardDefinition,
+    CardPair,
+    GameDefinition,
+)
+from est8.backend.move import Move, apply_move
+from est8.backend.player import Player
+
+
+def make_card_pairs(*number_actions):
+    """Create a tuple of CardPairs from (number, action) tuples."""
+    return tuple(
+        CardPair(
+            number_card=CardDefinition(number, ActionEnum.bis),
+            action_card=CardDefinition(1, action),
+        )
+        for number, action in number_actions
+    )
+
+
+@pytest.fixture()
+def player():
+    return Player.new(GameDefinition.default())
+
+
+def test_apply_move(subtests, player):
+    """Test that applying moves builds the expected houses and actions."""
+    card_pairs = make_card_pairs(
+        (3, ActionEnum.fence), (5, ActionEnum.pool), (7, ActionEnum.temp)
+    )
+
+    with subtests.test("Permit refusal increases refusal counter."):
+        apply_move(player, card_pairs, Move.permit_refusal())
+        assert player.num_permit_refusals == 1
+
+    with subtests.test("House and fence are both built."):
+        apply_move(player, card_pairs, Move(0, 0, 1, fence=(0, 2)))
+        assert player.neighbourhood.streets[0].houses[1].number == 3
+        assert player.neighbourhood.streets[0].fences[2] is True
+
+    with subtests.test("Pool is built at a pool location."):
+        apply_move(player, card_pairs, Move(1, 0, 2))
+        assert player.neighbourhood.streets[0].houses[2].has_pool is True
+        assert player.num_pools == 1
+
+    with subtests.test("Temp agency adjusts house number."):
+        apply_move(player, card_pairs, Move(2, 0, 3, temp_offset=-1))
+        assert player.neighbourhood.streets[0].houses[3].number == 6
+        assert player.num_temp_agencies == 1
+
+    with subtests.test("Roundabout is built alongside house."):
+        apply_move(player, card_pairs, Move(0, 1, 1, roundabout=(1, 0)))
+        assert player.neighbourhood.streets[1].houses[0].is_roundabout is True
+        assert player.num_roundabouts == 1
+
+
+def test_apply_move_is_validated(subtests, player):
+    """Test that invalid moves are rejected."""
+    card_pairs = make_card_pairs(
+        (3, ActionEnum.fence), (5, ActionEnum.bis), (7, ActionEnum.temp)
+    )
+
+    with subtests.test("Cannot use a card pair that was not drawn."):
+        with pytest.raises(MoveError):
+            apply_move(player, card_pairs, Move(3, 0, 0))
+
+    with subtests.test("Cannot use an action not on the card."):
+        with pytest.raises(MoveError):
+            apply_move(player, card_pairs, Move(1, 0, 0, fence=(0, 1)))
+        with pytest.raises(MoveError):
+            apply_move(player, card_pairs, Move(0, 0, 0, invest_estate_size=1))
+
+    with subtests.test("Temp agency offset is limited."):
+        with pytest.raises(MoveError):
+            apply_move(player, card_pairs, Move(2, 0, 0, temp_offset=3))
+
+    with subtests.test("Placement rules are still checked."):
+        apply_move(player, card_pairs, Move(1, 0, 5))
+        with pytest.raises(HousePlacementError):
+            apply_move(player, card_pairs, Move(0, 0, 6))
@@ -0,0 +1,103 @@
+"""Tests for incremental plan completion."""
+
+from dataclasses import replace
+
+import pytest
+
+from est8.backend.definitions import GameDefinition, PlanDefinition
+from est8.backend.house import House
+from est8.backend.move import Move
+from est8.backend.plans import PlanRace, PlanTracker, streets_changed_by_move
+from est8.backend.player import Player
+
+
+@pytest.fixture()
+def game_definition():
+    return replace(
+        GameDefinition.default(),
+        plans=(
+            PlanDefinition((6, 2), (3,)),
+            PlanDefinition((8, 3), (2, 3)),
+            PlanDefinition((11, 5), ()),
+        ),
+    )
+
+
+def build_estate(player, street_no, start, size):
+    """Build houses on plots start to start + size - 1, fenced off at both ends."""
+    street = player.neighbourhood.streets[street_no]
+    for plot_no in range(start, start + size):
+        player.place_house(street_no, plot_no, House(number=plot_no))
+    for fence_index in (start, start + size):
+        if not street.fences[fence_index]:
+            player.place_fence(street_no, fence_index)
+
+
+def test_streets_changed_by_move(subtests):
+    with subtests.test("Permit refusals change nothing."):
+        assert streets_changed_by_move(Move.permit_refusal()) == set()
+
+    with subtests.test("Every street touched by the move is included."):
+        move = Move(0, 1, 2, fence=(2, 4), roundabout=(0, 5))
+        assert streets_changed_by_move(move) == {0, 1, 2}
+
+
+def test_plan_tracker(subtests, game_definition):
+    player = Player.new(game_definition)
+    tracker = PlanTracker(player)
+
+    with subtests.test("Nothing is complete at the start."):
+        assert tracker.update() == []
+
+    build_estate(player, 0, 0, 3)
+
+    with subtests.test("Changes are not seen until the street is re-read."):
+        assert tracker.update() == []
+
+    with subtests.test("A plan is completed once its estates exist."):
+        tracker.street_changed(0)
+        assert tracker.update() == [0]
+        assert tracker.complete_plan(0, first=False) == 2
+        assert player.plans_completed == [2, None, None]
+
+    with subtests.test("Estates used for one plan can't be used for another."):
+        build_estate(player, 1, 0, 2)
+        tracker.street_changed(1)
+        assert tracker.update() == []
+
+    with subtests.test("Splitting a used estate doesn't free any of it."):
+        player.place_fence(0, 1)
+        tracker.street_changed(0)
+        assert tracker.update() == []
+
+    with subtests.test("Another matching estate completes the plan."):
+        build_estate(player, 2, 4, 3)
+        tracker.street_changed(2)
+        assert tracker.update() == [1]
+
+    with subtests.test("Plans with no estates are never completed."):
+        for street_no in range(3):
+            tracker.street_changed(street_no)
+        assert tracker.update() == []
+
+
+def test_plan_race(subtests, game_definition):
+    players = [Player.new(game_definition) for _ in range(3)]
+    race = PlanRace(players)
+
+    build_estate(players[0], 0, 0, 3)
+    build_estate(players[1], 1, 2, 3)
+
+    with subtests.test("Players completing a plan on the same turn both score first."):
+        assert race.end_turn() == [(0, 0, 6), (1, 0, 6)]
+
+    build_estate(players[2], 0, 0, 3)
+
+    with subtests.test("Later players score second."):
+        assert race.end_turn([Move(0, 0, 0), Move.permit_refusal(), Move(0, 0, 1)]) == [
+            (2, 0, 2)
+        ]
+
+    with subtests.test("Plans count towards the score."):
+        assert players[0].get_score_breakdown()["plans"] == 6
+        assert players[2].get_score_breakdown()["plans"] == 2
@@ -0,0 +1,98 @@
+"""Tests for replaying recorded games."""
+
+from dataclasses import replace
+
+import pytest
+
+from est8.backend.errors import HousePlacementError
+from est8.backend.definitions import (
+    ActionEnum,
+    CardDefinition,
+    CardPair,
+    GameDefinition,
+)
+from est8.backend.move import Move
+from est8.backend.record import GameRecord
+from est8.backend.replay import replay, rescore
+
+
+def make_card_pairs(*number_actions):
+    """Create a tuple of CardPairs from (number, action) tuples."""
+    return tuple(
+        CardPair(
+            number_card=CardDefinition(number, ActionEnum.bis),
+            action_card=CardDefinition(1, action),
+        )
+        for number, action in number_actions
+    )
+
+
+@pytest.fixture()
+def game_definition():
+    return GameDefinition.default()
+
+
+@pytest.fixture()
+def record():
+    """A two player game touching every kind of move."""
+    return GameRecord(
+        draws=(
+            make_card_pairs(
+                (1, ActionEnum.fence), (2, ActionEnum.park), (3, ActionEnum.temp)
+            ),
+            make_card_pairs(
+                (4, ActionEnum.bis), (5, ActionEnum.pool), (6, ActionEnum.invest)
+            ),
+            make_card_pairs(
+                (7, ActionEnum.temp), (8, ActionEnum.fence), (9, ActionEnum.park)
+            ),
+        ),
+        moves=(
+            (Move(0, 0, 0, fence=(0, 1)), Move(2, 1, 0, temp_offset=2)),
+            (Move(0, 0, 1, bis=(0, 2)), Move(2, 1, 1, invest_estate_size=1)),
+            (Move(1, 0, 3, fence=(0, 4), roundabout=(0, 5)), Move.permit_refusal()),
+        ),
+    )
+
+
+def test_replay(subtests, game_definition, record):
+    with subtests.test("Trusted replay matches verified replay."):
+        assert replay(game_definition, record) == replay(
+            game_definition, record, verify=True
+        )
+
+    players = replay(game_definition, record)
+
+    with subtests.test("Houses and actions are all applied."):
+        assert str(players[0].neighbourhood.streets[0]) == "|1|4.4B.8| |R| . . . |"
+        assert players[0].num_biss == 1
+        assert players[0].num_roundabouts == 1
+        assert players[1].num_temp_agencies == 1
+        assert players[1].investments[1] == 1
+        assert players[1].num_permit_refusals == 1
+
+
+def test_replay_verify(game_definition, record):
+    """Test that verify mode catches invalid moves that trusted replay would allow."""
+    bad_record = replace(
+        record, moves=record.moves[:2] + ((Move(0, 0, 0), Move(0, 0, 0)),)
+    )
+    replay(game_definition, bad_record)
+    with pytest.raises(HousePlacementError):
+        replay(game_definition, bad_record, verify=True)
+
+
+def test_rescore(subtests, game_definition, record):
+    (scores,) = rescore(game_definition, [record])
+
+    with subtests.test("Scores match scoring each replayed player."):
+        players = replay(game_definition, record)
+        assert scores == (
+            players[0].get_score((players[1].num_temp_agencies,)),
+            players[1].get_score((players[0].num_temp_agencies,)),
+        )
+
+    with subtests.test("Rescoring uses the new scoring definition."):
+        new_scoring = replace(game_definition.scoring, roundabout=(0, -100))
+        (new_scores,) = rescore(replace(game_definition, scoring=new_scoring), [record])
+        assert new_scores == (scores[0] - 97, scores[1])
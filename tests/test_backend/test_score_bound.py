@@ -0,0 +1,89 @@
+"""Tests for the upper bound on a player's final score."""
+
+from random import Random
+
+from est8.backend.definitions import GameDefinition
+from est8.backend.game import Game
+from est8.backend.player import Player
+from est8.backend.policies import GreedyPolicy, RandomPolicy
+from est8.backend.replay import apply_move_unchecked
+from est8.backend.score_bound import ScoreBound, best_score_in_range
+
+
+def test_best_score_in_range(subtests):
+    with subtests.test("Counts past the end of the table use its last score."):
+        assert best_score_in_range((0, 2, 5), 1, 10) == 5
+
+    with subtests.test("Decreasing tables keep the current score."):
+        assert best_score_in_range((0, -1, -3), 1, 2) == -1
+
+    with subtests.test("Empty ranges use the current count."):
+        assert best_score_in_range((0, -1, -3), 2, 1) == -3
+
+
+def test_new_player_bound():
+    game_definition = GameDefinition.default()
+    bound = ScoreBound(Player.new(game_definition)).breakdown()
+    scoring = game_definition.scoring
+    assert bound["bis"] == 0
+    assert bound["pools"] == max(scoring.pool)
+    assert bound["temp_agencies"] == max(scoring.temp_agency)
+    assert bound["parks"] == sum(
+        max(street.park_scoring) for street in game_definition.neighbourhood.streets
+    )
+
+
+def test_bound_is_admissible(subtests):
+    game_definition = GameDefinition.default()
+    rng = Random(11)
+    for game_no, policy in enumerate((RandomPolicy(rng), GreedyPolicy(rng=rng))):
+        game = Game(game_definition, rng=rng)
+        player = game.players[0]
+        score_bound = ScoreBound(player)
+        bounds = [score_bound.breakdown()]
+
+        while not game.is_over:
+            card_pairs = game.draw()
+            move = policy.choose_move(game._validators[0], card_pairs)
+            game.play_turn([move])
+            score_bound.update(move)
+            bounds.append(score_bound.breakdown())
+
+            with subtests.test(
+                "Incremental bound matches a fresh one.", turn=game.turn
+            ):
+                assert bounds[-1] == ScoreBound(player).breakdown()
+
+        final = player.get_score_breakdown(temp_agency_score=game.temp_ranking.score(0))
+        for turn, bound in enumerate(bounds):
+            with subtests.test("Bound is never exceeded.", game_no=game_no, turn=turn):
+                for category, score in final.items():
+                    assert score <= bound[category], category
+                assert sum(final.values()) <= sum(bound.values())
+
+        with subtests.test("Bounds never increase.", game_no=game_no):
+            values = [sum(bound.values()) for bound in bounds]
+            assert values == sorted(values, reverse=True)
+
+
+def test_copied_bound_is_independent(subtests):
+    game_definition = GameDefinition.default()
+    rng = Random(4)
+    game = Game(game_definition, rng=rng)
+    policy = GreedyPolicy(rng=rng)
+    player = game.players[0]
+    score_bound = ScoreBound(player)
+    before = score_bound.breakdown()
+
+    card_pairs = game.draw()
+    move = policy.choose_move(game.get_validator(0), card_pairs)
+    next_player = player.copy()
+    next_bound = score_bound.copy(next_player)
+    apply_move_unchecked(next_player, card_pairs, move)
+    next_bound.update(move)
+
+    with subtests.test("The copy follows its own player."):
+        assert next_bound.breakdown() == ScoreBound(next_player).breakdown()
+
+    with subtests.test("The original bound is unchanged."):
+        assert score_bound.breakdown() == before
@@ -0,0 +1,100 @@
+"""Tests for emitting and applying StateDeltas."""
+
+from random import Random
+
+import mock
+
+from est8.backend.definitions import GameDefinition
+from est8.backend.game import Game
+from est8.backend.policies import RandomPolicy
+from est8.backend.state_delta import (
+    DeltaTracker,
+    PlayerMirror,
+    PlayerSnapshot,
+    StateDelta,
+    diff_snapshots,
+)
+from est8.backend.transcript import MoveValidator
+
+
+def play_mirrored_game(seed: int) -> Game:
+    """Play a game, checking every mirror matches its player after each turn."""
+    game_definition = GameDefinition.default()
+    rng = Random(seed)
+    game = Game(game_definition, num_players=3, rng=rng)
+    policy = RandomPolicy(rng)
+    states = [MoveValidator(game_definition) for _ in game.players]
+    tracker = DeltaTracker(game.players)
+    mirrors = [PlayerMirror(game_definition) for _ in game.players]
+
+    while not game.is_over:
+        card_pairs = game.draw()
+        for player_no, state in enumerate(states):
+            move = policy.choose_move(state, card_pairs)
+            state.check_and_apply(card_pairs, move)
+            game.submit_move(player_no, move)
+        game.end_turn()
+
+        for mirror, delta in zip(mirrors, tracker.emit()):
+            mirror.apply(delta)
+
+        for player, mirror, score in zip(game.players, mirrors, game.scores()):
+            assert mirror.player == player
+            assert mirror.score == score
+
+    assert all(delta.is_empty for delta in tracker.emit())
+    return game
+
+
+def test_mirrors_stay_in_sync(subtests):
+    with subtests.test("Mirrors match in a game where no plans are completed."):
+        game = play_mirrored_game(2)
+        assert not any(any(player.plans_completed) for player in game.players)
+
+    with subtests.test("Mirrors match in a game where plans are completed."):
+        game = play_mirrored_game(3)
+        assert any(any(player.plans_completed) for player in game.players)
+
+
+def test_diff_snapshots(subtests):
+    game = Game(GameDefinition.default(), rng=Random(0))
+    player = game.players[0]
+    before = PlayerSnapshot.take(player)
+
+    player.place_fence(1, 4)
+    player.make_investment(2)
+    player.num_permit_refusals += 1
+    delta = diff_snapshots(before, PlayerSnapshot.take(player))
+
+    with subtests.test("Only changes are included."):
+        assert delta == StateDelta(
+            fences=((1, 4),),
+            counters=(("num_permit_refusals", 1),),
+            investments=((2, 1),),
+        )
+
+
+def test_tracker_uses_pushed_temp_scores():
+    game_definition = GameDefinition.default()
+    rng = Random(5)
+    game = Game(game_definition, num_players=6, rng=rng)
+    policy = RandomPolicy(rng)
+    tracker = DeltaTracker(game.players, game.temp_ranking)
+    game.temp_ranking.on_score_change = tracker.set_temp_agency_score
+    mirrors = [PlayerMirror(game_definition) for _ in game.players]
+
+    while not game.is_over:
+        card_pairs = game.draw()
+        for player_no in range(game.num_players):
+            move = policy.choose_move(game.get_validator(player_no), card_pairs)
+            game.submit_move(player_no, move)
+        game.end_turn()
+
+        # Scores must come from the pushed updates rather than ranking every player.
+        with mock.patch.object(game.temp_ranking, "score", side_effect=AssertionError):
+            deltas = tracker.emit()
+        for mirror, delta in zip(mirrors, deltas):
+            mirror.apply(delta)
+
+    assert [mirror.score for mirror in mirrors] == list(game.scores())
+    assert any(breakdown["temp_agencies"] for breakdown in game.score_breakdowns())
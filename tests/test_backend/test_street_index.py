@@ -0,0 +1,69 @@
+"""Tests for the StreetIndex class."""
+
+from random import Random
+
+from est8.backend.errors import HousePlacementError
+from est8.backend.definitions import NeighbourhoodDefinition
+from est8.backend.house import House
+from est8.backend.street import Street
+from est8.backend.street_index import StreetIndex
+
+
+def is_valid_on_street(street: Street, plot_no: int, house: House) -> bool:
+    try:
+        street.assert_place_house_is_valid(plot_no, house)
+    except HousePlacementError:
+        return False
+    return True
+
+
+def test_index_matches_street(subtests):
+    """Test that the index agrees with the Street's own checks as a street fills up."""
+    rng = Random(8)
+    definition = NeighbourhoodDefinition.default().streets[2]
+
+    for game in range(20):
+        street = Street.new(definition)
+        index = StreetIndex(definition)
+
+        for _ in range(30):
+            plot_no = rng.randrange(definition.num_houses)
+            house = House(
+                number=rng.randrange(18),
+                is_roundabout=rng.random() < 0.1,
+                is_bis=rng.random() < 0.1,
+            )
+            if rng.random() < 0.2:
+                fence_index = rng.randrange(1, definition.num_houses)
+                if not street.fences[fence_index]:
+                    street.place_fence(fence_index)
+                    index.place_fence(fence_index)
+
+            if not is_valid_on_street(street, plot_no, house):
+                continue
+            street.place_house(plot_no, house)
+            if house.is_roundabout:
+                index.place_roundabout(plot_no)
+            else:
+                index.place_number(plot_no, house.number)
+
+            for number in range(18):
+                for other_plot in range(definition.num_houses):
+                    assert index.can_place_number(
+                        other_plot, number
+                    ) == is_valid_on_street(street, other_plot, House(number))
+
+            for other_plot in range(definition.num_houses):
+                left_no, right_no = street.get_possible_bis_numbers(other_plot)
+                expected = left_no if left_no is not None else right_no
+                if street.houses[other_plot] is not None:
+                    expected = None
+                assert index.get_bis_number(other_plot) == expected
+
+        with subtests.test("Index built from street matches incremental index."):
+            rebuilt = StreetIndex.from_street(street)
+            assert rebuilt.fences == index.fences
+            for plot_no in range(definition.num_houses):
+                if not index.is_built[plot_no]:
+                    assert rebuilt.lower[plot_no] == index.lower[plot_no]
+                    assert rebuilt.upper[plot_no] == index.upper[plot_no]
@@ -0,0 +1,78 @@
+"""Tests for the incrementally maintained temp agency podium."""
+
+from random import Random
+
+from est8.backend.definitions import GameDefinition
+from est8.backend.temp_ranking import TempAgencyRanking
+
+
+def expected_score(game_definition, all_temps, player_no):
+    return game_definition.scoring.temp_agency_score(
+        tuple(all_temps), all_temps[player_no]
+    )
+
+
+def test_podium_positions(subtests):
+    ranking = TempAgencyRanking(GameDefinition.default(), num_players=4)
+
+    with subtests.test("Players without temps are unranked."):
+        assert ranking.podium_position(0) is None
+        assert ranking.score(0) == 0
+
+    ranking.set_temps(0, 3)
+    ranking.set_temps(1, 3)
+    ranking.set_temps(2, 1)
+
+    with subtests.test("Ties share a podium position."):
+        assert ranking.podium_position(0) == 0
+        assert ranking.podium_position(1) == 0
+        assert ranking.podium_position(2) == 1
+        assert ranking.podium_position(3) is None
+
+    with subtests.test("Overtaking moves the others down."):
+        changed = ranking.set_temps(3, 4)
+        assert changed == [0, 1, 2, 3]
+        assert ranking.podium_position(2) == 2
+
+    with subtests.test("Extending a lead changes nobody's position."):
+        assert ranking.set_temps(3, 5) == []
+
+    with subtests.test("Temps beyond the number of plots are still ranked."):
+        ranking.set_temps(3, 100)
+        assert ranking.podium_position(3) == 0
+        assert ranking.podium_position(0) == 1
+
+
+def test_matches_scoring_definition(subtests):
+    game_definition = GameDefinition.default()
+    num_players = 30
+    rng = Random(3)
+    notified = []
+    ranking = TempAgencyRanking(
+        game_definition,
+        num_players,
+        on_score_change=lambda player_no, score: notified.append((player_no, score)),
+    )
+    all_temps = [0] * num_players
+
+    for _ in range(300):
+        positions = [ranking.podium_position(n) for n in range(num_players)]
+        player_no = rng.randrange(num_players)
+        all_temps[player_no] = min(all_temps[player_no] + rng.randint(1, 2), 33)
+        notified.clear()
+        changed = ranking.set_temps(player_no, all_temps[player_no])
+
+        with subtests.test("Scores match.", player_no=player_no):
+            for other_player_no in range(num_players):
+                assert ranking.score(other_player_no) == expected_score(
+                    game_definition, all_temps, other_player_no
+                )
+
+        with subtests.test("Exactly the players that moved are notified."):
+            moved = [
+                n
+                for n in range(num_players)
+                if ranking.podium_position(n) != positions[n]
+            ]
+            assert changed == moved
+            assert notified == [(n, ranking.score(n)) for n in moved]
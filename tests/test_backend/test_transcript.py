@@ -0,0 +1,94 @@
+"""Tests for validating whole game transcripts."""
+
+from est8.backend.errors import (
+    BisPlacementError,
+    FencePlacementError,
+    HousePlacementError,
+    InvestmentError,
+    MoveError,
+    RoundaboutPlacementError,
+)
+from est8.backend.definitions import (
+    ActionEnum,
+    CardDefinition,
+    CardPair,
+    GameDefinition,
+)
+from est8.backend.move import Move
+from est8.backend.transcript import validate_transcript
+
+
+def make_card_pairs(*number_actions):
+    """Create a tuple of CardPairs from (number, action) tuples."""
+    return tuple(
+        CardPair(
+            number_card=CardDefinition(number, ActionEnum.bis),
+            action_card=CardDefinition(1, action),
+        )
+        for number, action in number_actions
+    )
+
+
+DRAW = make_card_pairs(
+    (5, ActionEnum.fence), (6, ActionEnum.bis), (7, ActionEnum.invest)
+)
+
+
+def test_validate_transcript(subtests):
+    game_definition = GameDefinition.default()
+
+    def first_violation(*moves):
+        return validate_transcript(game_definition, [DRAW] * len(moves), moves)
+
+    with subtests.test("Valid transcript has no violation."):
+        assert (
+            first_violation(
+                Move(0, 0, 4, fence=(0, 5)),
+                Move(1, 0, 5, bis=(0, 6)),
+                Move(2, 0, 7, invest_estate_size=1, roundabout=(0, 3)),
+                Move.permit_refusal(),
+            )
+            is None
+        )
+
+    cases = [
+        ("Card pair not drawn.", Move(3, 0, 0), MoveError),
+        ("Action not on card.", Move(0, 0, 0, invest_estate_size=1), MoveError),
+        ("House out of order.", Move(0, 0, 9), HousePlacementError),
+        ("Plot not empty.", Move(1, 0, 3), HousePlacementError),
+        ("Bis with no neighbour.", Move(1, 1, 0, bis=(1, 5)), BisPlacementError),
+        ("Fence already built.", Move(0, 1, 0, fence=(1, 0)), FencePlacementError),
+        ("Fence off street.", Move(0, 1, 0, fence=(5, 1)), FencePlacementError),
+        (
+            "Invest in unknown size.",
+            Move(2, 1, 0, invest_estate_size=9),
+            InvestmentError,
+        ),
+        ("Invalid street.", Move(2, 3, 0), HousePlacementError),
+    ]
+    for description, bad_move, error_type in cases:
+        with subtests.test(description):
+            violation = first_violation(Move(0, 0, 3), bad_move, Move(0, 2, 0))
+            assert violation.turn_index == 1
+            assert isinstance(violation.error, error_type)
+
+    with subtests.test("Too many roundabouts."):
+        violation = first_violation(
+            Move(0, 0, 0, roundabout=(0, 1)),
+            Move(0, 1, 0, roundabout=(1, 1)),
+            Move(0, 2, 0, roundabout=(2, 1)),
+        )
+        assert violation.turn_index == 2
+        assert isinstance(violation.error, RoundaboutPlacementError)
+
+    with subtests.test("Too many investments."):
+        violation = first_violation(
+            *(Move(2, street_no, 0, invest_estate_size=1) for street_no in range(3))
+        )
+        assert violation.turn_index == 1
+        assert isinstance(violation.error, InvestmentError)
+
+    with subtests.test("More moves than draws."):
+        violation = validate_transcript(game_definition, [DRAW], [Move(0, 0, 0)] * 2)
+        assert violation.turn_index == 1
+        assert isinstance(violation.error, MoveError)
@@ -0,0 +1,88 @@
+"""Tests for the vectorized game environment."""
+
+from random import Random
+
+import numpy as np
+import pytest
+
+from est8.backend.errors import MoveError
+from est8.backend.legal_moves import generate_legal_moves
+from est8.env import ACTIONS, VectorEnv
+
+NUM_PLOTS = 5
+
+
+def test_reset(subtests, tiny_game_definition):
+    env = VectorEnv(tiny_game_definition, num_envs=3, seed=1)
+    observations = env.reset()
+
+    with subtests.test("Observations are written to the same array."):
+        assert observations is env.observations
+        assert observations.shape == (3, env.num_features)
+        assert observations.dtype == np.float32
+
+    with subtests.test("A new neighbourhood is empty."):
+        assert not observations[:, : 7 * NUM_PLOTS].any()
+
+    with subtests.test("The cards drawn are observed."):
+        for env_no in range(3):
+            card_pairs = env._card_pairs[env_no]
+            row = observations[env_no]
+            start = env.num_features - len(card_pairs) * (1 + len(ACTIONS))
+            for card_pair in card_pairs:
+                assert row[start] == card_pair.number_card.number
+                assert row[start + 1 + ACTIONS.index(card_pair.action_card.action)]
+                assert row[start + 1 : start + 1 + len(ACTIONS)].sum() == 1
+                start += 1 + len(ACTIONS)
+
+
+def test_step(subtests, tiny_game_definition):
+    env = VectorEnv(tiny_game_definition, num_envs=4, seed=2)
+    env.reset()
+    rng = Random(3)
+    totals = np.zeros(4)
+    num_finished = 0
+
+    while num_finished < 8:
+        for env_no in range(4):
+            legal_moves = list(
+                generate_legal_moves(env._states[env_no], env._card_pairs[env_no])
+            )
+            with subtests.test("Masks allow the action of every legal move."):
+                assert set(np.flatnonzero(env.action_masks[env_no])) == {
+                    env.get_action(move) for move in legal_moves
+                }
+
+        actions = [
+            rng.choice(np.flatnonzero(env.action_masks[env_no])) for env_no in range(4)
+        ]
+        observations, rewards, dones = env.step(actions)
+        with subtests.test("Results are written to the same arrays."):
+            assert observations is env.observations
+            assert rewards is env.rewards
+            assert dones is env.dones
+
+        totals += rewards
+        for env_no in np.flatnonzero(dones):
+            with subtests.test("Rewards add up to the final score."):
+                assert totals[env_no] == env.final_scores[env_no]
+            totals[env_no] = 0
+            num_finished += 1
+
+    with subtests.test("Illegal actions are rejected."):
+        illegal = int(np.flatnonzero(~env.action_masks[0])[0])
+        with pytest.raises(MoveError):
+            env.step([illegal, 0, 0, 0])
+
+    with subtests.test("No game is stepped if any action is illegal."):
+        legal = [
+            int(np.flatnonzero(env.action_masks[env_no])[0]) for env_no in range(3)
+        ]
+        illegal = int(np.flatnonzero(~env.action_masks[3])[0])
+        players = [player.copy() for player in env._players]
+        before = env.observations.copy()
+        with pytest.raises(MoveError):
+            env.step(legal + [illegal])
+        assert env._players == players
+        assert (env.observations == before).all()
+        env.step(legal + [int(np.flatnonzero(env.action_masks[3])[0])])
@@ -0,0 +1,47 @@
+"""Tests for the game server load testing harness."""
+
+import asyncio
+
+from est8.backend.definitions import GameDefinition
+from est8.server.load_test import get_memory_per_game, percentile, run_load_test
+from est8.server.server import GameServer
+
+
+def test_percentile(subtests):
+    values = list(range(1, 101))
+
+    with subtests.test("Nearest rank percentiles."):
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.99) == 99
+        assert percentile(values, 1.0) == 100
+
+    with subtests.test("No values."):
+        assert percentile([], 0.5) == 0.0
+
+
+def test_get_memory_per_game(subtests):
+    with subtests.test("Memory measured at peak active games."):
+        assert get_memory_per_game([(0, 100), (2, 500), (1, 1000)]) == (2, 200)
+
+    with subtests.test("No memory when not tracing."):
+        assert get_memory_per_game([(0, None), (3, None)]) == (3, None)
+
+
+def test_run_load_test(subtests):
+    async def inner(policy):
+        server = GameServer(GameDefinition.default(), players_per_game=2)
+        port = await server.start()
+        report = await run_load_test(
+            "127.0.0.1", port, num_clients=4, policy=policy, seed=1
+        )
+        await server.close()
+        return server, report
+
+    for policy in ("random", "greedy"):
+        with subtests.test(f"Clients play complete games with {policy} policy."):
+            server, report = asyncio.run(inner(policy))
+            assert server.num_games_finished == 2
+            assert report.num_games == 4
+            assert report.num_moves > 4
+            assert report.latency_p50 <= report.latency_p95 <= report.latency_p99
+            assert report.memory_per_game is None
@@ -0,0 +1,99 @@
+"""Tests for the server message protocol."""
+
+import asyncio
+import json
+
+import pytest
+
+from est8.backend.definitions import GameDefinition
+from est8.backend.house import House
+from est8.backend.move import Move
+from est8.backend.state_delta import StateDelta
+from est8.server.protocol import (
+    MAX_MESSAGE_SIZE,
+    LENGTH_STRUCT,
+    ProtocolError,
+    card_pairs_from_json,
+    card_pairs_to_json,
+    encode_message,
+    move_from_json,
+    move_to_json,
+    read_message,
+    state_delta_from_json,
+    state_delta_to_json,
+)
+
+
+def read_all(data: bytes):
+    """Read every message out of the given bytes."""
+
+    async def inner():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        messages = []
+        while True:
+            message = await read_message(reader)
+            if message is None:
+                return messages
+            messages.append(message)
+
+    return asyncio.run(inner())
+
+
+def test_messages(subtests):
+    with subtests.test("Messages round trip."):
+        messages = [{"type": "join"}, {"type": "move", "move": {"a": [1, 2]}}]
+        assert read_all(b"".join(encode_message(m) for m in messages)) == messages
+
+    with subtests.test("Oversized messages are rejected."):
+        with pytest.raises(ProtocolError):
+            read_all(LENGTH_STRUCT.pack(MAX_MESSAGE_SIZE + 1))
+
+    with subtests.test("Messages must have a type."):
+        with pytest.raises(ProtocolError):
+            read_all(encode_message({"move": None}))
+
+    with subtests.test("Truncated messages are connection errors."):
+        with pytest.raises(ConnectionError):
+            read_all(encode_message({"type": "join"})[:-1])
+
+
+def test_json_conversion(subtests):
+    with subtests.test("Moves round trip."):
+        for move in (Move(1, 2, 3, -1, (0, 1), 2, (1, 1), (2, 2)), Move(None)):
+            assert move_from_json(move_to_json(move)) == move
+
+    with subtests.test("Malformed moves are rejected."):
+        for data in (
+            {"card_pair_index": 0, "street_no": "1"},
+            {"card_pair_index": 0, "fence": [1]},
+            {"card_pair_index": 0, "unknown": 1},
+            {"street_no": 1},
+            [],
+        ):
+            with pytest.raises(ProtocolError):
+                move_from_json(data)
+
+    with subtests.test("Card pairs round trip."):
+        card_pairs = next(GameDefinition.default().generate_card_pairs())
+        assert card_pairs_from_json(card_pairs_to_json(card_pairs)) == card_pairs
+
+
+def test_state_delta_conversion(subtests):
+    delta = StateDelta(
+        houses=((0, 1, House(3, has_pool=True)), (2, 0, House(is_roundabout=True))),
+        fences=((0, 1), (2, 5)),
+        parks=((1, 1),),
+        counters=(("num_pools", 1),),
+        investments=((3, 1),),
+        plans=((1, 8),),
+        score=(("pools", 3), ("roundabouts", -3), ("plans", 8)),
+    )
+
+    with subtests.test("Deltas round trip through JSON."):
+        data = json.loads(json.dumps(state_delta_to_json(delta)))
+        assert state_delta_from_json(data) == delta
+
+    with subtests.test("Empty deltas are empty objects."):
+        assert state_delta_to_json(StateDelta()) == {}
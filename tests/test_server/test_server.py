@@ -0,0 +1,221 @@
+"""Tests for the GameServer, run against localhost."""
+
+import asyncio
+
+from random import Random
+from typing import Awaitable, Callable
+
+from est8.backend.definitions import GameDefinition
+from est8.backend.legal_moves import generate_legal_moves, has_any_legal_placement
+from est8.backend.move import Move
+from est8.backend.policies import RandomPolicy
+from est8.backend.state_delta import PlayerMirror
+from est8.backend.transcript import MoveValidator
+from est8.server.client import GameClient
+from est8.server.protocol import (
+    card_pairs_from_json,
+    state_delta_from_json,
+    write_message,
+)
+from est8.server.server import GameServer
+
+
+async def play_refusals(client: GameClient):
+    """Join a game and refuse every permit, returning the final message."""
+    await client.join()
+    while True:
+        message = await client.receive()
+        if message["type"] == "game_over":
+            return message
+        if message["type"] in ("turn_result", "refused"):
+            continue
+        assert (await client.send_move(Move.permit_refusal()))["type"] == "accepted"
+
+
+def test_server_plays_games(subtests):
+    async def inner():
+        server = GameServer(GameDefinition.default(), players_per_game=2, seed=0)
+        port = await server.start()
+        clients = [await GameClient.connect("127.0.0.1", port) for _ in range(4)]
+        results = await asyncio.gather(*(play_refusals(client) for client in clients))
+        await server.close()
+        return server, clients, results
+
+    server, clients, results = asyncio.run(inner())
+
+    with subtests.test("Every player gets their final score."):
+        for result in results:
+            assert result == {
+                "type": "game_over",
+                "scores": [-5, -5],
+                "reason": "finished",
+            }
+
+    with subtests.test("Players are seated in separate games."):
+        assert sorted(client.player_no for client in clients) == [0, 0, 1, 1]
+        assert server.num_games_finished == 2
+        assert server.num_active_games == 0
+
+
+def test_server_rejects_invalid_moves(subtests):
+    async def inner():
+        server = GameServer(GameDefinition.default())
+        port = await server.start()
+        client = await GameClient.connect("127.0.0.1", port)
+        await client.join()
+        await client.receive()
+        invalid = await client.send_move(Move(5, 0, 0))
+        await write_message(client.writer, {"type": "move", "move": "garbage"})
+        undecodable = await client.receive()
+        await write_message(client.writer, {"type": "join"})
+        unexpected = await client.receive()
+        valid = await client.send_move(Move(0, 0, 0))
+        await client.close()
+        await server.close()
+        return invalid, undecodable, unexpected, valid
+
+    invalid, undecodable, unexpected, valid = asyncio.run(inner())
+    with subtests.test("Illegal moves are answered with an error."):
+        assert invalid["type"] == "error"
+    with subtests.test("Moves that can't be decoded are answered with an error."):
+        assert undecodable["type"] == "error"
+    with subtests.test("Messages other than moves are answered with an error."):
+        assert unexpected["type"] == "error"
+    with subtests.test("The player can still make a valid move."):
+        assert valid["type"] == "accepted"
+
+
+async def play_until_dropped(client: GameClient, leave: Callable[[], Awaitable]):
+    """Join a game, play one turn, then leave it using the given coroutine."""
+    await client.join()
+    await client.receive()
+    await client.send_move(Move.permit_refusal())
+    await leave()
+
+
+def test_server_drops_players_who_leave(subtests):
+    async def malformed_frame(client: GameClient):
+        client.writer.write(b"\x00\x00\x00\x05nope!")
+        await client.writer.drain()
+
+    async def inner(leave):
+        server = GameServer(GameDefinition.default(), players_per_game=2)
+        port = await server.start()
+        leaver, stayer = [await GameClient.connect("127.0.0.1", port) for _ in range(2)]
+        result = await asyncio.gather(
+            play_until_dropped(leaver, lambda: leave(leaver)), play_refusals(stayer)
+        )
+        await server.close()
+        return result[1]
+
+    for leave in (GameClient.close, malformed_frame):
+        with subtests.test("The other players finish the game.", leave=leave.__name__):
+            result = asyncio.run(inner(leave))
+            assert result["reason"] == "finished"
+            assert len(result["scores"]) == 2
+
+
+def test_server_abandons_game_when_every_player_leaves():
+    async def inner():
+        server = GameServer(GameDefinition.default(), players_per_game=2)
+        port = await server.start()
+        clients = [await GameClient.connect("127.0.0.1", port) for _ in range(2)]
+        await asyncio.gather(
+            *(play_until_dropped(client, client.close) for client in clients)
+        )
+        while server.num_games_finished == 0:
+            await asyncio.sleep(0.01)
+        await server.close()
+        return server
+
+    assert asyncio.run(inner()).num_active_games == 0
+
+
+def test_server_forgets_players_who_leave_the_queue():
+    async def inner():
+        server = GameServer(GameDefinition.default(), players_per_game=2)
+        port = await server.start()
+        client = await GameClient.connect("127.0.0.1", port)
+        await write_message(client.writer, {"type": "join"})
+        while server.num_waiting_players == 0:
+            await asyncio.sleep(0.01)
+        await client.close()
+        while server.num_waiting_players == 1:
+            await asyncio.sleep(0.01)
+        await server.close()
+
+    # Times out rather than failing if the waiting player is never removed.
+    asyncio.run(asyncio.wait_for(inner(), 5))
+
+
+def test_server_sends_state_deltas():
+    """Test that a client can mirror every player from the deltas it is sent."""
+
+    async def play_and_mirror(client: GameClient):
+        game_definition = GameDefinition.default()
+        policy = RandomPolicy(Random(client.writer.get_extra_info("sockname")[1]))
+        state = MoveValidator(game_definition)
+        start = await client.join()
+        mirrors = [PlayerMirror(game_definition) for _ in range(start["num_players"])]
+        while True:
+            message = await client.receive()
+            if message["type"] == "game_over":
+                return message["scores"], [mirror.score for mirror in mirrors]
+            if message["type"] == "turn_result":
+                for mirror, delta in zip(mirrors, message["deltas"]):
+                    mirror.apply(state_delta_from_json(delta))
+                continue
+            if message["type"] == "refused":
+                continue
+            card_pairs = card_pairs_from_json(message["card_pairs"])
+            move = policy.choose_move(state, card_pairs)
+            state.check_and_apply(card_pairs, move)
+            assert (await client.send_move(move))["type"] == "accepted"
+
+    async def inner():
+        server = GameServer(GameDefinition.default(), players_per_game=2, seed=1)
+        port = await server.start()
+        clients = [await GameClient.connect("127.0.0.1", port) for _ in range(2)]
+        results = await asyncio.gather(*(play_and_mirror(c) for c in clients))
+        await server.close()
+        return results
+
+    for scores, mirrored_scores in asyncio.run(inner()):
+        assert scores == mirrored_scores
+
+
+def test_server_does_not_wait_for_refused_players():
+    async def play_randomly(client: GameClient):
+        # Building roundabouts uses them up, so eventually nothing can be built.
+        rng = Random(0)
+        state = MoveValidator(GameDefinition.default())
+        await client.join()
+        refused_turns = []
+        while True:
+            message = await client.receive()
+            if message["type"] == "game_over":
+                return message, refused_turns
+            if message["type"] == "turn_result":
+                continue
+            card_pairs = card_pairs_from_json(message["card_pairs"])
+            if message["type"] == "refused":
+                assert not has_any_legal_placement(state, card_pairs)
+                refused_turns.append(message["turn"])
+                continue
+            move = rng.choice(
+                list(generate_legal_moves(state, card_pairs, include_roundabouts=True))
+            )
+            state.check_and_apply(card_pairs, move)
+            assert (await client.send_move(move))["type"] == "accepted"
+
+    async def inner():
+        server = GameServer(GameDefinition.default(), seed=0)
+        port = await server.start()
+        client = await GameClient.connect("127.0.0.1", port)
+        result = await asyncio.wait_for(play_randomly(client), 10)
+        await server.close()
+        return result
+
+    game_over, refused_turns = asyncio.run(inner())
+    assert game_over["reason"] == "finished"
+    assert refused_turns
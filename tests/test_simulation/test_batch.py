@@ -0,0 +1,56 @@
+"""Tests for playing reproducible headless games."""
+
+from random import Random
+
+from est8.backend.definitions import GameDefinition
+from est8.backend.policies import GreedyPolicy, Policy, RandomPolicy
+from est8.simulation.batch import derive_seed, play_game
+
+
+class CountingPolicy(Policy):
+    """Play randomly, counting the moves made since the last reset."""
+
+    def __init__(self):
+        self.policy = RandomPolicy()
+        self.num_moves = 0
+
+    def reset(self):
+        self.num_moves = 0
+
+    def choose_move(self, state, card_pairs):
+        self.num_moves += 1
+        return self.policy.choose_move(state, card_pairs)
+
+
+def test_derive_seed(subtests):
+    with subtests.test("Seeds are stable."):
+        assert derive_seed(1, 2) == derive_seed(1, 2)
+
+    with subtests.test("Every game gets its own seed."):
+        seeds = {
+            derive_seed(seed, game_no) for seed in range(5) for game_no in range(50)
+        }
+        assert len(seeds) == 250
+
+
+def test_play_game(subtests):
+    game_definition = GameDefinition.default()
+
+    with subtests.test("Games are reproducible from their seed."):
+        records = [
+            play_game(
+                game_definition,
+                [GreedyPolicy(rng=Random(1)), GreedyPolicy(rng=Random(2))],
+                seed=3,
+            ).to_record()
+            for _ in range(2)
+        ]
+        assert records[0] == records[1]
+
+    with subtests.test("Policies are asked for every move of a game."):
+        policy = CountingPolicy()
+        policy.num_moves = 100
+        turns = []
+        game = play_game(game_definition, [policy], seed=4, on_turn=turns.append)
+        assert game.is_over
+        assert policy.num_moves == game.turn == len(turns)
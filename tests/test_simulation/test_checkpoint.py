@@ -0,0 +1,176 @@
+"""Tests for checkpointing and resuming simulations."""
+
+from dataclasses import replace
+from functools import partial
+
+import mock
+import pytest
+
+from est8.backend.errors import CheckpointFormatError
+from est8.backend.policies import GreedyPolicy, GreedyWeights, RandomPolicy
+from est8.simulation.checkpoint import (
+    Checkpoint,
+    get_run_digest,
+    read_checkpoint,
+    run_checkpointed_simulation,
+    write_checkpoint,
+)
+from est8.simulation.statistics import SimulationStatistics, aggregate_games
+
+SEATS = [("greedy", GreedyPolicy), ("random", RandomPolicy)]
+
+
+def test_run_checkpointed_simulation(subtests, small_game_definition, tmp_path):
+    expected = aggregate_games(small_game_definition, SEATS, 4, range(10)).to_json()
+
+    def run(path, **kwargs):
+        return run_checkpointed_simulation(
+            small_game_definition,
+            SEATS,
+            num_games=10,
+            path=path,
+            seed=4,
+            games_per_task=3,
+            max_workers=2,
+            **kwargs,
+        )
+
+    with subtests.test("A run from scratch leaves a complete checkpoint."):
+        path = str(tmp_path / "fresh.ckpt")
+        assert run(path).to_json() == expected
+        checkpoint = read_checkpoint(path)
+        assert checkpoint.completed == (True,) * 4
+        assert checkpoint.statistics.to_json() == expected
+
+    with subtests.test("A resumed run matches an uninterrupted one."):
+        # As if the run had stopped after its second and fourth tasks.
+        statistics = SimulationStatistics()
+        statistics.merge(aggregate_games(small_game_definition, SEATS, 4, range(3, 6)))
+        statistics.merge(aggregate_games(small_game_definition, SEATS, 4, range(9, 10)))
+        path = str(tmp_path / "resumed.ckpt")
+        write_checkpoint(
+            path,
+            Checkpoint(
+                run_digest=get_run_digest(small_game_definition, SEATS),
+                seed=4,
+                num_games=10,
+                games_per_task=3,
+                completed=(False, True, False, True),
+                statistics=statistics,
+            ),
+        )
+        assert run(path, checkpoint_interval=0).to_json() == expected
+        assert read_checkpoint(path).completed == (True,) * 4
+
+    with subtests.test("Complete tasks are not played again."):
+        path = str(tmp_path / "skipped.ckpt")
+        write_checkpoint(
+            path,
+            Checkpoint(
+                run_digest=get_run_digest(small_game_definition, SEATS),
+                seed=4,
+                num_games=10,
+                games_per_task=3,
+                completed=(True, True, True, False),
+                statistics=SimulationStatistics(),
+            ),
+        )
+        statistics = run(path)
+        assert statistics.to_json() == (
+            aggregate_games(small_game_definition, SEATS, 4, range(9, 10)).to_json()
+        )
+
+    with subtests.test("An interrupted run checkpoints the tasks it finished."):
+        path = str(tmp_path / "interrupted.ckpt")
+        merge = SimulationStatistics.merge
+        num_merged = []
+
+        def merge_until_interrupted(self, other):
+            if num_merged:
+                raise KeyboardInterrupt
+            num_merged.append(1)
+            merge(self, other)
+
+        with mock.patch.object(SimulationStatistics, "merge", merge_until_interrupted):
+            with pytest.raises(KeyboardInterrupt):
+                run(path)
+        assert sum(read_checkpoint(path).completed) == 1
+        assert run(path).to_json() == expected
+
+    with subtests.test("A run interrupted during a merge checkpoints what it says."):
+        path = str(tmp_path / "interrupted_merge.ckpt")
+        num_merged = []
+
+        def interrupt_after_merging(self, other):
+            merge(self, other)
+            num_merged.append(1)
+            if len(num_merged) == 2:
+                raise KeyboardInterrupt
+
+        with mock.patch.object(SimulationStatistics, "merge", interrupt_after_merging):
+            with pytest.raises(KeyboardInterrupt):
+                run(path)
+        checkpoint = read_checkpoint(path)
+        assert sum(checkpoint.completed) == 1
+        statistics = SimulationStatistics()
+        for task_no, complete in enumerate(checkpoint.completed):
+            if complete:
+                statistics.merge(
+                    aggregate_games(
+                        small_game_definition,
+                        SEATS,
+                        4,
+                        checkpoint.get_task_range(task_no),
+                    )
+                )
+        assert checkpoint.statistics.to_json() == statistics.to_json()
+        assert run(path).to_json() == expected
+
+    with subtests.test("Checkpoints of other runs are rejected."):
+        path = str(tmp_path / "other.ckpt")
+        run_checkpointed_simulation(
+            small_game_definition, SEATS[::-1], num_games=10, path=path, seed=4
+        )
+        with pytest.raises(CheckpointFormatError):
+            run(path)
+
+
+def test_get_run_digest(subtests, small_game_definition):
+    digest = get_run_digest(small_game_definition, SEATS)
+
+    with subtests.test("Digests are stable."):
+        assert get_run_digest(small_game_definition, list(SEATS)) == digest
+
+    with subtests.test("Policy parameters are part of the run."):
+        weights = GreedyWeights(pool=5.0)
+        seats = [("greedy", partial(GreedyPolicy, weights=weights)), SEATS[1]]
+        assert get_run_digest(small_game_definition, seats) != digest
+
+
+def test_read_checkpoint(subtests, tmp_path):
+    path = tmp_path / "checkpoint.ckpt"
+    checkpoint = Checkpoint(
+        run_digest=bytes(range(32)),
+        seed=2**63,
+        num_games=5,
+        games_per_task=2,
+        completed=(True, False, True),
+        statistics=SimulationStatistics(),
+    )
+    write_checkpoint(str(path), checkpoint)
+
+    with subtests.test("Checkpoints round trip."):
+        loaded = read_checkpoint(str(path))
+        assert replace(loaded, statistics=checkpoint.statistics) == checkpoint
+        assert loaded.get_task_range(2) == range(4, 5)
+
+    with subtests.test("Truncated checkpoints are rejected."):
+        path.write_bytes(path.read_bytes()[:-1])
+        with pytest.raises(CheckpointFormatError):
+            read_checkpoint(str(path))
+
+    for contents in (b"", b"not a checkpoint" * 10):
+        with subtests.test("Other files are rejected.", contents=contents):
+            path.write_bytes(contents)
+            with pytest.raises(CheckpointFormatError):
+                read_checkpoint(str(path))
@@ -0,0 +1,142 @@
+"""Tests for simulating games across workers over TCP, run against localhost."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from est8.backend.policies import GreedyPolicy, RandomPolicy
+from est8.server.protocol import ProtocolError, read_message, write_message
+from est8.simulation.batch import derive_seed, play_seeded_game
+from est8.simulation.distributed import (
+    SimulationCoordinator,
+    run_worker,
+    split_work,
+)
+from est8.simulation.results import get_record_dtype, write_game_records
+from est8.simulation.statistics import get_definition_key
+
+AGENTS = {"greedy": GreedyPolicy, "random": RandomPolicy}
+SEATS = ("greedy", "random")
+
+
+def get_expected_records(game_definition, work_items):
+    """Play every work item in process."""
+    expected = []
+    for item in work_items:
+        records = np.zeros(
+            len(item.game_nos) * len(item.seats),
+            dtype=get_record_dtype(game_definition),
+        )
+        for index, game_no in enumerate(item.game_nos):
+            game = play_seeded_game(
+                game_definition,
+                [AGENTS[name] for name in item.seats],
+                derive_seed(item.seed, game_no),
+            )
+            write_game_records(records[index * 2 : index * 2 + 2], game_no, game)
+        expected.append(records)
+    return expected
+
+
+async def take_work(port):
+    """Connect as a worker and take a work item without playing it."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await write_message(writer, {"type": "ready"})
+    message = await read_message(reader)
+    assert message["type"] == "work"
+    return reader, writer
+
+
+def run_simulation(game_definition, work_items, num_workers, fake_workers, **kwargs):
+    """
+    Run a coordinator with num_workers real workers, each on its own thread.
+
+    :param fake_workers: Called with the port before the real workers start.
+    :return: The records of each work item, and the number of items each worker played.
+    """
+    key = get_definition_key(game_definition)
+
+    async def inner():
+        coordinator = SimulationCoordinator(
+            {key: game_definition}, work_items, **kwargs
+        )
+        port = await coordinator.start()
+        await fake_workers(port)
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=max(num_workers, 1)) as executor:
+            workers = [
+                loop.run_in_executor(
+                    executor,
+                    asyncio.run,
+                    run_worker("127.0.0.1", port, {key: game_definition}, AGENTS),
+                )
+                for _ in range(num_workers)
+            ]
+            try:
+                return await coordinator.wait(), await asyncio.gather(*workers)
+            finally:
+                await asyncio.gather(*workers, return_exceptions=True)
+
+    return asyncio.run(inner())
+
+
+def test_simulation_coordinator(subtests, small_game_definition):
+    key = get_definition_key(small_game_definition)
+    work_items = split_work(key, SEATS, seed=3, num_games=13, games_per_item=2)
+    expected = get_expected_records(small_game_definition, work_items)
+
+    async def no_fake_workers(port):
+        pass
+
+    with subtests.test("Workers share the work."):
+        results, num_items = run_simulation(
+            small_game_definition, work_items, 3, no_fake_workers
+        )
+        assert len(results) == len(work_items) == 7
+        for records, expected_records in zip(results, expected):
+            assert np.array_equal(records, expected_records)
+        assert sum(num_items) >= len(work_items)
+
+    with subtests.test("Work from lost workers is played again."):
+
+        async def lost_workers(port):
+            for _ in range(2):
+                _, writer = await take_work(port)
+                writer.close()
+
+        results, _ = run_simulation(small_game_definition, work_items, 2, lost_workers)
+        for records, expected_records in zip(results, expected):
+            assert np.array_equal(records, expected_records)
+
+    with subtests.test("Work held by stalled workers is stolen."):
+        stalled = []
+
+        async def stalled_workers(port):
+            stalled.append(await take_work(port))
+
+        results, _ = run_simulation(
+            small_game_definition, work_items, 1, stalled_workers
+        )
+        for records, expected_records in zip(results, expected):
+            assert np.array_equal(records, expected_records)
+        # The coordinator has hung up on the stalled worker.
+        assert stalled[0][0].at_eof()
+
+    with subtests.test("Runs fail once an item is lost too many times."):
+
+        async def failing_workers(port):
+            for _ in range(2):
+                _, writer = await take_work(port)
+                writer.close()
+                await asyncio.sleep(0.01)
+
+        with pytest.raises(ProtocolError):
+            run_simulation(
+                small_game_definition,
+                work_items[:1],
+                0,
+                failing_workers,
+                max_attempts=2,
+            )
@@ -0,0 +1,56 @@
+"""Tests for running tasks with a bounded number in flight."""
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import pytest
+
+from est8.simulation.pool import get_max_in_flight, run_windowed
+
+
+def test_run_windowed(subtests):
+    lock = Lock()
+    in_flight = [0, 0]
+
+    def square(value):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        with lock:
+            in_flight[0] -= 1
+        return value * value
+
+    submitted = []
+
+    def tasks():
+        for value in range(50):
+            submitted.append(value)
+            yield f"task {value}", (value,)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for key, result in run_windowed(executor, square, tasks(), max_in_flight=3):
+            with subtests.test("Tasks are only read as results are handed over."):
+                # The window is running, and the rest of a batch is waiting to be read.
+                assert len(submitted) - len(results) <= 2 * 3
+            results[key] = result
+
+    with subtests.test("Every task's result is yielded with its key."):
+        assert results == {f"task {value}": value * value for value in range(50)}
+
+    with subtests.test("No more tasks than the window are ever running."):
+        assert in_flight[1] <= 3
+
+
+def test_run_windowed_raises_task_errors():
+    def fail(value):
+        raise ValueError(value)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        with pytest.raises(ValueError):
+            list(run_windowed(executor, fail, [(0, (0,)), (1, (1,))], 2))
+
+
+def test_get_max_in_flight():
+    assert get_max_in_flight(3) == 6
+    assert get_max_in_flight(None) >= 2
@@ -0,0 +1,75 @@
+"""Tests for simulation results written to shared memory."""
+
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from est8.backend.policies import GreedyPolicy, RandomPolicy
+from est8.simulation.batch import derive_seed, play_seeded_game
+from est8.simulation.results import (
+    SCORE_CATEGORIES,
+    SharedResults,
+    simulate_to_shared_memory,
+)
+
+
+def test_simulate_to_shared_memory(subtests, small_game_definition):
+    factories = [GreedyPolicy, RandomPolicy]
+    num_games = 7
+    results = simulate_to_shared_memory(
+        small_game_definition,
+        factories,
+        num_games,
+        seed=5,
+        games_per_task=3,
+        max_workers=2,
+    )
+    with results:
+        records = results.records
+
+        with subtests.test("Records are views of the shared memory."):
+            assert records.base is not None
+            assert not records.flags.owndata
+            assert len(records) == num_games * len(factories)
+
+        with subtests.test("Records match games played in process."):
+            for game_no in range(num_games):
+                game = play_seeded_game(
+                    small_game_definition, factories, derive_seed(5, game_no)
+                )
+                game_records = results.game_records(game_no)
+                assert list(game_records["game_no"]) == [game_no] * len(factories)
+                assert list(game_records["player_no"]) == list(range(len(factories)))
+                assert tuple(game_records["score"]) == game.scores()
+                for record, player, breakdown in zip(
+                    game_records, game.players, game.score_breakdowns()
+                ):
+                    assert list(record["breakdown"]) == [
+                        breakdown[category] for category in SCORE_CATEGORIES
+                    ]
+                    estates = Counter(player.neighbourhood.get_all_estates())
+                    assert list(record["estates"]) == [
+                        estates[size] for size in range(1, len(record["estates"]) + 1)
+                    ]
+
+        with subtests.test("Breakdowns add up to the score."):
+            assert np.array_equal(records["breakdown"].sum(axis=1), records["score"])
+
+        with subtests.test("Results can be attached to by name."):
+            attached = SharedResults.attach(
+                results.name, small_game_definition, num_games, len(factories)
+            )
+            with attached:
+                assert np.array_equal(attached.records, records)
+
+        # Views must be released before the shared memory is closed.
+        del records, game_records, record
+
+    with subtests.test("Closing with a view alive is refused."):
+        results = SharedResults.create(small_game_definition, 1, 1)
+        view = results.game_records(0)
+        with pytest.raises(BufferError):
+            results.close()
+        del view
+        results.shared_memory.close()
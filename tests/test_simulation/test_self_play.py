@@ -0,0 +1,87 @@
+"""Tests for fitting evaluation weights by self-play."""
+
+import os
+from random import Random
+
+import numpy as np
+import pytest
+
+from est8.backend.encoding import get_encoding_size, get_feature_names
+from est8.backend.player import Player
+from est8.simulation.batch import play_game
+from est8.simulation.self_play import LinearPolicy, fit_weights, run_self_play
+
+
+def test_linear_policy(subtests, tiny_game_definition):
+    names = get_feature_names(tiny_game_definition)
+    weights = np.zeros(len(names) + 1)
+    weights[names.index("pools")] = 1.0
+    policy = LinearPolicy(tiny_game_definition, weights, rng=Random(1))
+    game = play_game(tiny_game_definition, [policy], seed=2)
+
+    with subtests.test("The policy tracks the player's state."):
+        player = game.players[0]
+        assert [street.houses for street in policy.player.neighbourhood.streets] == [
+            street.houses for street in player.neighbourhood.streets
+        ]
+
+    with subtests.test("The policy plays for the best valued states."):
+        # With this seed, a pool is drawn while the only pool plot is free.
+        assert player.num_pools == 1
+
+    with subtests.test("Reset starts a new game."):
+        policy.reset()
+        assert policy.player == Player.new(tiny_game_definition)
+
+
+def test_fit_weights(subtests, tmp_path):
+    rng = np.random.default_rng(1)
+    true_weights = rng.normal(size=4)
+    paths = []
+    for part in range(3):
+        features = rng.normal(size=(20, 3)).astype(np.float32)
+        scores = features @ true_weights[:-1] + true_weights[-1]
+        path = str(tmp_path / f"part-{part}.npz")
+        np.savez(path, features=features, scores=scores.astype(np.float32))
+        paths.append(path)
+
+    with subtests.test("Fit across every file."):
+        assert np.allclose(fit_weights(paths), true_weights, atol=1e-4)
+
+    with subtests.test("There must be samples."):
+        with pytest.raises(ValueError):
+            fit_weights([])
+
+
+def test_run_self_play(subtests, tmp_path, tiny_game_definition):
+    iterations = run_self_play(
+        tiny_game_definition,
+        str(tmp_path),
+        num_iterations=2,
+        num_games=6,
+        num_players=2,
+        games_per_batch=4,
+        max_workers=2,
+    )
+
+    with subtests.test("The first iteration plays greedily."):
+        assert iterations[0].weights is None
+
+    with subtests.test("Later iterations play with the fitted weights."):
+        assert iterations[1].weights is iterations[0].fitted_weights
+
+    for iteration_no, iteration in enumerate(iterations):
+        with subtests.test("Samples and weights are written.", iteration=iteration_no):
+            assert len(iteration.paths) == 2
+            assert all(os.path.exists(path) for path in iteration.paths)
+            assert iteration.fitted_weights.shape == (
+                get_encoding_size(tiny_game_definition) + 1,
+            )
+            assert os.path.exists(
+                tmp_path / f"iteration-{iteration_no:03d}-weights.npy"
+            )
+            total_samples = 0
+            for path in iteration.paths:
+                with np.load(path) as samples:
+                    total_samples += len(samples["scores"])
+            assert total_samples == iteration.num_samples > 12
@@ -0,0 +1,92 @@
+"""Tests for constant-memory statistics of simulation results."""
+
+import numpy as np
+import pytest
+
+from est8.backend.policies import GreedyPolicy, RandomPolicy
+from est8.simulation.statistics import (
+    FIELDS,
+    Distribution,
+    SimulationStatistics,
+    aggregate_games,
+    get_definition_key,
+    simulate_statistics,
+)
+
+
+def test_distribution(subtests):
+    values = np.array([3, -2, 7, 7, 0, 3, 3, 12])
+
+    def distribution_of(*batches):
+        distribution = Distribution()
+        for batch in batches:
+            distribution.add(batch)
+        return distribution
+
+    distribution = distribution_of(values)
+    with subtests.test("Moments match NumPy."):
+        assert distribution.count == len(values)
+        assert distribution.mean == pytest.approx(values.mean())
+        assert distribution.variance == pytest.approx(values.var())
+
+    with subtests.test("Quantiles are read from the histogram."):
+        assert distribution.quantile(0) == -2
+        assert distribution.quantile(0.5) == 3
+        assert distribution.quantile(0.75) == 7
+        assert distribution.quantile(1) == 12
+        assert distribution.histogram() == {-2: 1, 0: 1, 3: 3, 7: 2, 12: 1}
+
+    with subtests.test("Adding in batches grows the histogram either way."):
+        batched = distribution_of(values[:3], values[3:5], values[5:])
+        assert batched.to_json() == distribution.to_json()
+
+    with subtests.test("Merging gives the same as adding everything."):
+        merged = distribution_of(values[5:])
+        merged.merge(Distribution())
+        merged.merge(distribution_of(values[:5]))
+        assert merged.to_json() == distribution.to_json()
+
+    with subtests.test("Distributions round trip through JSON."):
+        loaded = Distribution.from_json(distribution.to_json())
+        assert loaded.histogram() == distribution.histogram()
+        assert loaded.variance == distribution.variance
+
+    with subtests.test("Empty distributions have no quantiles."):
+        with pytest.raises(ValueError):
+            Distribution().quantile(0.5)
+
+
+def test_simulate_statistics(subtests, small_game_definition, tmp_path):
+    seats = [("greedy", GreedyPolicy), ("random", RandomPolicy)]
+    key = get_definition_key(small_game_definition)
+    snapshot_path = str(tmp_path / "snapshot.json")
+    statistics = simulate_statistics(
+        small_game_definition,
+        seats,
+        num_games=9,
+        seed=2,
+        games_per_task=4,
+        max_workers=2,
+        snapshot_path=snapshot_path,
+    )
+    expected = aggregate_games(small_game_definition, seats, 2, range(9))
+
+    with subtests.test("Statistics are kept per policy and definition."):
+        assert set(statistics.distributions) == {("greedy", key), ("random", key)}
+        for name, _ in seats:
+            for field in FIELDS:
+                assert statistics.get(name, key, field).count == 9
+
+    with subtests.test("Merged statistics match a single process."):
+        assert statistics.to_json() == expected.to_json()
+
+    with subtests.test("The final snapshot has every game."):
+        snapshot = SimulationStatistics.read_snapshot(snapshot_path)
+        assert snapshot.to_json() == expected.to_json()
+
+    with subtests.test("The summary has every field of every policy."):
+        summary = statistics.summary()
+        assert set(summary) == {f"greedy@{key}", f"random@{key}"}
+        assert summary[f"greedy@{key}"]["score"]["mean"] == pytest.approx(
+            statistics.get("greedy", key).mean
+        )
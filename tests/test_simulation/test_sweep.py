@@ -0,0 +1,168 @@
+"""Tests for sweeping the parameters of a game definition."""
+
+import pytest
+
+from est8.backend.definitions import InvestDefinition
+from est8.backend.policies import GreedyPolicy, RandomPolicy
+from est8.simulation.statistics import get_definition_key
+from est8.simulation.sweep import (
+    apply_configuration,
+    get_rules_digest,
+    get_win_points,
+    grid_search,
+    random_search,
+    run_sweep,
+)
+
+INVEST_MAP = InvestDefinition.default().map.items()
+
+
+def test_apply_configuration(subtests, small_game_definition):
+    configured = apply_configuration(
+        small_game_definition,
+        {
+            "bis": (0, -2, -4),
+            "invest_map": {1: (1, 2), 2: (2, 4)},
+            "park_scoring": ((0, 1), (0, 2, 3)),
+            "pool_locations": ((0, 3), (2,)),
+        },
+    )
+
+    with subtests.test("Parameters are set."):
+        assert configured.scoring.bis == (0, -2, -4)
+        assert configured.scoring.invest.map == {1: (1, 2), 2: (2, 4)}
+        assert configured.neighbourhood.streets[1].park_scoring == (0, 2, 3)
+        assert configured.neighbourhood.streets[0].pool_locations == (0, 3)
+        assert configured.scoring.pool == small_game_definition.scoring.pool
+
+    with subtests.test("Unknown parameters are rejected."):
+        with pytest.raises(ValueError):
+            apply_configuration(small_game_definition, {"colour": "red"})
+
+    with subtests.test("Street parameters need a value for each street."):
+        with pytest.raises(ValueError):
+            apply_configuration(small_game_definition, {"park_scoring": ((0, 1),)})
+
+
+def test_get_rules_digest(subtests, small_game_definition):
+    digest = get_rules_digest(small_game_definition)
+
+    for configuration in (
+        {"pool": (0, 1, 2, 3, 4, 5, 6, 7, 8, 9)},
+        {"park_scoring": ((0, 1, 1), (0, 9))},
+    ):
+        with subtests.test("Score values don't change the rules.", **configuration):
+            assert (
+                get_rules_digest(
+                    apply_configuration(small_game_definition, configuration)
+                )
+                == digest
+            )
+
+    for configuration in (
+        {"roundabout": (0, -3)},
+        {"pool_locations": ((0,), ())},
+    ):
+        with subtests.test("Legal moves change the rules.", **configuration):
+            assert (
+                get_rules_digest(
+                    apply_configuration(small_game_definition, configuration)
+                )
+                != digest
+            )
+
+    with subtests.test("Investment values change the rules."):
+        configuration = {
+            "invest_map": {size: (size,) * len(values) for size, values in INVEST_MAP}
+        }
+        assert (
+            get_rules_digest(apply_configuration(small_game_definition, configuration))
+            != digest
+        )
+
+
+def test_search(subtests):
+    space = {"bis": [(0, -1), (0, -2)], "pool": [(0, 1), (0, 2), (0, 3)]}
+
+    with subtests.test("The grid has every combination."):
+        grid = grid_search(space)
+        assert len(grid) == 6
+        assert {"bis": (0, -2), "pool": (0, 3)} in grid
+
+    with subtests.test("Random searches are reproducible."):
+        configurations = random_search(space, 5, seed=3)
+        assert configurations == random_search(space, 5, seed=3)
+        assert all(configuration in grid for configuration in configurations)
+
+
+def test_get_win_points():
+    assert get_win_points([3, 7, 5]) == [0, 1, 0]
+    assert get_win_points([7, 7, 5]) == [0.5, 0.5, 0]
+
+
+def test_run_sweep(subtests, small_game_definition):
+    configurations = [
+        {},
+        {"pool": (0, 10, 20, 30, 40, 50, 60, 70, 80, 90)},
+        {"park_scoring": ((0, 0, 0), (0, 20))},
+        {"pool_locations": ((0, 1, 2, 3), ())},
+    ]
+    seats = [("random", RandomPolicy), ("other_random", RandomPolicy)]
+
+    def sweep(rescore):
+        return run_sweep(
+            small_game_definition,
+            configurations,
+            seats,
+            num_games=6,
+            seed=1,
+            games_per_task=4,
+            max_workers=2,
+            rescore=rescore,
+        )
+
+    rescored = sweep(rescore=True)
+    simulated = sweep(rescore=False)
+
+    with subtests.test("Only configurations with the same rules are rescored."):
+        assert [result.rescored for result in rescored] == [False, True, True, False]
+        assert not any(result.rescored for result in simulated)
+
+    with subtests.test("Rescoring matches simulating for score-blind policies."):
+        for rescored_result, simulated_result in zip(rescored, simulated):
+            assert (
+                rescored_result.statistics.to_json()
+                == simulated_result.statistics.to_json()
+            )
+            assert rescored_result.win_shares == simulated_result.win_shares
+
+    with subtests.test("Results are keyed by their definition."):
+        for configuration, result in zip(configurations, rescored):
+            assert result.configuration == configuration
+            assert result.definition_key == get_definition_key(
+                apply_configuration(small_game_definition, configuration)
+            )
+            assert result.statistics.get("random", result.definition_key).count == 6
+            assert sum(result.win_shares.values()) == pytest.approx(1)
+
+    with subtests.test("Configurations share their draws."):
+        # Even when simulated, random players make the same moves from the same draws.
+        base, pools = simulated[0].statistics, simulated[1].statistics
+        base_key, pools_key = simulated[0].definition_key, simulated[1].definition_key
+        assert (
+            base.get("random", base_key, "parks").to_json()
+            == pools.get("random", pools_key, "parks").to_json()
+        )
+
+    with subtests.test("Score-aware policies can be swept."):
+        results = run_sweep(
+            small_game_definition,
+            configurations[:2],
+            [("greedy", GreedyPolicy)],
+            num_games=2,
+            max_workers=1,
+        )
+        assert [
+            result.statistics.get("greedy", result.definition_key).count
+            for result in results
+        ] == [2, 2]
@@ -0,0 +1,113 @@
+"""Tests for round-robin tournaments between policies."""
+
+from collections import Counter
+
+import pytest
+
+from est8.backend.policies import GreedyPolicy, RandomPolicy
+from est8.simulation.tournament import (
+    RatingTable,
+    elo_from_fraction,
+    get_schedule,
+    run_tournament,
+)
+
+
+def test_elo_from_fraction():
+    assert elo_from_fraction(0.5) == 0
+    assert elo_from_fraction(0.75) == pytest.approx(190.85, abs=0.01)
+    assert elo_from_fraction(0.25) == pytest.approx(-elo_from_fraction(0.75))
+
+
+def test_rating_table(subtests):
+    table = RatingTable(["a", "b", "c"])
+    table.add_game(("a", "b", "c"), (10, 5, 10), deal=0)
+    table.add_game(("b", "c", "a"), (8, 8, 1), deal=1)
+
+    with subtests.test("Games are scored as pairwise results."):
+        assert table.num_games == 2
+        assert table.pairwise_fraction("a", "b") == 0.5
+        assert table.pairwise_fraction("a", "c") == 0.25
+        assert table.pairwise_fraction("c", "b") == 0.75
+
+    with subtests.test("Ratings come from the share of the points."):
+        ratings = table.ratings()
+        assert ratings["c"].elo == pytest.approx(elo_from_fraction(3 / 4))
+        assert ratings["c"].num_results == 4
+        assert ratings["c"].num_deals == 2
+        assert ratings["a"].lower < ratings["a"].elo < ratings["a"].upper
+
+    with subtests.test("Games on the same deal count as one sample."):
+        # Whoever sits first wins, so each deal's rotations cancel out exactly.
+        seat_advantage = RatingTable(["a", "b"])
+        for deal in range(10):
+            seat_advantage.add_game(("a", "b"), (1, 0), deal)
+            seat_advantage.add_game(("b", "a"), (1, 0), deal)
+        rating = seat_advantage.rating("a")
+        assert rating.num_results == 20
+        assert rating.num_deals == 10
+        assert rating.elo == rating.lower == rating.upper == 0
+
+    with subtests.test("A single deal can't bound a rating."):
+        one_deal = RatingTable(["a", "b"])
+        one_deal.add_game(("a", "b"), (1, 0), deal=0)
+        one_deal.add_game(("b", "a"), (0, 1), deal=0)
+        assert one_deal.rating("a").upper == float("inf")
+
+    with subtests.test("Agents with no results aren't rated."):
+        rating = RatingTable(["a"]).rating("a")
+        assert rating.num_results == 0
+        assert not RatingTable(["a"]).has_converged(1000)
+
+
+def test_get_schedule(subtests):
+    names = ["a", "b", "c", "d"]
+    schedule = get_schedule(names, 3, round_no=0, seed=1)
+
+    with subtests.test("Every agent plays every seat equally often."):
+        seats = Counter(
+            (name, seat) for seating, _ in schedule for seat, name in enumerate(seating)
+        )
+        assert set(seats.values()) == {3}
+        assert len(seats) == 12
+
+    with subtests.test("Each matchup plays every seating on the same deal."):
+        seeds = Counter(game_seed for _, game_seed in schedule)
+        assert len(seeds) == 4
+        assert set(seeds.values()) == {3}
+
+    with subtests.test("Each round gets new deals."):
+        other_seeds = {
+            game_seed for _, game_seed in get_schedule(names, 3, round_no=1, seed=1)
+        }
+        assert not other_seeds & set(seeds)
+
+
+def test_run_tournament(subtests, small_game_definition):
+    results = []
+    report = run_tournament(
+        small_game_definition,
+        {"greedy": GreedyPolicy, "random": RandomPolicy},
+        max_rounds=30,
+        min_rounds=5,
+        precision=2000,
+        max_workers=2,
+        on_game=lambda seating, scores, table: results.append(table.num_games),
+    )
+
+    with subtests.test("Stop early once the ratings have converged."):
+        assert report.converged
+        assert report.num_rounds == 5
+        assert report.num_games == 10
+        assert results == list(range(1, 11))
+
+    report = run_tournament(
+        small_game_definition,
+        {"greedy": GreedyPolicy, "random": RandomPolicy},
+        max_rounds=20,
+        max_workers=2,
+    )
+    with subtests.test("Better policies are rated higher."):
+        assert not report.converged
+        assert report.num_games == 40
+        assert report.ratings["greedy"].elo > 0 > report.ratings["random"].elo